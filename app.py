@@ -1,11 +1,29 @@
+import io
 import os
+import re
 import logging
 import time
-from flask import Flask, render_template, request, jsonify, send_from_directory, redirect, url_for
-from utils.speech_to_text import convert_speech_to_text
+from datetime import datetime, timedelta
+from flask import Flask, render_template, request, jsonify, send_from_directory, redirect, url_for, Response, abort
+from utils.speech_to_text import recognize_audio, preload_backend, StreamingRecognizer
+from utils.video_retrieval import get_video_paths, get_video_index, load_video_index, STATIC_DIR
+from utils.video_serving import send_video, version_token, VIDEO_EXTENSIONS, VIDEO_SENDFILE_MODE
+from utils.asset_store import asset_file, is_digest
+from utils.video_stitching import stitch_videos, sentence_video_url, StitchBusy
+from utils.jobs import JobRunner, JobQueueFull
+from utils.write_behind import TranslationWriter, queued_at
+from utils.transcoder import TranscoderBusy
+from utils.streaming import StreamManager, StreamLimitExceeded
+from utils.result_cache import translation_cache
 from utils.text_to_gloss import convert_text_to_gloss
-from utils.video_retrieval import get_video_paths
-from models import db, SignVideo, Translation, UserFeedback
+from utils.audio_cache import audio_cache
+from utils.search import init_search, search_translations
+from utils.related import find_related_translations
+from utils.history import history_page, approximate_count, HISTORY_PAGE_SIZE
+from utils.retention import ensure_partitions
+from werkzeug.datastructures import FileStorage
+from werkzeug.security import safe_join
+from models import db, upgrade_schema, Translation, TranslationDailyRollup, UserFeedback
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -24,47 +42,228 @@ app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
     "pool_pre_ping": True,
 }
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+# Let Apache/lighttpd send video files instead of the Python worker
+app.config["USE_X_SENDFILE"] = VIDEO_SENDFILE_MODE == 'x-sendfile'
 # Initialize the app with the extension
 db.init_app(app)
 
+# 'sync' answers /process-audio inline, 'async' queues it as a background job
+PROCESS_AUDIO_MODE = os.environ.get("PROCESS_AUDIO_MODE", "sync")
+
+# Longest a client may long-poll a job status request, in seconds
+JOB_MAX_WAIT = float(os.environ.get("JOB_MAX_WAIT", "30"))
+
+# Shared pool running queued translation jobs
+job_runner = JobRunner()
+
+# Queues translations and writes them to the database in batches
+translation_writer = TranslationWriter(app)
+
+# Longest a translation link waits for another worker to write the translation, in seconds
+TRANSLATION_REF_WAIT = float(os.environ.get("TRANSLATION_REF_WAIT", "2"))
+
+# Time (in seconds) past the writer's flush interval a queued translation may take to be written
+TRANSLATION_REF_MARGIN = float(os.environ.get("TRANSLATION_REF_MARGIN", "5"))
+
+# Shape of the references handed out by the translation writer
+TRANSLATION_REF_RE = re.compile(r'[0-9a-f]{32}')
+
+def recognize_stream_partial(session, audio_bytes):
+    """Recognize the audio streamed so far and look up its gloss and videos."""
+    if session.closed or session.expired:
+        return None
+    # One recognizer per session, so each run only processes the new audio
+    if session.recognizer is None:
+        session.recognizer = StreamingRecognizer(session.mimetype)
+    text = session.recognizer.recognize(audio_bytes)
+    if not text:
+        return None
+    with app.app_context():
+        gloss, video_paths = translation_cache.lookup(text)
+    return {'text': text, 'gloss': gloss, 'videos': video_paths}
+
+# Open streaming sessions and their incremental recognition workers
+stream_manager = StreamManager(recognize_stream_partial)
+
+# Longest gloss sequence accepted for a stitched sentence video
+MAX_SENTENCE_GLOSSES = int(os.environ.get("MAX_SENTENCE_GLOSSES", "50"))
+
 # Ensure required directories exist
 video_directory = os.path.join(app.static_folder, 'videos')
 os.makedirs(video_directory, exist_ok=True)
 
-# Create database tables if they don't exist
+# Create database tables if they don't exist and load the video index
 with app.app_context():
     db.create_all()
+    upgrade_schema()
+    ensure_partitions()
+    init_search()
+    load_video_index()
+
+# Load the speech recognition model once per worker, not per request
+preload_backend()
 
 @app.route('/')
 def index():
     """Render the main page of the application."""
     return render_template('index.html')
 
+def translation_json(translation):
+    """Serialize a translation for the JSON APIs."""
+    return {
+        'id': translation.id,
+        'original_text': translation.original_text,
+        'gloss_text': translation.gloss_text,
+        'timestamp': translation.timestamp.isoformat() if translation.timestamp else None,
+        'is_successful': translation.is_successful,
+        'error_message': translation.error_message,
+        'translation_time': translation.translation_time,
+        'url': url_for('view_translation', translation_id=translation.id),
+    }
+
 @app.route('/history')
 def history():
     """Show translation history from the database."""
-    page = request.args.get('page', 1, type=int)
-    per_page = 10
     search = request.args.get('search', '')
     
-    # Get translations from database
-    query = Translation.query
-    if search:
-        query = query.filter(Translation.original_text.ilike(f'%{search}%') | 
-                             Translation.gloss_text.ilike(f'%{search}%'))
-    
-    # Paginate results
-    paginated = query.order_by(Translation.timestamp.desc()).paginate(
-        page=page, per_page=per_page, error_out=False)
-    translations = paginated.items
-    total_pages = paginated.pages
+    # Pages are addressed by cursor, so deep pages cost the same as the first
+    try:
+        page = history_page(search, after=request.args.get('after'),
+                            before=request.args.get('before'))
+    except ValueError:
+        page = history_page(search)
+    total, exact = approximate_count(search)
     
     return render_template('history.html', 
-                          translations=translations, 
-                          page=page, 
-                          total_pages=total_pages,
+                          translations=page['translations'], 
+                          next_cursor=page['next'],
+                          prev_cursor=page['prev'],
+                          total=total,
+                          total_exact=exact,
                           search=search)
 
+@app.route('/api/history')
+def api_history():
+    """
+    Get the translation history as JSON, newest first.
+    
+    Query parameters are ``search``, ``limit`` and one of the ``after`` or
+    ``before`` cursors returned by a previous call.
+    """
+    search = request.args.get('search', '')
+    limit = request.args.get('limit', HISTORY_PAGE_SIZE, type=int)
+    try:
+        page = history_page(search, after=request.args.get('after'),
+                            before=request.args.get('before'), per_page=limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    total, exact = approximate_count(search)
+    
+    def page_url(**cursor):
+        return url_for('api_history', search=search or None, limit=limit, **cursor)
+    
+    return jsonify({
+        'results': [translation_json(translation) for translation in page['translations']],
+        'next': page_url(after=page['next']) if page['next'] else None,
+        'prev': page_url(before=page['prev']) if page['prev'] else None,
+        'total': total,
+        'total_exact': exact,
+    })
+
+@app.route('/api/search')
+def api_search():
+    """
+    Search translations, best matches first.
+    
+    Query parameters are ``q`` (the search text) and ``limit``.
+    """
+    term = request.args.get('q', '').strip()
+    if not term:
+        return jsonify({'error': 'Missing search text (q)'}), 400
+    limit = request.args.get('limit', 20, type=int)
+    
+    results = search_translations(term, limit=limit)
+    return jsonify({
+        'query': term,
+        'results': [{**translation_json(translation), 'score': score}
+                    for translation, score in results],
+    })
+
+@app.route('/api/stats/daily')
+def api_daily_stats():
+    """
+    Get daily translation figures from the precomputed rollups.
+    
+    Query parameter ``days`` sets how many days back to report (default 30).
+    """
+    days = max(1, min(request.args.get('days', 30, type=int), 3660))
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    rollups = TranslationDailyRollup.query.filter(
+        TranslationDailyRollup.day >= since).order_by(TranslationDailyRollup.day).all()
+    return jsonify({
+        'days': [{
+            'day': rollup.day.isoformat(),
+            'total': rollup.total,
+            'successful': rollup.successful,
+            'success_rate': rollup.success_rate,
+            'mean_time': rollup.mean_time,
+            'p95_time': rollup.p95_time,
+        } for rollup in rollups],
+    })
+
+@app.route('/translation/ref/<ref>')
+def view_translation_ref(ref):
+    """
+    View a translation by the reference returned when it was processed.
+    
+    A translation queued by another worker may not be written yet, so a
+    missing one is looked up again for up to TRANSLATION_REF_WAIT seconds.
+    If it is still missing but was queued recently enough to still be on
+    its way, the page answers 202 and asks the browser to retry; once it is
+    older than a flush interval plus TRANSLATION_REF_MARGIN, it answers 404.
+    """
+    if not TRANSLATION_REF_RE.fullmatch(ref):
+        abort(404)
+    
+    # The row may still be queued in this process; write it now if so
+    if translation_writer.is_pending(ref):
+        translation_writer.flush()
+    
+    deadline = time.monotonic() + TRANSLATION_REF_WAIT
+    while True:
+        translation = Translation.query.filter_by(public_id=ref).first()
+        if translation is not None:
+            return redirect(url_for('view_translation', translation_id=translation.id))
+        if not translation_writer.enabled or time.monotonic() >= deadline:
+            break
+        # End the read transaction so the next lookup sees newly committed rows
+        db.session.rollback()
+        time.sleep(min(0.1, max(0, deadline - time.monotonic())))
+    
+    # References made before they recorded their queue time all exist by now
+    age = time.time() - queued_at(ref)
+    max_age = translation_writer.flush_interval + TRANSLATION_REF_MARGIN
+    if not translation_writer.enabled or not -TRANSLATION_REF_MARGIN <= age <= max_age:
+        abort(404)
+    return Response("This translation is still being saved, the page will reload shortly.",
+                    status=202, mimetype='text/plain', headers={'Retry-After': '1', 'Refresh': '1'})
+
+def translation_glosses(translation):
+    """
+    Get the gloss words/phrases of a translation as they were served.
+    
+    Multi-word glosses such as "YOU FREE TODAY" can't be recovered by
+    splitting ``gloss_text``. Rows saved before ``gloss_tokens`` existed
+    are converted again, and the result is only trusted if it still
+    matches the stored text.
+    """
+    if translation.gloss_tokens is not None:
+        return translation.gloss_tokens
+    gloss = convert_text_to_gloss(translation.original_text)
+    if " ".join(gloss) == translation.gloss_text:
+        return gloss
+    return translation.gloss_text.split()
+
 @app.route('/translation/<int:translation_id>')
 def view_translation(translation_id):
     """View details of a specific translation."""
@@ -73,26 +272,13 @@ def view_translation(translation_id):
     # Get feedback if it exists
     feedback = UserFeedback.query.filter_by(translation_id=translation_id).first()
     
-    # Get related translations (with similar text)
-    related_translations = []
-    if translation.original_text:
-        words = translation.original_text.split()
-        if words:
-            # Use the first word for finding related translations
-            search_term = words[0]
-            related_translations = Translation.query.filter(
-                Translation.id != translation_id,
-                Translation.original_text.ilike(f'%{search_term}%')
-            ).order_by(Translation.timestamp.desc()).limit(5).all()
-    
-    # Get video models that match the gloss text
+    # Get related translations from the precomputed word index
+    related_translations = find_related_translations(translation)
+    
+    # Get the videos that match the gloss, in a single lookup
     videos = []
     if translation.gloss_text:
-        gloss_words = translation.gloss_text.split()
-        for word in gloss_words:
-            video = SignVideo.query.filter_by(gloss_word=word.lower()).first()
-            if video:
-                videos.append(video)
+        videos = get_video_paths(translation_glosses(translation))
     
     return render_template('view_translation.html', 
                           translation=translation,
@@ -138,102 +324,302 @@ def submit_feedback(translation_id):
         db.session.rollback()
         return "Error submitting feedback", 500
 
-@app.route('/process-audio', methods=['POST'])
-def process_audio():
+def run_translation_pipeline(audio_file):
     """
-    Process the audio file sent from the client.
+    Run the full translation pipeline for an uploaded audio file.
     1. Convert speech to text
     2. Convert text to ISL gloss
     3. Retrieve video paths for the gloss terms
     4. Save translation to database
+    
+    Args:
+        audio_file: The uploaded audio file.
+        
+    Returns:
+        tuple: The JSON-serializable response payload and HTTP status code.
     """
     try:
-        # Check if the post request has the file part
-        if 'audio' not in request.files:
-            logger.error("No audio file in request")
-            return jsonify({'error': 'No audio file provided'}), 400
-        
-        audio_file = request.files['audio']
-        logger.debug(f"Received audio file: {audio_file.filename}, "
-                    f"content type: {audio_file.content_type}, "
-                    f"mime type: {audio_file.mimetype}")
-        
         # Measure processing time
         start_time = time.time()
         
         # Process the audio to get text
         logger.debug("Processing audio file to text")
-        text = convert_speech_to_text(audio_file)
+        text, confidence = recognize_audio(audio_file)
         
         if not text:
             logger.error("Speech recognition failed")
-            # Save failed translation to database
-            new_translation = Translation(
-                original_text="Unknown",
+            # Queue the failed translation for the database
+            translation_writer.add(
+                original_text="",
                 gloss_text="",
                 is_successful=False,
+                error_message="Speech not recognized",
                 translation_time=0
             )
-            db.session.add(new_translation)
-            db.session.commit()
             
-            return jsonify({
+            return {
                 'error': 'Could not recognize speech in the audio. '
                          'Please speak clearly and ensure your microphone is working.'
-            }), 400
+            }, 400
         
-        # Convert text to ISL gloss
-        logger.debug(f"Converting text to gloss: {text}")
-        gloss = convert_text_to_gloss(text)
-        
-        # Get video paths for the gloss terms
-        logger.debug(f"Retrieving videos for gloss: {gloss}")
-        video_paths = get_video_paths(gloss)
+        # Convert text to ISL gloss and get video paths for the gloss terms,
+        # reusing the cached result for text we have seen before
+        logger.debug(f"Converting text to gloss and retrieving videos: {text}")
+        gloss, video_paths = translation_cache.lookup(text)
         
         # Calculate processing time
         process_time = (time.time() - start_time) * 1000  # Convert to milliseconds
         
-        # Save successful translation to database
+        # Queue the successful translation; it is written in the background
+        # so the response doesn't wait on the database commit
         gloss_text = " ".join(gloss)
-        new_translation = Translation(
+        translation_ref = translation_writer.add(
             original_text=text,
             gloss_text=gloss_text,
+            gloss_tokens=gloss,
             is_successful=True,
+            recognition_confidence=confidence,
             translation_time=process_time
         )
-        db.session.add(new_translation)
-        db.session.commit()
-        logger.info(f"Saved translation to database with ID: {new_translation.id}")
+        logger.info(f"Queued translation {translation_ref} for the database")
         
         # Successful response
         logger.info(f"Successfully processed audio. Text: '{text}', "
                    f"Gloss terms: {len(gloss)}, Videos: {len(video_paths)}")
         
-        return jsonify({
+        return {
             'text': text,
             'gloss': gloss,
             'videos': video_paths,
-            'translation_id': new_translation.id
-        })
+            # One stitched stream instead of a download per clip
+            'sentence_video': sentence_video_url(gloss) if len(video_paths) > 1 else None,
+            'translation_ref': translation_ref,
+            'translation_url': f"/translation/ref/{translation_ref}"
+        }, 200
+        
+    except TranscoderBusy as e:
+        logger.warning(f"Rejecting audio, all transcoders are busy: {str(e)}")
+        return {'error': 'The server is busy. Please try again shortly.'}, 503
         
     except Exception as e:
         logger.error(f"Error processing audio: {str(e)}")
-        try:
-            # Try to save error to database
-            error_translation = Translation(
-                original_text=f"Error: {str(e)}",
-                gloss_text="",
-                is_successful=False,
-                translation_time=0
-            )
-            db.session.add(error_translation)
-            db.session.commit()
-        except Exception as db_error:
-            logger.error(f"Could not save error to database: {str(db_error)}")
+        # Queue the error for the database
+        translation_writer.add(
+            original_text="",
+            gloss_text="",
+            is_successful=False,
+            error_message=str(e),
+            translation_time=0
+        )
             
-        return jsonify({
+        return {
             'error': f"An error occurred while processing your speech: {str(e)}"
-        }), 500
+        }, 500
+
+def run_translation_job(audio_bytes, filename, content_type):
+    """Run the translation pipeline for a queued upload inside an app context."""
+    audio_file = FileStorage(stream=io.BytesIO(audio_bytes), filename=filename,
+                             content_type=content_type)
+    with app.app_context():
+        return run_translation_pipeline(audio_file)
+
+@app.route('/process-audio', methods=['POST'])
+def process_audio():
+    """
+    Process the audio file sent from the client.
+    
+    In sync mode the translation is returned directly. In async mode
+    (``?mode=async`` or PROCESS_AUDIO_MODE=async) the upload is queued and a
+    job id is returned immediately with HTTP 202; the client then polls
+    ``/jobs/<job_id>`` for the result.
+    """
+    # Check if the post request has the file part
+    if 'audio' not in request.files:
+        logger.error("No audio file in request")
+        return jsonify({'error': 'No audio file provided'}), 400
+    
+    audio_file = request.files['audio']
+    logger.debug(f"Received audio file: {audio_file.filename}, "
+                f"content type: {audio_file.content_type}, "
+                f"mime type: {audio_file.mimetype}")
+    
+    mode = request.args.get('mode', PROCESS_AUDIO_MODE)
+    if mode != 'async':
+        payload, status_code = run_translation_pipeline(audio_file)
+        response = jsonify(payload)
+        if status_code == 503:
+            response.headers['Retry-After'] = '2'
+        return response, status_code
+    
+    # Read the upload now; the request stream is gone once we return
+    try:
+        job = job_runner.submit(run_translation_job, audio_file.read(),
+                                audio_file.filename, audio_file.content_type)
+    except JobQueueFull as e:
+        logger.warning(f"Rejecting audio upload, job queue is full: {str(e)}")
+        response = jsonify({'error': 'The server is busy. Please try again shortly.'})
+        response.headers['Retry-After'] = '2'
+        return response, 503
+    
+    status_url = url_for('job_status', job_id=job.id)
+    response = jsonify({'job_id': job.id, 'status': job.status, 'status_url': status_url})
+    response.headers['Location'] = status_url
+    return response, 202
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """
+    Report the status of a queued translation job.
+    
+    Pass ``?wait=<seconds>`` to long-poll until the job finishes (up to
+    JOB_MAX_WAIT seconds) instead of returning immediately.
+    """
+    job = job_runner.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    
+    wait = min(request.args.get('wait', 0, type=float), JOB_MAX_WAIT)
+    if wait > 0 and not job.finished:
+        job.wait(wait)
+    
+    return jsonify(job.to_dict())
+
+@app.route('/sentence-video')
+def sentence_video():
+    """
+    Serve one video playing the clips for a gloss sequence back to back.
+    
+    Glosses are passed as repeated ``gloss`` query parameters; ``quality=low``
+    stitches the low-bitrate renditions instead. The stitched video is cached
+    on disk, so popular sentences are served straight from the cache.
+    """
+    gloss_words = request.args.getlist('gloss')
+    if not gloss_words or len(gloss_words) > MAX_SENTENCE_GLOSSES:
+        return jsonify({'error': f'Provide between 1 and {MAX_SENTENCE_GLOSSES} gloss words'}), 400
+    
+    # Slow clients ask for the sentence built from low-bitrate renditions
+    rendition = request.args.get('quality')
+    
+    index = get_video_index()
+    paths = [entry.renditions.get(rendition, (entry.url, entry.path))[1]
+             for gloss in gloss_words for _, entry, _ in index.resolve(gloss)]
+    if not paths:
+        return jsonify({'error': 'No videos found for these gloss words'}), 404
+    
+    try:
+        video_path = stitch_videos(paths)
+    except StitchBusy as e:
+        logger.warning(f"Rejecting sentence video, all stitchers are busy: {str(e)}")
+        response = jsonify({'error': 'The server is busy. Please try again shortly.'})
+        response.headers['Retry-After'] = '2'
+        return response, 503
+    except Exception as e:
+        logger.error(f"Error stitching sentence video: {str(e)}")
+        return jsonify({'error': 'Could not build the sentence video'}), 500
+    
+    return send_video(video_path, STATIC_DIR)
+
+@app.route('/media/sha256/<filename>')
+def media_asset(filename):
+    """Serve a content-addressed sign video; its URL never changes meaning."""
+    digest, extension = os.path.splitext(filename)
+    if (extension not in VIDEO_EXTENSIONS or not is_digest(digest)
+            or not os.path.isfile(asset_file(digest, extension))):
+        return jsonify({'error': 'Video not found'}), 404
+    return send_video(asset_file(digest, extension), STATIC_DIR, immutable=True, etag=digest)
+
+@app.route('/media/<path:filename>')
+def media(filename):
+    """
+    Serve a sign video from the static folder with range and cache support.
+    
+    URLs carrying the file's current version token (``?v=``) are marked
+    immutable so browsers and CDNs never revalidate them.
+    """
+    path = safe_join(STATIC_DIR, filename)
+    if (path is None or os.path.splitext(path)[1].lower() not in VIDEO_EXTENSIONS
+            or not os.path.isfile(path)):
+        return jsonify({'error': 'Video not found'}), 404
+    
+    immutable = request.args.get('v') == version_token(path)
+    return send_video(path, STATIC_DIR, immutable=immutable)
+
+@app.route('/cache/stats')
+def cache_stats():
+    """Report counters for the result and audio transcript caches and the translation writer."""
+    return jsonify({
+        'translations': translation_cache.stats(),
+        'audio': audio_cache.stats(),
+        'translation_writer': translation_writer.stats()
+    })
+
+@app.route('/stream', methods=['POST'])
+def open_stream():
+    """
+    Start a streaming translation session.
+    
+    The client then POSTs raw audio chunks to ``chunk_url`` while recording,
+    listens on ``events_url`` (Server-Sent Events) for partial text, gloss
+    and videos, and POSTs to ``finish_url`` when the user stops speaking.
+    Pass the recording's MIME type as ``?type=`` (default audio/webm).
+    """
+    try:
+        session = stream_manager.open(request.args.get('type', 'audio/webm'))
+    except StreamLimitExceeded as e:
+        logger.warning(f"Rejecting stream, too many open: {str(e)}")
+        response = jsonify({'error': 'The server is busy. Please try again shortly.'})
+        response.headers['Retry-After'] = '2'
+        return response, 503
+    
+    return jsonify({
+        'stream_id': session.id,
+        'chunk_url': url_for('stream_chunk', stream_id=session.id),
+        'events_url': url_for('stream_events', stream_id=session.id),
+        'finish_url': url_for('finish_stream', stream_id=session.id)
+    }), 201
+
+@app.route('/stream/<stream_id>/chunk', methods=['POST'])
+def stream_chunk(stream_id):
+    """Append a chunk of audio to a streaming session."""
+    session = stream_manager.get(stream_id)
+    if session is None or session.closed:
+        return jsonify({'error': 'Unknown or expired stream'}), 404
+    
+    try:
+        stream_manager.append(session, request.get_data())
+    except StreamLimitExceeded as e:
+        return jsonify({'error': str(e)}), 413
+    
+    return jsonify({'received': len(session.audio), 'partial': session.partial}), 202
+
+@app.route('/stream/<stream_id>/events')
+def stream_events(stream_id):
+    """Push partial results for a streaming session as Server-Sent Events."""
+    session = stream_manager.get(stream_id)
+    if session is None:
+        return jsonify({'error': 'Unknown or expired stream'}), 404
+    
+    return Response(session.events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/stream/<stream_id>/finish', methods=['POST'])
+def finish_stream(stream_id):
+    """
+    Finish a streaming session and run the full translation on its audio.
+    
+    Returns the same response as ``/process-audio``, and also pushes it to
+    any open event stream as the ``final`` event.
+    """
+    session = stream_manager.get(stream_id)
+    if session is None or session.closed:
+        return jsonify({'error': 'Unknown or expired stream'}), 404
+    
+    audio_file = FileStorage(stream=io.BytesIO(session.snapshot()),
+                             filename='stream.webm', content_type=session.mimetype)
+    payload, status_code = run_translation_pipeline(audio_file)
+    session.publish(payload, final=True)
+    stream_manager.close(stream_id)
+    return jsonify(payload), status_code
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -1,4 +1,7 @@
+import logging
+import uuid
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect
 from sqlalchemy.orm import DeclarativeBase
 from datetime import datetime
 
@@ -9,6 +12,8 @@ class Base(DeclarativeBase):
 
 db = SQLAlchemy(model_class=Base)
 
+logger = logging.getLogger(__name__)
+
 
 class SignVideo(db.Model):
     """
@@ -18,34 +23,159 @@ class SignVideo(db.Model):
     gloss_word = db.Column(db.String(50), nullable=False, unique=True, index=True)
     file_path = db.Column(db.String(255), nullable=False)
     duration = db.Column(db.Float, nullable=True)  # Duration in seconds
+    content_digest = db.Column(db.String(64), nullable=True, index=True)  # SHA-256 of the clip
+    
+    # Metadata probed once at import time
+    size = db.Column(db.BigInteger, nullable=True)  # File size in bytes
+    video_codec = db.Column(db.String(32), nullable=True)
+    width = db.Column(db.Integer, nullable=True)
+    height = db.Column(db.Integer, nullable=True)
+    bit_rate = db.Column(db.Integer, nullable=True)  # Bits per second
+    keyframe_count = db.Column(db.Integer, nullable=True)
+    probed_at = db.Column(db.DateTime, nullable=True)
+    
+    # Digests of renditions in the asset store
+    faststart_digest = db.Column(db.String(64), nullable=True)  # Index (moov) before media data
+    low_digest = db.Column(db.String(64), nullable=True)  # Low bitrate, for slow connections
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class SignVideoVariant(db.Model):
+    """
+    Model representing an alternative clip for a sign, e.g. another signer
+    """
+    __table_args__ = (db.UniqueConstraint('sign_video_id', 'file_path'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    sign_video_id = db.Column(db.Integer, db.ForeignKey('sign_video.id', ondelete='CASCADE'),
+                              nullable=False, index=True)
+    file_path = db.Column(db.String(255), nullable=False)
+    content_digest = db.Column(db.String(64), nullable=True)  # SHA-256 of the clip
+    size = db.Column(db.BigInteger, nullable=True)  # File size in bytes
+    duration = db.Column(db.Float, nullable=True)  # Duration in seconds
+    video_codec = db.Column(db.String(32), nullable=True)
+    width = db.Column(db.Integer, nullable=True)
+    height = db.Column(db.Integer, nullable=True)
+    bit_rate = db.Column(db.Integer, nullable=True)  # Bits per second
+    keyframe_count = db.Column(db.Integer, nullable=True)
+    probed_at = db.Column(db.DateTime, nullable=True)
+    faststart_digest = db.Column(db.String(64), nullable=True)
+    low_digest = db.Column(db.String(64), nullable=True)
+    is_pinned = db.Column(db.Boolean, default=False)  # Always served under the 'pinned' policy
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationship
+    sign_video = db.relationship('SignVideo', backref=db.backref(
+        'variants', lazy=True, cascade='all, delete-orphan', passive_deletes=True))
 
 
 class Translation(db.Model):
     """
     Model representing a translation from speech to ISL
+
+    On PostgreSQL the table may be partitioned by month on ``timestamp``
+    (see utils/retention.py). Every unique key of a partitioned table has to
+    include the partition key, so the table is kept to keys that hold either
+    way: the primary key there is ``(id, timestamp)``, and no other table
+    has a foreign key to it.
     """
+    __table_args__ = (
+        # Keyset pagination of the history, newest first
+        db.Index('ix_translation_timestamp_id', 'timestamp', 'id'),
+        # A translation keeps its timestamp from the moment it is queued, so
+        # writing a batch twice hits this index instead of duplicating rows
+        db.Index('ix_translation_public_id', 'public_id', 'timestamp', unique=True),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
+    # Assigned before the row is written, so clients can refer to it right away
+    public_id = db.Column(db.String(32), nullable=True, default=lambda: uuid.uuid4().hex)
     original_text = db.Column(db.Text, nullable=False)
     gloss_text = db.Column(db.Text, nullable=False)
+    gloss_tokens = db.Column(db.JSON, nullable=True)  # Gloss words/phrases, as served
     audio_path = db.Column(db.String(255), nullable=True)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     is_successful = db.Column(db.Boolean, default=True)
+    error_message = db.Column(db.Text, nullable=True)  # Why a failed translation failed
     
     # Fields to store metrics
     recognition_confidence = db.Column(db.Float, nullable=True)
     translation_time = db.Column(db.Float, nullable=True)  # Time taken to process in ms
 
 
+class TranslationTerm(db.Model):
+    """
+    Word of a translation's text, indexed for finding related translations
+    """
+    __table_args__ = (
+        # Posting lists: the translations containing a term, newest first
+        db.Index('ix_translation_term_term', 'term', 'translation_id'),
+    )
+    
+    # No foreign key, see Translation; postings are deleted with their translation
+    translation_id = db.Column(db.Integer, primary_key=True)
+    term = db.Column(db.String(64), primary_key=True)
+
+
+class TranslationDailyRollup(db.Model):
+    """
+    Translation counts and timings aggregated per day, kept after the raw rows expire
+    """
+    day = db.Column(db.Date, primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    successful = db.Column(db.Integer, nullable=False, default=0)
+    mean_time = db.Column(db.Float, nullable=True)  # Of successful translations, in ms
+    p95_time = db.Column(db.Float, nullable=True)  # Of successful translations, in ms
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    @property
+    def success_rate(self):
+        return self.successful / self.total if self.total else None
+
+
 class UserFeedback(db.Model):
     """
     Model for storing user feedback on translations
     """
     id = db.Column(db.Integer, primary_key=True)
-    translation_id = db.Column(db.Integer, db.ForeignKey('translation.id'), nullable=False)
+    translation_id = db.Column(db.Integer, nullable=False)  # No foreign key, see Translation
     accuracy_rating = db.Column(db.Integer)  # 1-5 star rating
     comments = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationship
-    translation = db.relationship('Translation', backref=db.backref('feedback', lazy=True))
\ No newline at end of file
+    translation = db.relationship(
+        'Translation', primaryjoin='foreign(UserFeedback.translation_id) == Translation.id',
+        backref=db.backref('feedback', lazy=True))
+
+
+def upgrade_schema():
+    """
+    Add columns and indexes that were introduced after a table was created.
+
+    ``db.create_all()`` only creates missing tables, so databases created by
+    an older version of the app would lack newer columns. Missing columns
+    are added as nullable and missing indexes are created; nothing is ever
+    dropped or altered. Needs an app context.
+    """
+    engine = db.engine
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                logger.info(f"Adding column {table.name}.{column.name}")
+                conn.exec_driver_sql(
+                    f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}')
+
+            indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    logger.info(f"Creating index {index.name}")
+                    index.create(conn, checkfirst=True)
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Build the full-text index used to search the translation history.
+
+On PostgreSQL this builds the GIN index over translations, concurrently so
+the app can keep writing meanwhile. The app never builds it itself; until
+this has run, searches scan the table. An index left invalid by an
+interrupted build is dropped and built again, so the script is safe to
+rerun. On SQLite the app creates its FTS5 index at startup, and this only
+does the same.
+
+Usage:
+    python scripts/build_search_index.py
+"""
+import os
+import sys
+import argparse
+
+# Add the parent directory to the path so we can import from the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build the translation search index")
+    return parser.parse_args()
+
+def build_index():
+    """
+    Build the search index unless a valid one exists.
+    """
+    from app import app
+    from utils.search import build_search_index
+
+    with app.app_context():
+        built = build_search_index()
+
+    if built:
+        print("\nSearch index built")
+    else:
+        print("\nSearch index already exists, nothing to do")
+    return True
+
+if __name__ == "__main__":
+    parse_args()
+    build_index()
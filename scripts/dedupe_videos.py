@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Move sign videos into the content-addressed asset store.
+
+Every SignVideo file is hashed and stored once under its SHA-256 digest in
+static/videos/assets, and the digest is recorded on the row so the app
+serves it from an immutable /media/sha256/ URL. Identical clips (such as
+"are you free today (2).mp4" copies in the corpus) end up as a single
+stored asset.
+
+Usage:
+    python scripts/dedupe_videos.py [--relink] [--scan static/videos/ISL_CSLRT_Corpus]
+
+With --relink, duplicate originals are replaced by hard links to the stored
+asset so they no longer use disk space of their own; like the asset, a
+relinked original is read-only and has to be replaced, not edited in
+place. --scan also hashes
+video files that no SignVideo row points at.
+"""
+import os
+import sys
+import argparse
+
+# Add the parent directory to the path so we can import from the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Move sign videos into the content-addressed asset store")
+    parser.add_argument('--relink', action='store_true',
+                      help="Replace duplicate originals with hard links to the stored asset")
+    parser.add_argument('--scan', action='append', default=[],
+                      help="Also store every video found under this directory (repeatable)")
+    parser.add_argument('--force', action='store_true',
+                      help="Re-hash rows that already have a content digest")
+    return parser.parse_args()
+
+def dedupe_videos(relink=False, scan_dirs=(), force=False):
+    """
+    Store every SignVideo file by content and record its digest.
+
+    Args:
+        relink: Replace duplicate originals with hard links to the stored asset
+        scan_dirs: Extra directories whose video files should be stored too
+        force: Re-hash rows that already have a digest
+    """
+    from app import app, db
+    from models import SignVideo
+    from utils.asset_store import ASSET_STORE_DIR, store_asset
+    from utils.video_retrieval import resolve_video_file, store_sign_video_asset
+    from utils.video_serving import VIDEO_EXTENSIONS
+
+    digests = {}
+    stored_count = 0
+    missing_count = 0
+
+    with app.app_context():
+        for video in SignVideo.query.order_by(SignVideo.id).all():
+            resolved = resolve_video_file(video.file_path)
+            if resolved is None:
+                print(f"Warning: Video file for '{video.gloss_word}' not found: {video.file_path}")
+                missing_count += 1
+                continue
+            digest = video.content_digest
+            if not digest or force or relink:
+                digest = store_sign_video_asset(video, relink=relink)
+                stored_count += 1
+            paths = digests.setdefault(digest, [])
+            if resolved[1] not in paths:
+                paths.append(resolved[1])
+        db.session.commit()
+
+    scanned_count = 0
+    for scan_dir in scan_dirs:
+        for dirpath, _, filenames in os.walk(scan_dir):
+            # Don't feed the store its own files
+            if os.path.abspath(dirpath).startswith(os.path.abspath(ASSET_STORE_DIR)):
+                continue
+            for filename in filenames:
+                if os.path.splitext(filename)[1].lower() not in VIDEO_EXTENSIONS:
+                    continue
+                path = os.path.abspath(os.path.join(dirpath, filename))
+                digest = store_asset(path, relink=relink)
+                if path not in digests.setdefault(digest, []):
+                    digests[digest].append(path)
+                scanned_count += 1
+
+    duplicate_count = sum(len(paths) - 1 for paths in digests.values())
+    for digest, paths in digests.items():
+        if len(paths) > 1:
+            print(f"Duplicate content {digest[:12]}: {', '.join(paths)}")
+
+    print(f"\nDeduplication completed:")
+    print(f"- {stored_count} video rows stored by content")
+    print(f"- {scanned_count} extra files scanned")
+    print(f"- {len(digests)} distinct assets")
+    print(f"- {duplicate_count} duplicates collapsed")
+    print(f"- {missing_count} rows with missing files")
+    return True
+
+if __name__ == "__main__":
+    args = parse_args()
+    dedupe_videos(relink=args.relink, scan_dirs=args.scan, force=args.force)
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Import the ISL_CSLRT_Corpus sentence videos.
+
+Reads "data/ISL_CSLRT_Corpus details.csv", which maps every English sentence
+to one or more video files using Windows paths such as
+"ISL_CSLRT_Corpus\\Videos_Sentence_Level\\are you free today\\free (2).MP4".
+Paths are normalized and matched case-insensitively against a single walk
+of the videos folder; files found in a sentence's folder but missing from
+the CSV are picked up as extra variants. Each sentence is stored under its
+ISL gloss from "data/ISL Corpus sign glosses.csv" (e.g. "YOU FREE TODAY"),
+so the phrase the gloss converter emits maps straight to the video. The
+first readable variant is the sign's main clip and the others are stored as
+SignVideoVariant rows; VIDEO_VARIANT_POLICY decides which one is served.
+
+All files are verified, hashed into the asset store, probed and rendered in
+a thread pool, and every sentence is then written with batched upserts.
+
+Imported files are copied into the asset store, and each original is then
+replaced by a hard link to its stored, read-only copy, so a clip takes its
+disk space once rather than twice. The originals become read-only: replace
+a clip with a new file instead of editing it in place. Pass --no-relink to
+keep the originals as they are, at the cost of storing every clip twice.
+
+Usage:
+    python scripts/import_corpus.py [--workers 8] [--no-renditions] [--no-relink] [--force]
+"""
+import os
+import re
+import sys
+import csv
+import argparse
+import itertools
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Add the parent directory to the path so we can import from the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Import the ISL_CSLRT_Corpus sentence videos")
+    parser.add_argument('csv_file', nargs='?', default='data/ISL_CSLRT_Corpus details.csv',
+                      help="Corpus details CSV (default: data/ISL_CSLRT_Corpus details.csv)")
+    parser.add_argument('--videos-dir', default='static/videos',
+                      help="Directory the CSV paths are relative to (default: static/videos)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 4,
+                      help="Number of files verified and probed in parallel (default: CPU count)")
+    parser.add_argument('--listed-only', action='store_true',
+                      help="Ignore videos in a sentence folder that the CSV doesn't list")
+    parser.add_argument('--no-renditions', action='store_true',
+                      help="Skip building faststart and low-bitrate renditions")
+    parser.add_argument('--no-relink', action='store_true',
+                      help="Keep the original files instead of linking them to the stored copies")
+    parser.add_argument('--force', action='store_true',
+                      help="Re-process files that were already imported")
+    return parser.parse_args()
+
+def sentence_key(sentence):
+    """Match sentences across the corpus CSVs, which differ in punctuation."""
+    return re.sub(r'[^a-z0-9]', '', sentence.lower())
+
+def normalize_corpus_path(path):
+    """Turn a CSV path into a clean relative POSIX path."""
+    parts = [part.strip() for part in path.replace('\\', '/').split('/')]
+    return '/'.join(part for part in parts if part and part != '.')
+
+def read_corpus_csv(csv_file):
+    """
+    Read the sentence to video file listing.
+
+    Returns:
+        dict: Sentence to the list of normalized relative paths, in CSV order.
+    """
+    from utils.video_serving import VIDEO_EXTENSIONS
+
+    sentences = {}
+    with open(csv_file, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            if len(row) < 2 or not row[0].strip():
+                continue
+            path = normalize_corpus_path(row[1])
+            if os.path.splitext(path)[1].lower() not in VIDEO_EXTENSIONS:
+                continue
+            paths = sentences.setdefault(row[0].strip(), [])
+            if path not in paths:
+                paths.append(path)
+    return sentences
+
+def walk_videos(videos_dir):
+    """
+    Index every video file under a folder with one directory walk.
+
+    Returns:
+        tuple: Lowercased relative path to actual relative path, and
+        lowercased relative folder to the sorted files it contains.
+    """
+    from utils.asset_store import ASSET_STORE_DIR
+    from utils.video_serving import VIDEO_EXTENSIONS
+
+    files = {}
+    folders = {}
+    store = os.path.abspath(ASSET_STORE_DIR)
+    for dirpath, dirnames, filenames in os.walk(videos_dir):
+        if os.path.abspath(dirpath).startswith(store):
+            dirnames.clear()
+            continue
+        folder = os.path.relpath(dirpath, videos_dir).replace(os.sep, '/')
+        folder = '' if folder == '.' else folder
+        for filename in sorted(filenames):
+            if os.path.splitext(filename)[1].lower() not in VIDEO_EXTENSIONS:
+                continue
+            relative = f"{folder}/{filename}" if folder else filename
+            files[relative.lower()] = relative
+            folders.setdefault(folder.lower(), []).append(relative)
+    return files, folders
+
+def import_corpus(csv_file, videos_dir='static/videos', workers=4, listed_only=False,
+                  renditions=True, force=False, relink=True):
+    """
+    Import every sentence video of the corpus.
+
+    Args:
+        csv_file: Path to the corpus details CSV
+        videos_dir: Directory the CSV paths are relative to
+        workers: Number of files processed in parallel
+        listed_only: Ignore unlisted files in sentence folders
+        renditions: Whether to build faststart and low-bitrate renditions
+        force: Re-process files that were already imported
+        relink: Replace the originals with hard links to the stored copies
+    """
+    if not os.path.exists(csv_file):
+        print(f"Error: CSV file '{csv_file}' not found")
+        return False
+
+    if not os.path.exists(videos_dir):
+        print(f"Error: Videos directory '{videos_dir}' not found")
+        return False
+
+    try:
+        # Import necessary modules from the app
+        from app import app
+        from models import SignVideo, SignVideoVariant
+        from utils.text_to_gloss import load_corpus_glosses
+        from utils.video_import import upsert_sign_videos, upsert_sign_video_variants
+        from utils.video_ingest import ingest_file
+    except ImportError as e:
+        print(f"Error importing app modules: {str(e)}")
+        print("Make sure you're running this script from the project root directory")
+        return False
+
+    sentences = read_corpus_csv(csv_file)
+    files, folders = walk_videos(videos_dir)
+    glosses = {sentence_key(sentence): gloss for sentence, gloss in load_corpus_glosses().items()}
+    print(f"Read {len(sentences)} sentences from {csv_file}")
+    print(f"Found {len(files)} video files in {videos_dir}")
+
+    # Resolve every sentence to its variants on disk
+    variants = {}
+    missing_count = 0
+    gloss_length = SignVideo.gloss_word.type.length
+    for sentence, paths in sentences.items():
+        gloss = glosses.get(sentence_key(sentence))
+        if not gloss:
+            print(f"Warning: No gloss for '{sentence}', using the sentence itself")
+            gloss = sentence.upper()
+        if len(gloss) > gloss_length:
+            print(f"Warning: Gloss '{gloss}' is longer than {gloss_length} characters, skipping")
+            continue
+
+        found = []
+        for path in paths:
+            actual = files.get(path.lower())
+            if actual is None:
+                missing_count += 1
+            elif actual not in found:
+                found.append(actual)
+        if not listed_only:
+            for folder in {path.rsplit('/', 1)[0].lower() for path in paths if '/' in path}:
+                found += [actual for actual in folders.get(folder, []) if actual not in found]
+        if not found:
+            print(f"Warning: No video files found for '{sentence}'")
+            continue
+        variants.setdefault(gloss, [])
+        variants[gloss] += [actual for actual in found if actual not in variants[gloss]]
+
+    with app.app_context():
+        # Files already imported and unchanged since are skipped
+        done = set()
+        if not force:
+            imported = itertools.chain(
+                SignVideo.query.filter(SignVideo.content_digest.isnot(None)),
+                SignVideoVariant.query.filter(SignVideoVariant.content_digest.isnot(None)))
+            for video in imported:
+                path = video.file_path.replace('\\', '/')
+                if os.path.exists(path) and \
+                        datetime.utcfromtimestamp(os.path.getmtime(path)) <= video.created_at:
+                    done.add(path)
+
+        def file_path(relative):
+            return f"{videos_dir.rstrip('/')}/{relative}"
+
+        # Only the preferred variant gets renditions; the others are verified and probed
+        pending = {relative: renditions and i == 0
+                   for paths in variants.values() for i, relative in enumerate(paths)
+                   if file_path(relative) not in done}
+        print(f"Processing {len(pending)} files with {workers} workers")
+
+        # Verify, hash, probe and render the files in parallel
+        ingested = {}
+        broken = set()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(ingest_file, os.path.join(videos_dir, relative), render, relink):
+                       relative for relative, render in pending.items()}
+            for i, future in enumerate(as_completed(futures), start=1):
+                relative = futures[future]
+                try:
+                    ingested[relative] = future.result()
+                except OSError as e:
+                    print(f"Warning: Could not read '{relative}': {str(e)}")
+                    broken.add(relative)
+                if i % 100 == 0:
+                    print(f"Processed {i}/{len(pending)} files")
+
+        # The first readable variant of each sentence becomes its video and
+        # the rest are stored as alternatives
+        rows = []
+        variant_rows = []
+        keep_paths = {}
+        for gloss, paths in variants.items():
+            readable = [relative for relative in paths if relative not in broken]
+            if not readable:
+                continue
+            if readable[0] in ingested:
+                rows.append({'gloss_word': gloss, 'file_path': file_path(readable[0]),
+                             **ingested[readable[0]]})
+            keep_paths[gloss] = {file_path(relative) for relative in readable[1:]}
+            variant_rows += [{'gloss_word': gloss, 'file_path': file_path(relative),
+                              **ingested[relative]}
+                             for relative in readable[1:] if relative in ingested]
+        counts = upsert_sign_videos(rows)
+        variant_counts = upsert_sign_video_variants(variant_rows, keep_paths)
+
+    print(f"\nImport completed successfully:")
+    print(f"- {counts['added']} new videos added")
+    print(f"- {counts['updated']} existing entries updated")
+    print(f"- {counts['unchanged'] + len(variants) - len(rows)} sentences already up to date")
+    print(f"- {variant_counts['added']} variants added, {variant_counts['updated']} updated, "
+          f"{variant_counts['removed']} removed")
+    print(f"- {len(ingested)} files processed, {len(broken)} unreadable")
+    print(f"- {missing_count} listed files missing on disk")
+    return True
+
+if __name__ == "__main__":
+    args = parse_args()
+    import_corpus(
+        args.csv_file,
+        videos_dir=args.videos_dir,
+        workers=args.workers,
+        listed_only=args.listed_only,
+        renditions=not args.no_renditions,
+        force=args.force,
+        relink=not args.no_relink
+    )
@@ -8,13 +8,13 @@ Usage:
 """
 import os
 import sys
-from datetime import datetime
 
 # Add the parent directory to the path so we can import from the app
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app import app, db
-from models import SignVideo
+from app import app
+from utils.video_import import upsert_sign_videos
+from utils.video_ingest import ingest_pending_videos
 
 # Define your custom videos mapping here:
 # Format: 'gloss_word': 'video_filename.mp4'
@@ -33,44 +33,28 @@ def import_custom_videos():
     
     print(f"Found {len(available_videos)} video files in {videos_dir}")
     
-    imported_count = 0
-    updated_count = 0
+    rows = []
     skipped_count = 0
     
+    for gloss, filename in CUSTOM_VIDEOS.items():
+        if filename not in available_videos:
+            print(f"Warning: Video file '{filename}' not found in {videos_dir}, skipping")
+            skipped_count += 1
+            continue
+        
+        rows.append({'gloss_word': gloss, 'file_path': os.path.join('static', 'videos', filename)})
+    
+    # Write all mappings with batched upserts instead of a commit per row
     with app.app_context():
-        for gloss, filename in CUSTOM_VIDEOS.items():
-            if filename not in available_videos:
-                print(f"Warning: Video file '{filename}' not found in {videos_dir}, skipping")
-                skipped_count += 1
-                continue
-            
-            file_path = os.path.join('static', 'videos', filename)
-            
-            # Check if the gloss word already exists
-            existing_video = SignVideo.query.filter_by(gloss_word=gloss).first()
-            
-            if existing_video:
-                # Update the existing entry
-                existing_video.file_path = file_path
-                existing_video.created_at = datetime.utcnow()
-                db.session.commit()
-                print(f"Updated '{gloss}' to use video '{filename}'")
-                updated_count += 1
-            else:
-                # Create a new entry
-                new_video = SignVideo(
-                    gloss_word=gloss,
-                    file_path=file_path
-                )
-                db.session.add(new_video)
-                db.session.commit()
-                print(f"Added '{gloss}' with video '{filename}'")
-                imported_count += 1
+        counts = upsert_sign_videos(rows)
+        ingested_count, _ = ingest_pending_videos()
     
     print(f"\nImport summary:")
-    print(f"- {imported_count} new videos added")
-    print(f"- {updated_count} existing entries updated")
+    print(f"- {counts['added']} new videos added")
+    print(f"- {counts['updated']} existing entries updated")
+    print(f"- {counts['unchanged']} entries unchanged")
     print(f"- {skipped_count} entries skipped (missing video files)")
+    print(f"- {ingested_count} videos ingested")
 
 if __name__ == "__main__":
     import_custom_videos()
\ No newline at end of file
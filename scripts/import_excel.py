@@ -1,33 +1,46 @@
 #!/usr/bin/env python3
 """
-Import data from Excel files (.xlsx format)
+Import data from Excel files (.xlsx format) or CSV files
 
 This script can:
 1. Import gloss translations from Excel
 2. Import video mappings from Excel
 
+Rows are streamed (openpyxl read-only mode for .xlsx, the csv module for
+.csv) and written in fixed-size chunks, so memory stays flat no matter how
+large the file is.
+
 Usage:
     1. Upload your Excel file to data/uploads
-    2. Run this script: 
+    2. Run this script:
        python scripts/import_excel.py data/uploads/your_file.xlsx --type [gloss|videos]
-    3. Restart the application for changes to take effect
+    3. Running application workers pick up the changes automatically (no restart needed)
 
 Example:
     python scripts/import_excel.py data/uploads/ISL_CSLRT_Corpus_details.xlsx --type videos
+
+Reading .xlsx files requires openpyxl (pip install openpyxl).
+
+Video files end up as read-only hard links to their copies in the asset
+store (see scripts/import_corpus.py); --no-relink leaves them untouched
+and writable, but then every clip is on disk twice.
 """
 import os
 import sys
+import csv
 import json
 import argparse
-from datetime import datetime
-from pathlib import Path
+from itertools import islice
 
 # Add the parent directory to the path so we can import from the app
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Number of rows validated and written at a time
+CHUNK_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", "1000"))
+
 def parse_args():
-    parser = argparse.ArgumentParser(description="Import data from Excel files (.xlsx format)")
-    parser.add_argument('excel_file', help="Path to the Excel file containing the data")
+    parser = argparse.ArgumentParser(description="Import data from Excel files (.xlsx format) or CSV files")
+    parser.add_argument('excel_file', help="Path to the Excel or CSV file containing the data")
     parser.add_argument('--type', choices=['gloss', 'videos'], required=True,
                       help="Type of data to import: 'gloss' for translations or 'videos' for video mappings")
     parser.add_argument('--sheet-name', help="Name of the Excel sheet to use (default: first sheet)")
@@ -36,8 +49,86 @@ def parse_args():
     parser.add_argument('--video-column', help="Column name for video filenames (for video imports)")
     parser.add_argument('--videos-dir', default='static/videos',
                       help="Directory containing the video files (default: static/videos)")
+    parser.add_argument('--no-ingest', action='store_true',
+                      help="Skip probing clips and building renditions (for video imports)")
+    parser.add_argument('--no-relink', action='store_true',
+                      help="Keep the original files instead of linking them to the stored copies (for video imports)")
     return parser.parse_args()
 
+def iter_rows(path, sheet_name=None):
+    """
+    Lazily yield the rows of a spreadsheet as tuples of cell values.
+    
+    .csv files are read with the csv module; anything else is opened with
+    openpyxl in read-only mode, which streams the sheet instead of loading
+    the whole workbook. The first row yielded is the header.
+    
+    Raises:
+        ImportError: If an Excel file is given and openpyxl isn't installed.
+    """
+    if os.path.splitext(path)[1].lower() == '.csv':
+        with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+            for row in csv.reader(f):
+                yield tuple(row)
+        return
+    
+    from openpyxl import load_workbook
+    
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+        for row in sheet.iter_rows(values_only=True):
+            yield row
+    finally:
+        workbook.close()
+
+def find_column(header, name, keywords, default, role):
+    """
+    Get the index of a column by name, or guess it from keywords in the header.
+    
+    Args:
+        header: The header row
+        name: Column name given on the command line, if any
+        keywords: Words that suggest the column's role
+        default: Index to fall back to
+        role: Description of the column for messages
+    
+    Returns:
+        int: The column index, or None if the named column doesn't exist.
+    """
+    labels = [str(cell).strip() if cell is not None else '' for cell in header]
+    if name:
+        if name not in labels:
+            print(f"Error: Column '{name}' not found in {labels}")
+            return None
+        return labels.index(name)
+    
+    # Look for column names that might hold this kind of data
+    for index, label in enumerate(labels):
+        if any(keyword in label.lower() for keyword in keywords):
+            print(f"Auto-detected {role} column: '{label}'")
+            return index
+    
+    if default >= len(labels):
+        print(f"Error: The sheet has no column {default + 1} to use as {role} column")
+        return None
+    print(f"Using column {default + 1} as {role} column: '{labels[default]}'")
+    return default
+
+def cell_text(row, index):
+    """Get a cell as stripped text; empty cells give an empty string."""
+    if index >= len(row) or row[index] is None:
+        return ''
+    return str(row[index]).strip()
+
+def chunks(rows, size=CHUNK_SIZE):
+    """Split an iterator into lists of at most ``size`` items."""
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
 def import_gloss_from_excel(excel_file, sheet_name=None, english_column=None, gloss_column=None):
     """
     Import gloss translations from an Excel file.
@@ -48,23 +139,14 @@ def import_gloss_from_excel(excel_file, sheet_name=None, english_column=None, gl
         english_column: Column name for English words
         gloss_column: Column name for gloss words
     """
-    try:
-        import pandas as pd
-    except ImportError:
-        print("pandas is required for Excel import. Installing...")
-        os.system("pip install pandas openpyxl")
-        import pandas as pd
-    
     if not os.path.exists(excel_file):
         print(f"Error: Excel file '{excel_file}' not found")
         return False
     
-    # Create the utils directory if it doesn't exist
-    utils_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'utils')
-    os.makedirs(utils_dir, exist_ok=True)
+    from utils.text_to_gloss import TRANSLATION_RULES_FILE, save_translation_rules
     
     # Path to save the translation rules
-    translation_file = os.path.join(utils_dir, 'translation_rules.json')
+    translation_file = TRANSLATION_RULES_FILE
     
     # Load existing rules if file exists
     existing_rules = {}
@@ -77,54 +159,29 @@ def import_gloss_from_excel(excel_file, sheet_name=None, english_column=None, gl
             print("Error reading existing rules, starting fresh")
     
     try:
-        # Read the Excel file
-        if sheet_name:
-            df = pd.read_excel(excel_file, sheet_name=sheet_name)
-        else:
-            df = pd.read_excel(excel_file)
-        
-        print(f"Read Excel file with {len(df)} rows")
+        rows = iter_rows(excel_file, sheet_name)
+        header = next(rows, None)
+        if header is None:
+            print("Error: The file is empty")
+            return False
         
-        # If column names are not provided, try to guess them
-        if not english_column:
-            # Look for column names that might contain English words
-            for col in df.columns:
-                if 'english' in str(col).lower() or 'word' in str(col).lower() or 'text' in str(col).lower():
-                    english_column = col
-                    print(f"Auto-detected English column: '{english_column}'")
-                    break
-            
-            if not english_column:
-                english_column = df.columns[0]
-                print(f"Using first column as English column: '{english_column}'")
+        english_index = find_column(header, english_column, ('english', 'word', 'text'), 0, 'English')
+        gloss_index = find_column(header, gloss_column, ('gloss', 'sign', 'isl'), 1, 'gloss')
+        if english_index is None or gloss_index is None:
+            return False
         
-        if not gloss_column:
-            # Look for column names that might contain gloss words
-            for col in df.columns:
-                if 'gloss' in str(col).lower() or 'sign' in str(col).lower() or 'isl' in str(col).lower():
-                    gloss_column = col
-                    print(f"Auto-detected gloss column: '{gloss_column}'")
-                    break
-            
-            if not gloss_column:
-                gloss_column = df.columns[1]
-                print(f"Using second column as gloss column: '{gloss_column}'")
-        
-        # Process the Excel data
+        # Process the rows as they are read
         new_count = 0
         updated_count = 0
         skipped_count = 0
+        row_count = 0
         
-        for _, row in df.iterrows():
-            if english_column not in row or gloss_column not in row:
-                print(f"Warning: Row is missing required columns, skipping")
-                skipped_count += 1
-                continue
+        for row in rows:
+            row_count += 1
+            english = cell_text(row, english_index).lower()
+            gloss = cell_text(row, gloss_index)
             
-            english = str(row[english_column]).strip().lower()
-            gloss = str(row[gloss_column]).strip()
-            
-            if not english or not gloss or english == 'nan' or gloss == 'nan':
+            if not english or not gloss:
                 skipped_count += 1
                 continue
             
@@ -132,34 +189,34 @@ def import_gloss_from_excel(excel_file, sheet_name=None, english_column=None, gl
                 if existing_rules[english] != gloss:
                     print(f"Updating: '{english}' -> '{gloss}' (was '{existing_rules[english]}')")
                     updated_count += 1
-                else:
-                    print(f"Unchanged: '{english}' -> '{gloss}'")
             else:
-                print(f"Adding: '{english}' -> '{gloss}'")
                 new_count += 1
             
             existing_rules[english] = gloss
         
         # Save the updated translation rules
-        with open(translation_file, 'w') as f:
-            json.dump(existing_rules, f, indent=2, sort_keys=True)
+        save_translation_rules(existing_rules)
         
         print(f"\nImport completed successfully:")
+        print(f"- {row_count} rows read")
         print(f"- {new_count} new translations added")
         print(f"- {updated_count} existing translations updated")
         print(f"- {skipped_count} rows skipped")
         print(f"- {len(existing_rules)} total translations in the system")
         print(f"\nSaved to: {translation_file}")
-        print("Remember to restart the application for changes to take effect")
+        print("Running application workers will pick up the changes automatically")
         
         return True
     
+    except ImportError:
+        print("openpyxl is required for Excel import: pip install openpyxl (or export the sheet as CSV)")
+        return False
     except Exception as e:
         print(f"Error importing Excel file: {str(e)}")
         return False
 
-def import_videos_from_excel(excel_file, videos_dir='static/videos', sheet_name=None, 
-                           gloss_column=None, video_column=None):
+def import_videos_from_excel(excel_file, videos_dir='static/videos', sheet_name=None,
+                           gloss_column=None, video_column=None, ingest=True, relink=True):
     """
     Import sign language videos from an Excel file.
     
@@ -169,14 +226,9 @@ def import_videos_from_excel(excel_file, videos_dir='static/videos', sheet_name=
         sheet_name: Name of the Excel sheet to use (default: first sheet)
         gloss_column: Column name for gloss words
         video_column: Column name for video filenames
+        ingest: Whether to probe new clips and build their renditions
+        relink: Replace the originals with hard links to the stored copies
     """
-    try:
-        import pandas as pd
-    except ImportError:
-        print("pandas is required for Excel import. Installing...")
-        os.system("pip install pandas openpyxl")
-        import pandas as pd
-    
     if not os.path.exists(excel_file):
         print(f"Error: Excel file '{excel_file}' not found")
         return False
@@ -187,8 +239,9 @@ def import_videos_from_excel(excel_file, videos_dir='static/videos', sheet_name=
     
     try:
         # Import necessary modules from the app
-        from app import app, db
-        from models import SignVideo
+        from app import app
+        from utils.video_import import upsert_sign_videos
+        from utils.video_ingest import ingest_pending_videos
     except ImportError as e:
         print(f"Error importing app modules: {str(e)}")
         print("Make sure you're running this script from the project root directory")
@@ -199,94 +252,63 @@ def import_videos_from_excel(excel_file, videos_dir='static/videos', sheet_name=
     print(f"Found {len(available_videos)} video files in {videos_dir}")
     
     try:
-        # Read the Excel file
-        if sheet_name:
-            df = pd.read_excel(excel_file, sheet_name=sheet_name)
-        else:
-            df = pd.read_excel(excel_file)
-        
-        print(f"Read Excel file with {len(df)} rows")
-        
-        # If column names are not provided, try to guess them
-        if not gloss_column:
-            # Look for column names that might contain gloss words
-            for col in df.columns:
-                if 'gloss' in str(col).lower() or 'sign' in str(col).lower() or 'isl' in str(col).lower():
-                    gloss_column = col
-                    print(f"Auto-detected gloss column: '{gloss_column}'")
-                    break
-            
-            if not gloss_column:
-                gloss_column = df.columns[0]
-                print(f"Using first column as gloss column: '{gloss_column}'")
+        rows = iter_rows(excel_file, sheet_name)
+        header = next(rows, None)
+        if header is None:
+            print("Error: The file is empty")
+            return False
         
-        if not video_column:
-            # Look for column names that might contain video filenames
-            for col in df.columns:
-                if 'video' in str(col).lower() or 'file' in str(col).lower() or 'path' in str(col).lower():
-                    video_column = col
-                    print(f"Auto-detected video column: '{video_column}'")
-                    break
-            
-            if not video_column:
-                video_column = df.columns[1]
-                print(f"Using second column as video column: '{video_column}'")
+        gloss_index = find_column(header, gloss_column, ('gloss', 'sign', 'isl'), 0, 'gloss')
+        video_index = find_column(header, video_column, ('video', 'file', 'path'), 1, 'video')
+        if gloss_index is None or video_index is None:
+            return False
         
-        # Process the Excel data
-        added_count = 0
-        updated_count = 0
+        # Validate and upsert the rows one chunk at a time
+        counts = {'added': 0, 'updated': 0, 'unchanged': 0}
         skipped_count = 0
+        row_count = 0
         
         with app.app_context():
-            for _, row in df.iterrows():
-                if gloss_column not in row or video_column not in row:
-                    print(f"Warning: Row is missing required columns, skipping")
-                    skipped_count += 1
-                    continue
-                
-                gloss = str(row[gloss_column]).strip()
-                video_filename = str(row[video_column]).strip()
-                
-                if not gloss or not video_filename or gloss == 'nan' or video_filename == 'nan':
-                    skipped_count += 1
-                    continue
-                
-                # Check if the video file exists
-                if video_filename not in available_videos:
-                    print(f"Warning: Video file '{video_filename}' not found in {videos_dir}, skipping")
-                    skipped_count += 1
-                    continue
-                
-                file_path = os.path.join(videos_dir, video_filename)
-                
-                # Check if the gloss word already exists
-                existing_video = SignVideo.query.filter_by(gloss_word=gloss).first()
+            for chunk in chunks(rows):
+                videos = []
+                for row in chunk:
+                    gloss = cell_text(row, gloss_index)
+                    video_filename = cell_text(row, video_index)
+                    
+                    if not gloss or not video_filename:
+                        skipped_count += 1
+                        continue
+                    
+                    # Check if the video file exists
+                    if video_filename not in available_videos:
+                        print(f"Warning: Video file '{video_filename}' not found in {videos_dir}, skipping")
+                        skipped_count += 1
+                        continue
+                    
+                    videos.append({'gloss_word': gloss,
+                                   'file_path': os.path.join(videos_dir, video_filename)})
                 
-                if existing_video:
-                    # Update the existing entry
-                    existing_video.file_path = file_path
-                    existing_video.created_at = datetime.utcnow()
-                    db.session.commit()
-                    print(f"Updated: '{gloss}' -> '{video_filename}'")
-                    updated_count += 1
-                else:
-                    # Create a new entry
-                    new_video = SignVideo(
-                        gloss_word=gloss,
-                        file_path=file_path
-                    )
-                    db.session.add(new_video)
-                    db.session.commit()
-                    print(f"Added: '{gloss}' -> '{video_filename}'")
-                    added_count += 1
+                for key, count in upsert_sign_videos(videos).items():
+                    counts[key] += count
+                row_count += len(chunk)
+                print(f"Processed {row_count} rows")
+            
+            if ingest:
+                ingested_count, _ = ingest_pending_videos(relink=relink)
         
         print(f"\nImport completed successfully:")
-        print(f"- {added_count} new videos added")
-        print(f"- {updated_count} existing entries updated")
+        print(f"- {counts['added']} new videos added")
+        print(f"- {counts['updated']} existing entries updated")
+        print(f"- {counts['unchanged']} entries unchanged")
         print(f"- {skipped_count} entries skipped")
+        if ingest:
+            print(f"- {ingested_count} videos ingested")
         
         return True
     
+    except ImportError:
+        print("openpyxl is required for Excel import: pip install openpyxl (or export the sheet as CSV)")
+        return False
     except Exception as e:
         print(f"Error importing Excel file: {str(e)}")
         return False
@@ -296,7 +318,7 @@ if __name__ == "__main__":
     
     if args.type == 'gloss':
         import_gloss_from_excel(
-            args.excel_file, 
+            args.excel_file,
             sheet_name=args.sheet_name,
             english_column=args.english_column,
             gloss_column=args.gloss_column
@@ -307,5 +329,7 @@ if __name__ == "__main__":
             videos_dir=args.videos_dir,
             sheet_name=args.sheet_name,
             gloss_column=args.gloss_column,
-            video_column=args.video_column
-        )
\ No newline at end of file
+            video_column=args.video_column,
+            ingest=not args.no_ingest,
+            relink=not args.no_relink
+        )
@@ -5,7 +5,7 @@ Import gloss translations from a CSV file.
 Usage:
     1. Place your CSV file in the 'data' directory
     2. Run this script: python scripts/import_gloss_csv.py data/your_file.csv
-    3. Restart the application for changes to take effect
+    3. Running application workers pick up the changes automatically (no restart needed)
 
 CSV Format:
     The CSV file should have at least two columns: 
@@ -56,12 +56,10 @@ def import_gloss_from_csv(csv_file, has_header=True, english_col=0, gloss_col=1,
         print(f"Error: CSV file '{csv_file}' not found")
         return False
     
-    # Create the utils directory if it doesn't exist
-    utils_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'utils')
-    os.makedirs(utils_dir, exist_ok=True)
+    from utils.text_to_gloss import TRANSLATION_RULES_FILE, save_translation_rules
     
     # Path to save the translation rules
-    translation_file = os.path.join(utils_dir, 'translation_rules.json')
+    translation_file = TRANSLATION_RULES_FILE
     
     # Load existing rules if file exists
     existing_rules = {}
@@ -110,15 +108,14 @@ def import_gloss_from_csv(csv_file, has_header=True, english_col=0, gloss_col=1,
                 existing_rules[english] = gloss
         
         # Save the updated translation rules
-        with open(translation_file, 'w') as f:
-            json.dump(existing_rules, f, indent=2, sort_keys=True)
+        save_translation_rules(existing_rules)
         
         print(f"\nImport completed successfully:")
         print(f"- {new_count} new translations added")
         print(f"- {updated_count} existing translations updated")
         print(f"- {len(existing_rules)} total translations in the system")
         print(f"\nSaved to: {translation_file}")
-        print("Remember to restart the application for changes to take effect")
+        print("Running application workers will pick up the changes automatically")
         
         return True
     
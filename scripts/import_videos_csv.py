@@ -17,12 +17,16 @@ Example CSV content:
     NAMASTE,namaste.mp4
     THANK-YOU,thankyou.mp4
     HOW,how.mp4
+
+New clips are stored in the asset store and each original in static/videos
+is swapped for a hard link to the stored copy, which is read-only. Use
+--no-relink to keep editable originals, at the price of a second copy of
+every clip.
 """
 import os
 import sys
 import csv
 import argparse
-from datetime import datetime
 from pathlib import Path
 
 # Add the parent directory to the path so we can import from the app
@@ -41,10 +45,14 @@ def parse_args():
                       help="CSV delimiter character (default: ,)")
     parser.add_argument('--videos-dir', default='static/videos',
                       help="Directory containing the video files (default: static/videos)")
+    parser.add_argument('--no-ingest', action='store_true',
+                      help="Skip probing clips and building renditions")
+    parser.add_argument('--no-relink', action='store_true',
+                      help="Keep the original files instead of linking them to the stored copies")
     return parser.parse_args()
 
 def import_videos_from_csv(csv_file, videos_dir='static/videos', has_header=True, 
-                          gloss_col=0, video_col=1, delimiter=','):
+                          gloss_col=0, video_col=1, delimiter=',', ingest=True, relink=True):
     """
     Import sign language videos from a CSV file.
     
@@ -55,6 +63,8 @@ def import_videos_from_csv(csv_file, videos_dir='static/videos', has_header=True
         gloss_col: Column index for gloss words (0-based)
         video_col: Column index for video filenames (0-based)
         delimiter: CSV delimiter character
+        ingest: Whether to probe new clips and build their renditions
+        relink: Replace the originals with hard links to the stored copies
     """
     if not os.path.exists(csv_file):
         print(f"Error: CSV file '{csv_file}' not found")
@@ -66,8 +76,9 @@ def import_videos_from_csv(csv_file, videos_dir='static/videos', has_header=True
     
     try:
         # Import necessary modules from the app
-        from app import app, db
-        from models import SignVideo
+        from app import app
+        from utils.video_import import upsert_sign_videos
+        from utils.video_ingest import ingest_pending_videos
     except ImportError as e:
         print(f"Error importing app modules: {str(e)}")
         print("Make sure you're running this script from the project root directory")
@@ -78,8 +89,7 @@ def import_videos_from_csv(csv_file, videos_dir='static/videos', has_header=True
     print(f"Found {len(available_videos)} video files in {videos_dir}")
     
     # Process the CSV file
-    added_count = 0
-    updated_count = 0
+    rows = []
     skipped_count = 0
     
     try:
@@ -90,53 +100,40 @@ def import_videos_from_csv(csv_file, videos_dir='static/videos', has_header=True
             if has_header:
                 next(reader, None)
             
-            with app.app_context():
-                for i, row in enumerate(reader, start=1):
-                    if len(row) <= max(gloss_col, video_col):
-                        print(f"Warning: Row {i} has fewer columns than expected, skipping")
-                        skipped_count += 1
-                        continue
-                    
-                    gloss = row[gloss_col].strip()
-                    video_filename = row[video_col].strip()
-                    
-                    if not gloss or not video_filename:
-                        print(f"Warning: Row {i} has empty values, skipping")
-                        skipped_count += 1
-                        continue
-                    
-                    if video_filename not in available_videos:
-                        print(f"Warning: Video file '{video_filename}' not found in {videos_dir}, skipping")
-                        skipped_count += 1
-                        continue
-                    
-                    file_path = os.path.join(videos_dir, video_filename)
-                    
-                    # Check if the gloss word already exists
-                    existing_video = SignVideo.query.filter_by(gloss_word=gloss).first()
-                    
-                    if existing_video:
-                        # Update the existing entry
-                        existing_video.file_path = file_path
-                        existing_video.created_at = datetime.utcnow()
-                        db.session.commit()
-                        print(f"Updated: '{gloss}' -> '{video_filename}'")
-                        updated_count += 1
-                    else:
-                        # Create a new entry
-                        new_video = SignVideo(
-                            gloss_word=gloss,
-                            file_path=file_path
-                        )
-                        db.session.add(new_video)
-                        db.session.commit()
-                        print(f"Added: '{gloss}' -> '{video_filename}'")
-                        added_count += 1
+            for i, row in enumerate(reader, start=1):
+                if len(row) <= max(gloss_col, video_col):
+                    print(f"Warning: Row {i} has fewer columns than expected, skipping")
+                    skipped_count += 1
+                    continue
+                
+                gloss = row[gloss_col].strip()
+                video_filename = row[video_col].strip()
+                
+                if not gloss or not video_filename:
+                    print(f"Warning: Row {i} has empty values, skipping")
+                    skipped_count += 1
+                    continue
+                
+                if video_filename not in available_videos:
+                    print(f"Warning: Video file '{video_filename}' not found in {videos_dir}, skipping")
+                    skipped_count += 1
+                    continue
+                
+                rows.append({'gloss_word': gloss, 'file_path': os.path.join(videos_dir, video_filename)})
+        
+        # Write all rows with batched upserts instead of a commit per row
+        with app.app_context():
+            counts = upsert_sign_videos(rows)
+            if ingest:
+                ingested_count, _ = ingest_pending_videos(relink=relink)
         
         print(f"\nImport completed successfully:")
-        print(f"- {added_count} new videos added")
-        print(f"- {updated_count} existing entries updated")
+        print(f"- {counts['added']} new videos added")
+        print(f"- {counts['updated']} existing entries updated")
+        print(f"- {counts['unchanged']} entries unchanged")
         print(f"- {skipped_count} entries skipped")
+        if ingest:
+            print(f"- {ingested_count} videos ingested")
         
         return True
     
@@ -152,5 +149,7 @@ if __name__ == "__main__":
         has_header=args.has_header, 
         gloss_col=args.gloss_column,
         video_col=args.video_column,
-        delimiter=args.delimiter
+        delimiter=args.delimiter,
+        ingest=not args.no_ingest,
+        relink=not args.no_relink
     )
\ No newline at end of file
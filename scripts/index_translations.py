@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Index the words of past translations for the related translations list.
+
+New translations are indexed as they are saved; run this once for
+translations saved before the index existed. It can be stopped and rerun,
+already indexed translations are skipped.
+
+Usage:
+    python scripts/index_translations.py [--batch-size 1000]
+"""
+import os
+import sys
+import argparse
+
+# Add the parent directory to the path so we can import from the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Index the words of past translations")
+    parser.add_argument('--batch-size', type=int, default=1000,
+                      help="Number of translations indexed per transaction (default: 1000)")
+    return parser.parse_args()
+
+def index_translations(batch_size=1000):
+    """
+    Index every translation that has no terms yet.
+
+    Args:
+        batch_size: Number of translations indexed per transaction
+    """
+    from app import app
+    from utils.related import backfill_translation_terms
+
+    with app.app_context():
+        indexed_count = backfill_translation_terms(batch_size=batch_size)
+
+    print(f"\nIndexing completed:")
+    print(f"- {indexed_count} translations indexed")
+    return True
+
+if __name__ == "__main__":
+    args = parse_args()
+    index_translations(batch_size=args.batch_size)
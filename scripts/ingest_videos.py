@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Probe sign videos and build their renditions.
+
+The import scripts ingest clips as they add them; run this once for videos
+imported before that, or with --force after changing the rendition settings.
+For every SignVideo row this records the duration, codec, resolution,
+bitrate and keyframe count, and stores a faststart copy (index at the front,
+so playback starts during the download) and a low-bitrate rendition in the
+asset store.
+
+Originals, including those stored by an earlier run, are replaced with
+hard links to their read-only copy in the store unless --no-relink is
+given, in which case each clip keeps taking space twice.
+
+Usage:
+    python scripts/ingest_videos.py [--no-renditions] [--no-relink] [--force]
+
+Requires ffmpeg and ffprobe on the PATH.
+"""
+import os
+import sys
+import argparse
+
+# Add the parent directory to the path so we can import from the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Probe sign videos and build their renditions")
+    parser.add_argument('--no-renditions', action='store_true',
+                      help="Only probe metadata, don't transcode")
+    parser.add_argument('--force', action='store_true',
+                      help="Redo probes and renditions that were already done")
+    parser.add_argument('--no-relink', action='store_true',
+                      help="Keep the original files instead of linking them to the stored copies")
+    return parser.parse_args()
+
+def ingest_videos(renditions=True, force=False, relink=True):
+    """
+    Ingest every SignVideo row.
+
+    Args:
+        renditions: Whether to build faststart and low-bitrate renditions
+        force: Redo work whose results are already recorded
+        relink: Replace the originals with hard links to the stored copies
+    """
+    from app import app, db
+    from models import SignVideo
+    from utils.video_ingest import ingest_sign_video
+
+    ingested_count = 0
+    missing_count = 0
+
+    with app.app_context():
+        videos = SignVideo.query.order_by(SignVideo.id).all()
+        print(f"Ingesting {len(videos)} videos")
+        for video in videos:
+            if not ingest_sign_video(video, renditions=renditions, force=force, relink=relink):
+                print(f"Warning: Video file for '{video.gloss_word}' not found: {video.file_path}")
+                missing_count += 1
+                continue
+            # Commit per clip so an interrupted run keeps its progress
+            db.session.commit()
+            ingested_count += 1
+            print(f"Ingested '{video.gloss_word}': {video.duration or 0:.2f}s "
+                  f"{video.width}x{video.height} {video.video_codec}")
+
+    print(f"\nIngest completed:")
+    print(f"- {ingested_count} videos ingested")
+    print(f"- {missing_count} rows with missing files")
+    return True
+
+if __name__ == "__main__":
+    args = parse_args()
+    ingest_videos(renditions=not args.no_renditions, force=args.force, relink=not args.no_relink)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Maintain the translation history: partitions, daily rollups and retention.
+
+Run it daily from cron. Each run:
+1. Creates the monthly partitions for the coming months (PostgreSQL, once
+   the table is partitioned)
+2. Recomputes the daily rollups served by /api/stats/daily
+3. Removes translations older than the retention period, by dropping whole
+   monthly partitions on PostgreSQL or with batched deletes elsewhere
+
+Rollups are computed before anything expires, so the daily figures are
+kept after the raw rows are gone.
+
+Usage:
+    python scripts/maintain_translations.py [--retention-days 365]
+    python scripts/maintain_translations.py --partition        # one-off, PostgreSQL
+    python scripts/maintain_translations.py --migrate-errors   # one-off, after upgrading
+
+Example crontab entry:
+    15 3 * * * cd /srv/app && python scripts/maintain_translations.py
+"""
+import os
+import sys
+import argparse
+from datetime import date
+
+# Add the parent directory to the path so we can import from the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def parse_args():
+    from utils.retention import TRANSLATION_RETENTION_DAYS
+
+    parser = argparse.ArgumentParser(description="Maintain the translation history")
+    parser.add_argument('--retention-days', type=int, default=TRANSLATION_RETENTION_DAYS,
+                      help=f"Remove translations older than this many days, 0 keeps them "
+                           f"(default: {TRANSLATION_RETENTION_DAYS})")
+    parser.add_argument('--partition', action='store_true',
+                      help="Convert the translation table to monthly partitions first (PostgreSQL)")
+    parser.add_argument('--migrate-errors', action='store_true',
+                      help="Move errors stored in the text of old failed translations to error_message")
+    parser.add_argument('--rollups-since', type=date.fromisoformat, metavar='YYYY-MM-DD',
+                      help="Recompute the rollups from this day (default: the last two days)")
+    return parser.parse_args()
+
+def maintain_translations(retention_days, partition=False, migrate_errors=False, rollups_since=None):
+    """
+    Run the maintenance steps.
+
+    Args:
+        retention_days: Age in days beyond which translations are removed
+        partition: Convert the table to monthly partitions first
+        migrate_errors: Move old error texts to error_message
+        rollups_since: First day to recompute rollups for
+    """
+    from app import app
+    from utils.retention import (compute_daily_rollups, ensure_partitions, expire_translations,
+                                 is_partitioned, migrate_error_messages, partition_translation_table)
+
+    with app.app_context():
+        if partition:
+            try:
+                moved = partition_translation_table()
+            except RuntimeError as e:
+                print(f"Error: {str(e)}")
+                return False
+            if moved is None:
+                print("The translation table is already partitioned")
+            else:
+                print(f"Partitioned the translation table ({moved} rows moved)")
+
+        if migrate_errors:
+            print(f"Moved the error messages of {migrate_error_messages()} failed translations")
+
+        created = ensure_partitions()
+        rolled_up = compute_daily_rollups(since=rollups_since)
+        expired = expire_translations(retention_days)
+        partitioned = is_partitioned()
+
+    print(f"\nMaintenance completed:")
+    if partitioned:
+        print(f"- {len(created)} partitions created")
+    print(f"- {rolled_up} daily rollups written")
+    if partitioned:
+        print(f"- {expired} expired partitions dropped")
+    else:
+        print(f"- {expired} expired translations deleted")
+    return True
+
+if __name__ == "__main__":
+    args = parse_args()
+    maintain_translations(
+        args.retention_days,
+        partition=args.partition,
+        migrate_errors=args.migrate_errors,
+        rollups_since=args.rollups_since
+    )
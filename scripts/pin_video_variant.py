@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Pin the clip served for a gloss when VIDEO_VARIANT_POLICY is 'pinned'.
+
+Usage:
+    python scripts/pin_video_variant.py "YOU FREE TODAY"            # list the variants
+    python scripts/pin_video_variant.py "YOU FREE TODAY" --pin 12   # pin variant 12
+    python scripts/pin_video_variant.py "YOU FREE TODAY" --clear    # serve the main clip again
+"""
+import os
+import sys
+import argparse
+
+# Add the parent directory to the path so we can import from the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Pin the clip served for a gloss")
+    parser.add_argument('gloss', help="Gloss word/phrase as stored in the database")
+    parser.add_argument('--pin', type=int, metavar='VARIANT_ID',
+                      help="Id of the variant to pin")
+    parser.add_argument('--clear', action='store_true',
+                      help="Unpin all variants of the gloss")
+    return parser.parse_args()
+
+def pin_video_variant(gloss, variant_id=None, clear=False):
+    """
+    List, pin or unpin the variants of a gloss.
+
+    Args:
+        gloss: Gloss word/phrase
+        variant_id: Id of the variant to pin
+        clear: Unpin all variants
+    """
+    from app import app, db
+    from models import SignVideo
+
+    with app.app_context():
+        video = SignVideo.query.filter_by(gloss_word=gloss).first()
+        if video is None:
+            print(f"Error: No video found for gloss '{gloss}'")
+            return False
+
+        if variant_id is not None and variant_id not in {variant.id for variant in video.variants}:
+            print(f"Error: Variant {variant_id} does not belong to '{gloss}'")
+            return False
+
+        if variant_id is not None or clear:
+            for variant in video.variants:
+                variant.is_pinned = variant.id == variant_id
+            db.session.commit()
+
+        print(f"Main clip: {video.file_path}")
+        for variant in video.variants:
+            marker = ' (pinned)' if variant.is_pinned else ''
+            print(f"Variant {variant.id}: {variant.file_path} "
+                  f"[{variant.size or 0} bytes, {variant.duration or 0:.2f}s]{marker}")
+        return True
+
+if __name__ == "__main__":
+    args = parse_args()
+    pin_video_variant(args.gloss, variant_id=args.pin, clear=args.clear)
@@ -15,6 +15,8 @@ sys.path.append(project_root)
 # Import the Flask app and database models
 from app import app, db
 from models import SignVideo
+from utils.video_ingest import ingest_sign_video
+from utils.video_retrieval import canonical_gloss_word
 
 def main():
     """
@@ -41,7 +43,7 @@ def main():
         added_count = 0
         for video_file in video_files:
             # Extract the gloss word from the filename (remove the .mp4 extension)
-            gloss_word = os.path.splitext(video_file)[0].lower()
+            gloss_word = canonical_gloss_word(os.path.splitext(video_file)[0].lower())
             
             # Check if this gloss word already exists in the database
             existing_video = SignVideo.query.filter_by(gloss_word=gloss_word).first()
@@ -57,6 +59,7 @@ def main():
                 file_path=video_path
             )
             
+            ingest_sign_video(new_video)
             db.session.add(new_video)
             added_count += 1
             print(f"Added {gloss_word} to database")
@@ -6,7 +6,7 @@ This allows you to define custom mappings from English words to ISL gloss.
 Usage:
   1. Update the CUSTOM_TRANSLATIONS dictionary below with your mappings
   2. Run this script with: python scripts/update_gloss_translations.py
-  3. Restart the application to apply changes
+  3. Running application workers pick up the changes automatically (no restart needed)
 """
 import os
 import sys
@@ -27,8 +27,9 @@ def update_translation_rules():
     """
     Update the translation rules file with custom mappings.
     """
-    utils_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'utils')
-    translation_file = os.path.join(utils_dir, 'translation_rules.json')
+    from utils.text_to_gloss import TRANSLATION_RULES_FILE, save_translation_rules
+    
+    translation_file = TRANSLATION_RULES_FILE
     
     # Load existing rules if file exists, or create new empty rules
     if os.path.exists(translation_file):
@@ -59,16 +60,14 @@ def update_translation_rules():
             added_count += 1
     
     # Write the updated rules back to the file
-    os.makedirs(utils_dir, exist_ok=True)
-    with open(translation_file, 'w') as f:
-        json.dump(translation_rules, f, indent=2, sort_keys=True)
+    save_translation_rules(translation_rules)
     
     print(f"\nUpdate summary:")
     print(f"- {added_count} new translation rules added")
     print(f"- {updated_count} existing rules updated")
     print(f"- Total: {len(translation_rules)} translation rules in the system")
     print(f"\nTranslation rules saved to: {translation_file}")
-    print("Remember to restart the application for changes to take effect")
+    print("Running application workers will pick up the changes automatically")
 
 if __name__ == "__main__":
     update_translation_rules()
\ No newline at end of file
@@ -63,8 +63,8 @@ document.addEventListener('DOMContentLoaded', () => {
     
     // Save translation button event
     saveTranslationBtn.addEventListener('click', () => {
-        if (currentTranslation && currentTranslation.translation_id) {
-            window.location.href = `/translation/${currentTranslation.translation_id}`;
+        if (currentTranslation && currentTranslation.translation_url) {
+            window.location.href = currentTranslation.translation_url;
         }
     });
     
@@ -93,21 +93,15 @@ document.addEventListener('DOMContentLoaded', () => {
         recognizedTextElement.textContent = data.text;
         
         // Display ISL gloss
-        glossTextElement.innerHTML = '';
-        data.gloss.forEach(word => {
-            const glossItem = document.createElement('span');
-            glossItem.className = 'badge bg-primary me-2 mb-2';
-            glossItem.textContent = word;
-            glossTextElement.appendChild(glossItem);
-        });
+        displayGloss(data.gloss);
         
-        // Show save button if we have a translation ID
-        if (data.translation_id) {
+        // Show save button if we have a translation to link to
+        if (data.translation_url) {
             saveBtn.classList.remove('d-none');
         }
         
-        // Display videos
-        displayVideos(data.videos);
+        // Display videos, as one stitched sentence video when available
+        displayVideos(data.videos, data.sentence_video);
         
         // Update status
         statusElement.textContent = 'Translation complete!';
@@ -115,8 +109,56 @@ document.addEventListener('DOMContentLoaded', () => {
         statusElement.classList.add('text-success');
     };
     
+    // Event handler for partial results streamed while the user is speaking
+    audioRecorder.onPartialResult = (data) => {
+        resultsDiv.classList.remove('d-none');
+        noResultsDiv.classList.add('d-none');
+        errorDiv.classList.add('d-none');
+        
+        recognizedTextElement.textContent = data.text;
+        displayGloss(data.gloss);
+        
+        // Only rebuild the players when the clips change so playback isn't restarted
+        const videoKey = (data.videos || []).map(video => video.video_path).join('|');
+        if (videoKey !== displayedVideoKey) {
+            displayVideos(data.videos);
+        }
+    };
+    
+    // Function to display ISL gloss badges
+    function displayGloss(gloss) {
+        glossTextElement.innerHTML = '';
+        gloss.forEach(word => {
+            const glossItem = document.createElement('span');
+            glossItem.className = 'badge bg-primary me-2 mb-2';
+            glossItem.textContent = word;
+            glossTextElement.appendChild(glossItem);
+        });
+    }
+    
+    // Video paths currently rendered, used to skip redundant re-renders
+    let displayedVideoKey = null;
+    
+    // Use low-bitrate renditions when the browser reports a slow or metered connection
+    function prefersLowQuality() {
+        const connection = navigator.connection;
+        if (!connection) {
+            return false;
+        }
+        return connection.saveData || ['slow-2g', '2g', '3g'].includes(connection.effectiveType);
+    }
+    
+    // Pick the URL to play for a clip
+    function videoSource(video) {
+        if (prefersLowQuality() && video.renditions && video.renditions.low) {
+            return video.renditions.low;
+        }
+        return video.video_path;
+    }
+    
     // Function to display videos
-    function displayVideos(videos) {
+    function displayVideos(videos, sentenceVideo) {
+        displayedVideoKey = (videos || []).map(video => video.video_path).join('|');
         videosDiv.innerHTML = '';
         
         if (!videos || videos.length === 0) {
@@ -125,6 +167,11 @@ document.addEventListener('DOMContentLoaded', () => {
             return;
         }
         
+        if (sentenceVideo) {
+            displaySentenceVideo(videos, sentenceVideo);
+            return;
+        }
+        
         videos.forEach(video => {
             const videoCol = document.createElement('div');
             videoCol.className = 'col-md-4 col-lg-3 mb-4';
@@ -134,7 +181,9 @@ document.addEventListener('DOMContentLoaded', () => {
             
             const cardHeader = document.createElement('div');
             cardHeader.className = 'card-header';
-            cardHeader.textContent = video.gloss;
+            cardHeader.textContent = video.fingerspelled
+                ? `${video.gloss} (${video.fingerspelled})`
+                : video.gloss;
             
             const cardBody = document.createElement('div');
             cardBody.className = 'card-body text-center';
@@ -146,7 +195,7 @@ document.addEventListener('DOMContentLoaded', () => {
             videoElement.loop = true;
             
             const source = document.createElement('source');
-            source.src = video.video_path;
+            source.src = videoSource(video);
             source.type = 'video/mp4';
             
             videoElement.appendChild(source);
@@ -161,6 +210,45 @@ document.addEventListener('DOMContentLoaded', () => {
         noVideosDiv.classList.add('d-none');
     }
     
+    // Function to display a single stitched video for the whole sentence
+    function displaySentenceVideo(videos, sentenceVideo) {
+        const videoCol = document.createElement('div');
+        videoCol.className = 'col-12 mb-4';
+        
+        const videoCard = document.createElement('div');
+        videoCard.className = 'card h-100';
+        
+        const cardHeader = document.createElement('div');
+        cardHeader.className = 'card-header';
+        cardHeader.textContent = videos.map(video => video.gloss).join(' ');
+        
+        const cardBody = document.createElement('div');
+        cardBody.className = 'card-body text-center';
+        
+        const videoElement = document.createElement('video');
+        videoElement.className = 'w-100';
+        videoElement.controls = true;
+        videoElement.autoplay = false;
+        videoElement.loop = true;
+        
+        const source = document.createElement('source');
+        source.src = prefersLowQuality() ? `${sentenceVideo}&quality=low` : sentenceVideo;
+        source.type = 'video/mp4';
+        
+        // Fall back to one player per clip if the sentence video can't be built
+        source.addEventListener('error', () => displayVideos(videos));
+        
+        videoElement.appendChild(source);
+        cardBody.appendChild(videoElement);
+        videoCard.appendChild(cardHeader);
+        videoCard.appendChild(cardBody);
+        videoCol.appendChild(videoCard);
+        videosDiv.appendChild(videoCol);
+        
+        videosDiv.classList.remove('d-none');
+        noVideosDiv.classList.add('d-none');
+    }
+    
     // Function to show error messages
     function showError(message) {
         errorMessage.textContent = message;
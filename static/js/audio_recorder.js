@@ -16,6 +16,16 @@ class AudioRecorder {
         // Callback for when processing is complete
         this.onProcessingComplete = null;
         
+        // Callback for partial results while the user is still speaking
+        this.onPartialResult = null;
+        
+        // Stream chunks to the server while recording (falls back to upload-on-stop)
+        this.streamingEnabled = typeof EventSource !== 'undefined';
+        this.chunkInterval = 1000;
+        this.streamSession = null;
+        this.eventSource = null;
+        this.uploadChain = Promise.resolve();
+        
         // Bind methods
         this.startRecording = this.startRecording.bind(this);
         this.stopRecording = this.stopRecording.bind(this);
@@ -44,8 +54,15 @@ class AudioRecorder {
             // Clear previous recordings
             this.audioChunks = [];
             
-            // Start recording
-            this.mediaRecorder.start();
+            // Open a streaming session so partial results arrive while speaking
+            this.streamSession = this.streamingEnabled ? await this.openStream(options.mimeType) : null;
+            
+            // Start recording, emitting a chunk every chunkInterval ms when streaming
+            if (this.streamSession) {
+                this.mediaRecorder.start(this.chunkInterval);
+            } else {
+                this.mediaRecorder.start();
+            }
             this.isRecording = true;
             
             // Setup visualizer if canvas exists
@@ -98,6 +115,11 @@ class AudioRecorder {
      * Handle recorded audio data
      */
     onDataAvailable(event) {
+        if (this.streamSession) {
+            this.onStreamData(event);
+            return;
+        }
+        
         if (event.data.size > 0) {
             this.audioChunks.push(event.data);
             
@@ -126,6 +148,10 @@ class AudioRecorder {
                             throw new Error(data.error || 'Server responded with an error');
                         });
                     }
+                    // 202 means the server queued the work as a background job
+                    if (response.status === 202) {
+                        return response.json().then(job => this.waitForJob(job.status_url));
+                    }
                     return response.json();
                 })
                 .then(data => {
@@ -150,6 +176,115 @@ class AudioRecorder {
         }
     }
     
+    /**
+     * Open a streaming session and subscribe to its partial results
+     */
+    async openStream(mimeType) {
+        try {
+            const response = await fetch(`/stream?type=${encodeURIComponent(mimeType)}`, {
+                method: 'POST'
+            });
+            if (!response.ok) {
+                throw new Error(`Server responded with ${response.status}`);
+            }
+            const session = await response.json();
+            
+            this.eventSource = new EventSource(session.events_url);
+            this.eventSource.addEventListener('partial', event => {
+                if (typeof this.onPartialResult === 'function') {
+                    this.onPartialResult(JSON.parse(event.data));
+                }
+            });
+            this.eventSource.addEventListener('final', () => this.closeEventSource());
+            // The server dropped the session; don't let EventSource reconnect
+            this.eventSource.addEventListener('expired', () => this.closeEventSource());
+            
+            this.uploadChain = Promise.resolve();
+            return session;
+        } catch (error) {
+            console.warn('Streaming unavailable, uploading after recording instead:', error);
+            return null;
+        }
+    }
+    
+    /**
+     * Upload each recorded chunk as it arrives and finish the stream on stop
+     */
+    onStreamData(event) {
+        const session = this.streamSession;
+        
+        // Chunks are uploaded one after another so the server sees them in order
+        if (event.data.size > 0) {
+            const chunk = event.data;
+            this.uploadChain = this.uploadChain.then(() => fetch(session.chunk_url, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/octet-stream' },
+                body: chunk
+            }));
+        }
+        
+        if (this.mediaRecorder.state !== 'inactive') {
+            return;
+        }
+        
+        this.streamSession = null;
+        this.uploadChain
+            .then(() => fetch(session.finish_url, { method: 'POST' }))
+            .then(response => response.json().then(data => {
+                if (!response.ok) {
+                    throw new Error(data.error || 'Server responded with an error');
+                }
+                return data;
+            }))
+            .then(data => {
+                console.log('Server response:', data);
+                if (typeof this.onProcessingComplete === 'function') {
+                    this.onProcessingComplete(data);
+                }
+            })
+            .catch(error => {
+                console.error('Error streaming audio to server:', error);
+                if (typeof this.onProcessingComplete === 'function') {
+                    this.onProcessingComplete({ 
+                        error: error.message || 'Failed to process audio' 
+                    });
+                }
+            })
+            .finally(() => this.closeEventSource());
+    }
+    
+    /**
+     * Stop listening for partial results
+     */
+    closeEventSource() {
+        if (this.eventSource) {
+            this.eventSource.close();
+            this.eventSource = null;
+        }
+    }
+    
+    /**
+     * Long-poll a queued translation job until it finishes
+     */
+    waitForJob(statusUrl) {
+        return fetch(`${statusUrl}?wait=25`)
+            .then(response => response.json().then(data => {
+                if (!response.ok) {
+                    throw new Error(data.error || 'Server responded with an error');
+                }
+                return data;
+            }))
+            .then(job => {
+                if (job.status === 'queued' || job.status === 'running') {
+                    return this.waitForJob(statusUrl);
+                }
+                if (job.status_code >= 400) {
+                    throw new Error(job.result.error || 'Server responded with an error');
+                }
+                return job.result;
+            });
+    }
+    
     /**
      * Setup audio visualizer
      */
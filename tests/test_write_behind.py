@@ -0,0 +1,146 @@
+import os
+import time
+from datetime import datetime
+
+import pytest
+from flask import Flask
+from sqlalchemy.exc import OperationalError
+
+from models import db, Translation, TranslationTerm
+from utils.write_behind import TranslationWriter, new_public_id, queued_at
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'test.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def writer(app, tmp_path):
+    # Flushed by the tests only; the background thread never wakes up
+    return TranslationWriter(app, enabled=True, batch_size=1000, flush_interval=3600,
+                             spill_dir=str(tmp_path / 'spill'))
+
+
+def _row(text, **fields):
+    fields.setdefault('public_id', new_public_id())
+    fields.setdefault('timestamp', datetime.utcnow())
+    return dict(original_text=text, gloss_text=text.upper(), is_successful=True, **fields)
+
+
+def _spill_files(writer, pattern='.jsonl'):
+    if not os.path.isdir(writer.spill_dir):
+        return []
+    return sorted(name for name in os.listdir(writer.spill_dir) if name.endswith(pattern))
+
+
+def _translations(app):
+    with app.app_context():
+        return {translation.public_id: translation.original_text
+                for translation in Translation.query.all()}
+
+
+def _database_down(*args, **kwargs):
+    raise OperationalError("INSERT INTO translation", {}, Exception("connection refused"))
+
+
+def test_flush_writes_queued_translations(app, writer):
+    ref = writer.add(original_text='hello friend', gloss_text='HELLO FRIEND', is_successful=True)
+
+    assert writer.is_pending(ref)
+    assert writer.flush() == 1
+    assert not writer.is_pending(ref)
+    assert _translations(app) == {ref: 'hello friend'}
+
+
+def test_unreachable_database_spills_and_replays(app, writer, monkeypatch):
+    ref = writer.add(original_text='hello friend', gloss_text='HELLO FRIEND', is_successful=True)
+    monkeypatch.setattr(writer, '_insert', _database_down)
+
+    assert writer.flush() == 0
+    assert len(_spill_files(writer)) == 1
+    assert _translations(app) == {}
+
+    monkeypatch.undo()
+    assert writer.flush() == 1
+    assert _spill_files(writer) == []
+    assert _translations(app) == {ref: 'hello friend'}
+
+
+def test_any_failure_spills_the_batch(app, writer, monkeypatch):
+    def broken_insert(rows):
+        raise TypeError("cannot index")
+
+    ref = writer.add(original_text='hello friend', gloss_text='HELLO FRIEND', is_successful=True)
+    monkeypatch.setattr(writer, '_insert', broken_insert)
+
+    assert writer.flush() == 0
+    assert len(_spill_files(writer)) == 1
+
+    monkeypatch.undo()
+    writer.flush()
+    assert _translations(app) == {ref: 'hello friend'}
+
+
+def test_replay_stops_while_database_is_unreachable(app, writer, monkeypatch):
+    writer._spill([_row('first')])
+    writer._spill([_row('second')])
+    monkeypatch.setattr(writer, '_insert', _database_down)
+
+    assert writer.flush() == 0
+    assert len(_spill_files(writer)) == 2
+    assert _spill_files(writer, '.failed') == []
+
+
+def test_rejected_batch_is_quarantined(app, writer):
+    bad = _row('rejected')
+    bad['original_text'] = None  # NOT NULL
+    writer._spill([bad])
+    good = _row('accepted')
+    writer._spill([good])
+
+    assert writer.flush() == 1
+    assert _spill_files(writer) == []
+    assert len(_spill_files(writer, '.failed')) == 1
+    assert _translations(app) == {good['public_id']: 'accepted'}
+
+
+def test_unreadable_batch_is_quarantined(app, writer):
+    os.makedirs(writer.spill_dir)
+    with open(os.path.join(writer.spill_dir, 'translations-0-broken.jsonl'), 'w') as f:
+        f.write('{not json\n')
+
+    assert writer.flush() == 0
+    assert _spill_files(writer) == []
+    assert _spill_files(writer, '.failed') == ['translations-0-broken.jsonl.failed']
+
+
+def test_replayed_rows_are_written_once(app, writer):
+    rows = [_row('hello friend'), _row('good morning')]
+    # The same batch spilled twice, or replayed by two workers
+    writer._spill([dict(row) for row in rows])
+    writer._spill([dict(row) for row in rows])
+    writer.add(**_row('hello again'))
+
+    assert writer.flush() == 3
+    assert _spill_files(writer) == []
+    assert len(_translations(app)) == 3
+    with app.app_context():
+        terms = db.session.query(TranslationTerm.term).all()
+    assert sorted(term for term, in terms) == ['again', 'friend', 'good', 'hello', 'hello', 'morning']
+
+
+def test_public_id_records_queue_time():
+    before = time.time()
+    public_id = new_public_id()
+
+    assert len(public_id) == 32
+    assert int(public_id, 16) >= 0
+    assert before - 0.001 <= queued_at(public_id) <= time.time()
@@ -0,0 +1,123 @@
+import logging
+import os
+import re
+import shutil
+import stat
+import tempfile
+
+from utils.video_serving import file_digest, VIDEO_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+
+# Folder holding content-addressed copies of every sign video
+ASSET_STORE_DIR = os.environ.get(
+    "ASSET_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                 'static', 'videos', 'assets'))
+
+# URL prefix of content-addressed videos
+ASSET_URL_PREFIX = '/media/sha256/'
+
+_DIGEST_RE = re.compile(r'^[0-9a-f]{64}$')
+
+def is_digest(value):
+    """Check whether a string is a lowercase hex SHA-256 digest."""
+    return bool(value) and bool(_DIGEST_RE.match(value))
+
+def asset_file(digest, extension='.mp4'):
+    """
+    Get the path a video with the given digest and extension is stored under.
+
+    Assets are fanned out over subfolders named after the first two hex
+    digits so no single folder grows too large. The extension is that of
+    the file stored, so the asset is served with the right type.
+    """
+    return os.path.join(ASSET_STORE_DIR, digest[:2], f"{digest}{extension}")
+
+def asset_url(digest, extension='.mp4'):
+    """Get the immutable URL of a stored video."""
+    return f"{ASSET_URL_PREFIX}{digest}{extension}"
+
+def find_asset(digest):
+    """
+    Get the path of the stored video with the given digest.
+
+    Returns:
+        str: The path, or None if the digest is not in the store.
+    """
+    for extension in ['.mp4', *sorted(VIDEO_EXTENSIONS - {'.mp4'})]:
+        path = asset_file(digest, extension)
+        if os.path.isfile(path):
+            return path
+    return None
+
+def _asset_extension(path):
+    extension = os.path.splitext(path)[1].lower()
+    return extension if extension in VIDEO_EXTENSIONS else '.mp4'
+
+def _make_read_only(path):
+    mode = os.stat(path).st_mode
+    if mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH):
+        os.chmod(path, mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+def store_asset(path, relink=False):
+    """
+    Add a video file to the asset store.
+
+    The file is copied into the store and the copy made read-only, so later
+    edits to the original can't change an asset served as immutable; the
+    copy is hashed again in case the original changed while being copied.
+    Identical files end up as a single stored asset. With ``relink`` the
+    original is then replaced by a hard link to the stored asset, so
+    duplicate originals stop taking up disk space of their own and become
+    read-only as well.
+
+    Args:
+        path (str): Absolute path of the video file.
+        relink (bool): Whether to replace the original with a hard link.
+
+    Returns:
+        str: The SHA-256 digest of the stored content.
+    """
+    digest = file_digest(path)
+    extension = _asset_extension(path)
+    target = find_asset(digest)
+
+    if target is None:
+        target = asset_file(digest, extension)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, temp_target = tempfile.mkstemp(dir=os.path.dirname(target), suffix='.part')
+        os.close(fd)
+        try:
+            # A copy, never a link: the original stays writable by its owner
+            shutil.copy2(path, temp_target)
+            copied = file_digest(temp_target)
+            if copied != digest:
+                logger.warning(f"{path} changed while being stored, storing the copy as {copied}")
+                digest = copied
+                target = asset_file(digest, extension)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+            _make_read_only(temp_target)
+            os.replace(temp_target, target)
+            logger.debug(f"Stored asset {digest} from {path}")
+        finally:
+            if os.path.exists(temp_target):
+                os.unlink(temp_target)
+
+    if relink and not os.path.samefile(path, target):
+        # Stores made before assets were read-only may still hold writable files
+        _make_read_only(target)
+        _relink(target, path)
+    return digest
+
+def _relink(source, path):
+    """Atomically replace ``path`` with a hard link to ``source``."""
+    temp_path = f"{path}.relink"
+    try:
+        os.link(source, temp_path)
+        os.replace(temp_path, path)
+        logger.debug(f"Replaced duplicate {path} with a link to {source}")
+    except OSError as e:
+        logger.warning(f"Could not relink {path}: {str(e)}")
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
@@ -0,0 +1,127 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Set to 0 to disable the transcript cache
+AUDIO_CACHE_ENABLED = os.environ.get("AUDIO_CACHE_ENABLED", "1") == "1"
+
+# SQLite file holding cached transcripts, shared by all worker processes
+AUDIO_CACHE_PATH = os.environ.get(
+    "AUDIO_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                 'data', 'audio_cache.sqlite3'))
+
+# Maximum number of cached transcripts kept on disk
+AUDIO_CACHE_MAX_ENTRIES = int(os.environ.get("AUDIO_CACHE_MAX_ENTRIES", "10000"))
+
+def content_key(audio_bytes, backend_name):
+    """Key an upload by its exact bytes and the backend that recognizes it."""
+    digest = hashlib.sha256(audio_bytes).hexdigest()
+    return f"sha256:{backend_name}:{digest}"
+
+class AudioTranscriptCache:
+    """
+    Bounded on-disk cache of transcripts keyed by audio content hashes.
+
+    Backed by a small SQLite database so every worker process shares it
+    and entries survive restarts. When the cache grows past
+    ``max_entries`` the least recently used entries are dropped. Errors
+    are logged and treated as misses; the cache is never required for a
+    request to succeed.
+    """
+
+    def __init__(self, path=AUDIO_CACHE_PATH, max_entries=AUDIO_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS transcripts (
+                    key TEXT PRIMARY KEY,
+                    text TEXT NOT NULL,
+                    confidence REAL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_transcripts_last_used "
+                         "ON transcripts (last_used)")
+            self._local.conn = conn
+        return conn
+
+    def get(self, *keys):
+        """
+        Look up a transcript under the first of the given keys that matches.
+
+        Returns:
+            tuple: The cached text and confidence, or None on a miss.
+        """
+        keys = [key for key in keys if key]
+        try:
+            conn = self._connection()
+            for key in keys:
+                row = conn.execute("SELECT text, confidence FROM transcripts WHERE key = ?",
+                                   (key,)).fetchone()
+                if row:
+                    conn.execute("UPDATE transcripts SET last_used = ? WHERE key = ?",
+                                 (time.time(), key))
+                    self.hits += 1
+                    return row[0], row[1]
+        except sqlite3.Error as e:
+            logger.warning(f"Audio cache lookup failed: {str(e)}")
+        self.misses += 1
+        return None
+
+    def put(self, keys, text, confidence):
+        """Store a transcript under each of the given keys."""
+        now = time.time()
+        rows = [(key, text, confidence, now, now) for key in keys if key]
+        try:
+            conn = self._connection()
+            conn.executemany("INSERT OR REPLACE INTO transcripts "
+                             "(key, text, confidence, created_at, last_used) "
+                             "VALUES (?, ?, ?, ?, ?)", rows)
+            with self._lock:
+                self._writes_since_prune += len(rows)
+                prune = self._writes_since_prune >= max(1, self.max_entries // 100)
+                if prune:
+                    self._writes_since_prune = 0
+            if prune:
+                self._prune(conn)
+        except sqlite3.Error as e:
+            logger.warning(f"Audio cache store failed: {str(e)}")
+
+    def _prune(self, conn):
+        conn.execute("""
+            DELETE FROM transcripts WHERE key IN (
+                SELECT key FROM transcripts ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,))
+
+    def stats(self):
+        """Get the hit/miss counters for this process."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'max_entries': self.max_entries,
+        }
+
+# Shared by all requests in this process
+audio_cache = AudioTranscriptCache()
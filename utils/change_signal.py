@@ -0,0 +1,60 @@
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class ChangeSignal:
+    """
+    A cheap, cross-process change signal backed by a file's modification stamp.
+
+    Writers call ``notify()`` (or simply rewrite the watched file) and every
+    worker process notices on its next ``version()`` call. The file is only
+    stat'ed once per ``check_interval`` seconds, so callers can ask for the
+    version on every request without adding per-request file I/O.
+    """
+
+    def __init__(self, path, check_interval=2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._version = self._stat()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def version(self):
+        """
+        Get the current version stamp of the watched file.
+
+        Returns:
+            tuple: ``(mtime_ns, size)`` of the file, or None if it does not exist.
+        """
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            with self._lock:
+                if now - self._checked_at >= self.check_interval:
+                    self._version = self._stat()
+                    self._checked_at = now
+        return self._version
+
+    def notify(self):
+        """Bump the version seen by all processes watching this file."""
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a'):
+                pass
+            os.utime(self.path, ns=(time.time_ns(), time.time_ns()))
+            # Make the change visible to this process immediately as well
+            with self._lock:
+                self._checked_at = 0.0
+        except OSError as e:
+            logger.warning(f"Could not signal change on {self.path}: {str(e)}")
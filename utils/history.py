@@ -0,0 +1,136 @@
+import base64
+import logging
+import os
+from datetime import datetime
+
+from sqlalchemy import func, select, text, tuple_
+
+from models import db, Translation
+from utils.search import search_filter
+
+logger = logging.getLogger(__name__)
+
+# Number of translations shown per history page
+HISTORY_PAGE_SIZE = int(os.environ.get("HISTORY_PAGE_SIZE", "10"))
+
+# Largest page size the history API accepts
+HISTORY_MAX_PAGE_SIZE = int(os.environ.get("HISTORY_MAX_PAGE_SIZE", "100"))
+
+# Matches counted exactly before the total is reported as "more than"
+HISTORY_COUNT_LIMIT = int(os.environ.get("HISTORY_COUNT_LIMIT", "1000"))
+
+def encode_cursor(translation):
+    """
+    Encode the position of a translation in the history as an opaque cursor.
+
+    Args:
+        translation (Translation): The row the cursor points at.
+
+    Returns:
+        str: URL-safe cursor.
+    """
+    position = f"{translation.timestamp.isoformat()}|{translation.id}"
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor made by ``encode_cursor``.
+
+    Returns:
+        tuple: The ``(timestamp, id)`` position.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        position = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        timestamp, translation_id = position.split('|')
+        return datetime.fromisoformat(timestamp), int(translation_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+def history_page(search='', after=None, before=None, per_page=HISTORY_PAGE_SIZE):
+    """
+    Get one page of the translation history, newest first.
+
+    Pages are addressed by keyset on ``(timestamp, id)`` rather than by
+    offset, so with the composite index on those columns every page costs
+    the same as the first, however deep it is.
+
+    Args:
+        search (str): Optional full-text filter.
+        after (str): Cursor of the last row of the previous page; the page
+            holds the rows older than it.
+        before (str): Cursor of the first row of the next page; the page
+            holds the rows newer than it. Ignored if ``after`` is given.
+        per_page (int): Number of rows per page.
+
+    Returns:
+        dict: ``translations`` on the page, and the ``next`` (older) and
+        ``prev`` (newer) cursors, None where there is no such page.
+
+    Raises:
+        ValueError: If a cursor is malformed.
+    """
+    per_page = max(1, min(per_page, HISTORY_MAX_PAGE_SIZE))
+    key = tuple_(Translation.timestamp, Translation.id)
+    query = Translation.query
+    if search:
+        query = query.filter(search_filter(search))
+
+    backwards = bool(before) and not after
+    if backwards:
+        query = query.filter(key > tuple_(*decode_cursor(before))).order_by(
+            Translation.timestamp.asc(), Translation.id.asc())
+    else:
+        if after:
+            query = query.filter(key < tuple_(*decode_cursor(after)))
+        query = query.order_by(Translation.timestamp.desc(), Translation.id.desc())
+
+    # One extra row tells whether there is another page in that direction
+    translations = query.limit(per_page + 1).all()
+    more = len(translations) > per_page
+    translations = translations[:per_page]
+    if backwards:
+        translations.reverse()
+
+    page = {'translations': translations, 'next': None, 'prev': None}
+    if translations:
+        if more or backwards:
+            page['next'] = encode_cursor(translations[-1])
+        if (more and backwards) or (after and not backwards):
+            page['prev'] = encode_cursor(translations[0])
+    return page
+
+def approximate_count(search=''):
+    """
+    Estimate the number of translations in the history.
+
+    Without a search, PostgreSQL answers from the planner statistics in
+    ``pg_class`` instead of counting rows. Otherwise at most
+    ``HISTORY_COUNT_LIMIT`` matches are counted.
+
+    Args:
+        search (str): Optional full-text filter.
+
+    Returns:
+        tuple: ``(count, exact)``; when ``exact`` is False the real number
+        is about ``count`` or, for capped counts, larger.
+    """
+    if not search and db.engine.dialect.name == 'postgresql':
+        # A partitioned table has no statistics of its own, so add up its partitions
+        estimate = db.session.execute(text(
+            "SELECT sum(greatest(reltuples, 0)) FROM pg_class WHERE oid = 'translation'::regclass "
+            "OR oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = 'translation'::regclass)")).scalar()
+        # -1 (or 0 on old servers) until the table is first analyzed
+        if estimate and estimate > HISTORY_COUNT_LIMIT:
+            return int(estimate), False
+
+    matches = select(Translation.id)
+    if search:
+        matches = matches.where(search_filter(search))
+    matches = matches.limit(HISTORY_COUNT_LIMIT + 1).subquery()
+    count = db.session.execute(select(func.count()).select_from(matches)).scalar()
+    if count > HISTORY_COUNT_LIMIT:
+        return HISTORY_COUNT_LIMIT, False
+    return count, True
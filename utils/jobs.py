@@ -0,0 +1,143 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Number of background workers running translation jobs in each process
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "4"))
+
+# Maximum number of queued or running jobs before new submissions are refused
+JOB_QUEUE_SIZE = int(os.environ.get("JOB_QUEUE_SIZE", "64"))
+
+# Seconds a finished job's result is kept around for clients to collect
+JOB_RESULT_TTL = float(os.environ.get("JOB_RESULT_TTL", "300"))
+
+class JobQueueFull(Exception):
+    """Raised when the job queue is at capacity and cannot accept more work."""
+
+class Job:
+    """
+    A single unit of background work and its outcome.
+
+    ``result`` and ``status_code`` are set once the job finishes; they hold
+    the JSON payload and HTTP status the synchronous endpoint would have
+    returned.
+    """
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.status = Job.QUEUED
+        self.result = None
+        self.status_code = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._finished = threading.Event()
+
+    @property
+    def finished(self):
+        return self._finished.is_set()
+
+    def wait(self, timeout=None):
+        """Block until the job finishes or the timeout expires."""
+        return self._finished.wait(timeout)
+
+    def to_dict(self):
+        data = {'job_id': self.id, 'status': self.status}
+        if self.finished:
+            data['result'] = self.result
+            data['status_code'] = self.status_code
+        return data
+
+class JobRunner:
+    """
+    Bounded in-process job queue backed by a thread pool.
+
+    Submissions beyond ``max_pending`` queued or running jobs raise
+    ``JobQueueFull`` so the caller can shed load instead of letting the
+    backlog grow without limit. Finished jobs are kept for ``result_ttl``
+    seconds so clients can poll for them.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, max_pending=JOB_QUEUE_SIZE,
+                 result_ttl=JOB_RESULT_TTL):
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='translation-job')
+        self._jobs = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queue a function to run in the background.
+
+        The function must return a ``(payload, status_code)`` tuple.
+
+        Args:
+            fn: The function to run.
+            *args, **kwargs: Arguments passed to the function.
+
+        Returns:
+            Job: The queued job.
+
+        Raises:
+            JobQueueFull: If too many jobs are already queued or running.
+        """
+        job = Job()
+        with self._lock:
+            self._purge_expired()
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(f"{self._pending} jobs already pending")
+            self._pending += 1
+            self._jobs[job.id] = job
+
+        try:
+            self._executor.submit(self._run, job, fn, args, kwargs)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+                self._jobs.pop(job.id, None)
+            raise
+        return job
+
+    def get(self, job_id):
+        """Get a job by id, or None if it is unknown or has expired."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = Job.RUNNING
+        try:
+            result, status_code = fn(*args, **kwargs)
+            status = Job.DONE if status_code < 400 else Job.FAILED
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {str(e)}")
+            result = {'error': f"An error occurred while processing your request: {str(e)}"}
+            status_code = 500
+            status = Job.FAILED
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._pending -= 1
+        # Publish the outcome before the final status, so a poll that sees
+        # 'done' or 'failed' always gets the result with it
+        job.result, job.status_code = result, status_code
+        job._finished.set()
+        job.status = status
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.result_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -0,0 +1,159 @@
+import logging
+import math
+import os
+from collections import Counter
+
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.orm import Session
+
+from models import db, Translation, TranslationTerm
+from utils.text_to_gloss import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Most recent translations read per shared term when looking for related ones
+RELATED_CANDIDATES_PER_TERM = int(os.environ.get("RELATED_CANDIDATES_PER_TERM", "200"))
+
+# Postings counted per term when weighing how rare it is
+RELATED_TERM_COUNT_LIMIT = int(os.environ.get("RELATED_TERM_COUNT_LIMIT", "10000"))
+
+# Most distinct terms indexed per translation
+MAX_TERMS_PER_TRANSLATION = int(os.environ.get("MAX_TERMS_PER_TRANSLATION", "32"))
+
+# Words too common to say anything about how two translations relate
+STOPWORDS = frozenset("""
+    a an the and or but if of at by for with about to from in on off out over under
+    i me my we our you your he him his she her it its they them their this that these
+    those am is are was were be been being have has had do does did not no so than too
+    very can will just should would could there here what which who whom when where why how
+""".split())
+
+_TERM_LENGTH = TranslationTerm.term.type.length
+
+def translation_terms(text):
+    """
+    Get the indexed terms of a translation's text.
+
+    Args:
+        text (str): The recognized English text.
+
+    Returns:
+        list: Distinct lowercase words without stopwords, in text order.
+    """
+    terms = []
+    for token in tokenize(text or ''):
+        token = token[:_TERM_LENGTH]
+        if token not in STOPWORDS and token not in terms:
+            terms.append(token)
+    return terms[:MAX_TERMS_PER_TRANSLATION]
+
+def index_translation_terms(connection, translations):
+    """
+    Write the term postings of translations.
+
+    Args:
+        connection: The connection (or session) to write with, inside the
+            caller's transaction.
+        translations (iterable): ``(id, original_text)`` pairs of successful
+            translations.
+    """
+    rows = [{'translation_id': translation_id, 'term': term}
+            for translation_id, text in translations
+            for term in translation_terms(text)]
+    if rows:
+        connection.execute(TranslationTerm.__table__.insert(), rows)
+
+@event.listens_for(Session, 'after_flush')
+def _index_flushed_translations(session, flush_context):
+    new = [obj for obj in session.new if isinstance(obj, Translation)]
+    changed = [obj for obj in session.dirty if isinstance(obj, Translation)
+               and session.is_modified(obj, include_collections=False)]
+    deleted = [obj.id for obj in session.deleted if isinstance(obj, Translation)]
+    if not (new or changed or deleted):
+        return
+
+    connection = session.connection()
+    table = TranslationTerm.__table__
+    stale = deleted + [obj.id for obj in changed]
+    if stale:
+        # No foreign key to cascade from, see Translation
+        connection.execute(delete(table).where(table.c.translation_id.in_(stale)))
+    index_translation_terms(connection, [(obj.id, obj.original_text) for obj in new + changed
+                                         if obj.is_successful])
+
+def find_related_translations(translation, limit=5):
+    """
+    Find the translations most similar to a given one.
+
+    Candidates come from the term postings only, reading at most
+    ``RELATED_CANDIDATES_PER_TERM`` of the newest translations per shared
+    term. Each shared term scores more the rarer it is, going by its
+    number of postings, counted from the term index up to
+    ``RELATED_TERM_COUNT_LIMIT``; ties go to the newest translation.
+
+    Args:
+        translation (Translation): The translation to match.
+        limit (int): Maximum number of results.
+
+    Returns:
+        list: Related successful translations, best first.
+    """
+    table = TranslationTerm.__table__
+    scores = Counter()
+    for term in translation_terms(translation.original_text):
+        postings = db.session.execute(
+            select(table.c.translation_id)
+            .where(table.c.term == term, table.c.translation_id != translation.id)
+            .order_by(table.c.translation_id.desc())
+            .limit(RELATED_CANDIDATES_PER_TERM)
+        ).scalars().all()
+        if not postings:
+            continue
+        # Counted apart from the candidates, which stop at the limit for common terms
+        frequency = db.session.execute(select(func.count()).select_from(
+            select(table.c.translation_id).where(table.c.term == term)
+            .limit(RELATED_TERM_COUNT_LIMIT).subquery())).scalar()
+        # Fewer postings means a rarer, more telling term
+        weight = 1 / math.log2(frequency + 1)
+        for translation_id in postings:
+            scores[translation_id] += weight
+
+    best = sorted(scores, key=lambda translation_id: (scores[translation_id], translation_id),
+                  reverse=True)[:limit]
+    if not best:
+        return []
+    found = {related.id: related for related in
+             Translation.query.filter(Translation.id.in_(best)).all()}
+    return [found[translation_id] for translation_id in best if translation_id in found]
+
+def backfill_translation_terms(batch_size=1000):
+    """
+    Index the terms of successful translations that have none yet.
+
+    For translations saved before the term index existed. Needs an app
+    context.
+
+    Args:
+        batch_size (int): Number of translations indexed per transaction.
+
+    Returns:
+        int: Number of translations indexed.
+    """
+    indexed = 0
+    last_id = 0
+    while True:
+        batch = db.session.execute(
+            select(Translation.id, Translation.original_text)
+            .where(Translation.id > last_id, Translation.is_successful.is_(True),
+                   ~select(TranslationTerm.translation_id)
+                   .where(TranslationTerm.translation_id == Translation.id).exists())
+            .order_by(Translation.id)
+            .limit(batch_size)
+        ).all()
+        if not batch:
+            return indexed
+        index_translation_terms(db.session, batch)
+        db.session.commit()
+        indexed += len(batch)
+        last_id = batch[-1][0]
+        logger.debug(f"Indexed terms of {indexed} translations")
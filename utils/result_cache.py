@@ -0,0 +1,125 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from utils.text_to_gloss import RULES_STORE, convert_text_to_gloss, tokenize
+from utils.video_retrieval import get_video_paths, video_change_signal, videos_vary_per_lookup
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of distinct utterances kept in the result cache
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", "1024"))
+
+# Seconds a cached result stays valid even if nothing changes
+RESULT_CACHE_TTL = float(os.environ.get("RESULT_CACHE_TTL", "600"))
+
+class TranslationCache:
+    """
+    LRU cache with expiry mapping normalized text to its gloss and videos.
+
+    Entries are tagged with the translation rules generation and the
+    SignVideo change version; when either moves on, the whole cache is
+    dropped so no lookup can return results computed from stale rules or
+    videos.
+    """
+
+    def __init__(self, max_size=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def normalize(text):
+        """Normalize text the same way the gloss converter tokenizes it."""
+        return " ".join(tokenize(text or ''))
+
+    def _current_generation(self):
+        return (RULES_STORE.generation, video_change_signal.version())
+
+    def _check_generation(self):
+        generation = self._current_generation()
+        if generation != self._generation:
+            if self._entries:
+                self.invalidations += 1
+                logger.info("Rules or videos changed, clearing translation cache")
+            self._entries.clear()
+            self._generation = generation
+
+    def lookup(self, text):
+        """
+        Get the gloss and videos for some text, computing them on a miss.
+
+        Video lookups may query the database, so call this inside an app
+        context. The returned lists are shared with the cache and must not
+        be modified.
+
+        Args:
+            text (str): The recognized English text.
+
+        Returns:
+            tuple: The list of gloss words and the list of video entries.
+        """
+        key = self.normalize(text)
+        now = time.monotonic()
+        with self._lock:
+            self._check_generation()
+            entry = self._entries.get(key)
+            fresh = entry is not None and entry[0] > now
+            if fresh:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            generation = self._generation
+
+        if fresh:
+            # Rotating variants are picked anew on every lookup; the gloss is still reused
+            if videos_vary_per_lookup():
+                return entry[1], get_video_paths(entry[1])
+            return entry[1], entry[2]
+
+        gloss = convert_text_to_gloss(text)
+        video_paths = get_video_paths(gloss)
+
+        with self._lock:
+            # Don't cache a result computed from rules or videos that changed meanwhile
+            self._check_generation()
+            if self._generation != generation:
+                return gloss, video_paths
+            self._entries[key] = (now + self.ttl, gloss, video_paths)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return gloss, video_paths
+
+    def clear(self):
+        """Drop all cached results."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Get the cache size and hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+# Shared by all requests in this process
+translation_cache = TranslationCache()
@@ -0,0 +1,319 @@
+import logging
+import math
+import os
+import re
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import case, delete, func, select, text
+from sqlalchemy.exc import DBAPIError
+
+from models import db, Translation, TranslationDailyRollup, TranslationTerm, UserFeedback
+from utils.search import build_search_index
+
+logger = logging.getLogger(__name__)
+
+# Days raw translations are kept before the retention job removes them; 0 keeps them forever
+TRANSLATION_RETENTION_DAYS = int(os.environ.get("TRANSLATION_RETENTION_DAYS", "365"))
+
+# Monthly partitions created ahead of the current month
+PARTITION_MONTHS_AHEAD = int(os.environ.get("PARTITION_MONTHS_AHEAD", "2"))
+
+# Rows deleted per transaction on databases without partitions
+RETENTION_DELETE_BATCH = int(os.environ.get("RETENTION_DELETE_BATCH", "5000"))
+
+_PARTITION_RE = re.compile(r'^translation_y(\d{4})m(\d{2})$')
+
+# Tables whose rows point at translations; partitioned tables can't be the
+# target of a foreign key on id alone, so these are cleaned up explicitly
+_DEPENDENT_TABLES = (TranslationTerm.__table__, UserFeedback.__table__)
+
+def _add_months(month, count):
+    years, index = divmod(month.month - 1 + count, 12)
+    return date(month.year + years, index + 1, 1)
+
+def _partition_name(month):
+    return f"translation_y{month.year:04d}m{month.month:02d}"
+
+def is_partitioned():
+    """Tell whether the translation table is partitioned by month (PostgreSQL only)."""
+    if db.engine.dialect.name != 'postgresql':
+        return False
+    return db.session.execute(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('translation')")).first() is not None
+
+def _partitions(conn):
+    """Map the first day of each month to the name of its partition."""
+    names = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'translation'::regclass")).scalars()
+    partitions = {}
+    for name in names:
+        match = _PARTITION_RE.match(name)
+        if match:
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+def _create_partition(conn, month):
+    conn.exec_driver_sql(
+        f"CREATE TABLE IF NOT EXISTS {_partition_name(month)} PARTITION OF translation "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')")
+    logger.info(f"Created partition {_partition_name(month)}")
+
+def ensure_partitions(months_ahead=PARTITION_MONTHS_AHEAD):
+    """
+    Create the monthly partitions for this month and the next few.
+
+    Does nothing unless the translation table is partitioned. Rows outside
+    every monthly partition land in ``translation_default``, so this only
+    has to run well before a month starts. Needs an app context.
+
+    Args:
+        months_ahead (int): Number of months after the current one to cover.
+
+    Returns:
+        list: Names of the partitions created.
+    """
+    if not is_partitioned():
+        return []
+    created = []
+    this_month = datetime.utcnow().date().replace(day=1)
+    try:
+        with db.engine.begin() as conn:
+            existing = _partitions(conn)
+            for i in range(months_ahead + 1):
+                month = _add_months(this_month, i)
+                if month not in existing:
+                    _create_partition(conn, month)
+                    created.append(_partition_name(month))
+    except DBAPIError as e:
+        # Another worker creating the same partition, or rows for the month
+        # already in the default partition
+        logger.warning(f"Could not create translation partitions: {str(e)}")
+    return created
+
+def partition_translation_table(months_ahead=PARTITION_MONTHS_AHEAD):
+    """
+    Convert the translation table into one partitioned by month on ``timestamp``.
+
+    One-off, PostgreSQL only. Runs in a single transaction that copies
+    every row, so schedule it for a quiet time. PostgreSQL requires the
+    partition key in every unique key, so the primary key becomes
+    ``(id, timestamp)`` and ``public_id`` is unique together with
+    ``timestamp``, as in the model; foreign keys from older databases are
+    dropped for the same reason. Needs an app context.
+
+    Args:
+        months_ahead (int): Number of months after the current one to cover.
+
+    Returns:
+        int: Number of rows moved, or None if the table was already
+        partitioned.
+
+    Raises:
+        RuntimeError: If the database isn't PostgreSQL.
+    """
+    if db.engine.dialect.name != 'postgresql':
+        raise RuntimeError("Partitioning needs PostgreSQL")
+    if is_partitioned():
+        return None
+    db.session.close()
+
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql("LOCK TABLE translation IN ACCESS EXCLUSIVE MODE")
+        conn.exec_driver_sql("ALTER TABLE translation RENAME TO translation_unpartitioned")
+        foreign_keys = conn.execute(text(
+            "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+            "WHERE contype = 'f' AND confrelid = 'translation_unpartitioned'::regclass")).all()
+        for table, constraint in foreign_keys:
+            conn.exec_driver_sql(f'ALTER TABLE {table} DROP CONSTRAINT "{constraint}"')
+
+        conn.exec_driver_sql(
+            "UPDATE translation_unpartitioned SET \"timestamp\" = now() AT TIME ZONE 'utc' "
+            "WHERE \"timestamp\" IS NULL")
+        conn.exec_driver_sql(
+            "CREATE TABLE translation (LIKE translation_unpartitioned INCLUDING DEFAULTS) "
+            "PARTITION BY RANGE (\"timestamp\")")
+        conn.exec_driver_sql("ALTER TABLE translation ALTER COLUMN \"timestamp\" SET NOT NULL")
+        # Keep the id sequence when the old table is dropped
+        sequence = conn.execute(text(
+            "SELECT pg_get_serial_sequence('translation_unpartitioned', 'id')")).scalar()
+        if sequence:
+            conn.exec_driver_sql(f"ALTER SEQUENCE {sequence} OWNED BY translation.id")
+
+        oldest = conn.execute(text('SELECT min("timestamp") FROM translation_unpartitioned')).scalar()
+        this_month = datetime.utcnow().date().replace(day=1)
+        month = oldest.date().replace(day=1) if oldest else this_month
+        while month <= _add_months(this_month, months_ahead):
+            _create_partition(conn, month)
+            month = _add_months(month, 1)
+        conn.exec_driver_sql("CREATE TABLE translation_default PARTITION OF translation DEFAULT")
+
+        moved = conn.exec_driver_sql(
+            "INSERT INTO translation SELECT * FROM translation_unpartitioned").rowcount
+        conn.exec_driver_sql("DROP TABLE translation_unpartitioned")
+
+        # Indexes are built after the copy, which is much faster than
+        # maintaining them row by row; the names match the models
+        conn.exec_driver_sql("ALTER TABLE translation ADD PRIMARY KEY (id, \"timestamp\")")
+        conn.exec_driver_sql('CREATE INDEX ix_translation_timestamp_id ON translation ("timestamp", id)')
+        conn.exec_driver_sql('CREATE UNIQUE INDEX ix_translation_public_id ON translation (public_id, "timestamp")')
+    logger.info(f"Partitioned the translation table, moved {moved} rows")
+    build_search_index()
+    return moved
+
+def _delete_dependents(conn, translation_ids):
+    for table in _DEPENDENT_TABLES:
+        conn.execute(delete(table).where(table.c.translation_id.in_(translation_ids)))
+
+def expire_translations(retention_days=TRANSLATION_RETENTION_DAYS):
+    """
+    Remove translations older than the retention period.
+
+    On a partitioned table whole monthly partitions are dropped once every
+    row in them has expired, so no row-by-row DELETE runs against the
+    translations themselves. Elsewhere expired rows are deleted in small
+    batches to keep each transaction short. Feedback and word postings of
+    the removed translations go with them. Run ``compute_daily_rollups``
+    first so the daily figures survive. Needs an app context.
+
+    Args:
+        retention_days (int): Age in days beyond which rows are removed;
+            0 keeps everything.
+
+    Returns:
+        int: Number of partitions dropped when partitioned, otherwise the
+        number of rows deleted.
+    """
+    if retention_days <= 0:
+        return 0
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+
+    if is_partitioned():
+        dropped = 0
+        with db.engine.connect() as conn:
+            expired = [(month, name) for month, name in _partitions(conn).items()
+                       if _add_months(month, 1) <= cutoff.date()]
+        for month, name in sorted(expired):
+            with db.engine.begin() as conn:
+                conn.exec_driver_sql(f"ALTER TABLE translation DETACH PARTITION {name}")
+                for table in _DEPENDENT_TABLES:
+                    conn.exec_driver_sql(
+                        f"DELETE FROM {table.name} WHERE translation_id IN (SELECT id FROM {name})")
+                conn.exec_driver_sql(f"DROP TABLE {name}")
+            logger.info(f"Dropped translation partition {name}")
+            dropped += 1
+        return dropped
+
+    deleted = 0
+    while True:
+        with db.engine.begin() as conn:
+            ids = conn.execute(
+                select(Translation.id).where(Translation.timestamp < cutoff)
+                .order_by(Translation.timestamp).limit(RETENTION_DELETE_BATCH)).scalars().all()
+            if not ids:
+                return deleted
+            _delete_dependents(conn, ids)
+            conn.execute(delete(Translation.__table__).where(Translation.id.in_(ids)))
+        deleted += len(ids)
+        logger.debug(f"Deleted {deleted} expired translations")
+
+def _day_bounds(day):
+    start = datetime.combine(day, datetime.min.time())
+    return start, start + timedelta(days=1)
+
+def _percentile(times_query, count, fraction):
+    """Read a percentile from an ordered query, without loading the rows."""
+    if not count:
+        return None
+    # Nearest-rank percentile
+    offset = max(0, math.ceil(count * fraction) - 1)
+    return db.session.execute(times_query.offset(offset).limit(1)).scalar()
+
+def compute_daily_rollups(since=None):
+    """
+    Recompute the per-day translation rollups.
+
+    Each day is read through the ``(timestamp, id)`` index, and the
+    rollups are upserted so this can run as often as needed. Without
+    ``since`` it starts from the day before the latest rollup, so the
+    last, possibly incomplete, days are refreshed. Needs an app context.
+
+    Args:
+        since (date): First day to recompute.
+
+    Returns:
+        int: Number of days written.
+    """
+    if since is None:
+        latest = db.session.execute(select(func.max(TranslationDailyRollup.day))).scalar()
+        if latest is not None:
+            since = latest - timedelta(days=1)
+        else:
+            oldest = db.session.execute(select(func.min(Translation.timestamp))).scalar()
+            if oldest is None:
+                return 0
+            since = oldest.date()
+
+    today = datetime.utcnow().date()
+    written = 0
+    day = since
+    while day <= today:
+        start, end = _day_bounds(day)
+        in_day = (Translation.timestamp >= start, Translation.timestamp < end)
+        total, successful = db.session.execute(
+            select(func.count(), func.count().filter(Translation.is_successful.is_(True)))
+            .where(*in_day)).one()
+        timed = (*in_day, Translation.is_successful.is_(True), Translation.translation_time.isnot(None))
+        if db.engine.dialect.name == 'postgresql':
+            mean_time, p95_time = db.session.execute(
+                select(func.avg(Translation.translation_time),
+                       func.percentile_cont(0.95).within_group(Translation.translation_time))
+                .where(*timed)).one()
+        else:
+            mean_time, timed_count = db.session.execute(
+                select(func.avg(Translation.translation_time), func.count())
+                .where(*timed)).one()
+            p95_time = _percentile(
+                select(Translation.translation_time).where(*timed)
+                .order_by(Translation.translation_time),
+                timed_count, 0.95)
+
+        if total:
+            db.session.merge(TranslationDailyRollup(
+                day=day, total=total, successful=successful,
+                mean_time=float(mean_time) if mean_time is not None else None,
+                p95_time=float(p95_time) if p95_time is not None else None))
+            written += 1
+        db.session.commit()
+        day += timedelta(days=1)
+    return written
+
+def migrate_error_messages(batch_size=RETENTION_DELETE_BATCH):
+    """
+    Move the errors that older versions stored as text into ``error_message``.
+
+    Failed translations used to keep "Error: ..." or "Unknown" in
+    ``original_text``. Needs an app context.
+
+    Args:
+        batch_size (int): Number of rows updated per transaction.
+
+    Returns:
+        int: Number of translations updated.
+    """
+    table = Translation.__table__
+    migrated = 0
+    while True:
+        ids = db.session.execute(
+            select(table.c.id)
+            .where(table.c.is_successful.is_(False), table.c.error_message.is_(None),
+                   table.c.original_text.like('Error: %') | (table.c.original_text == 'Unknown'))
+            .limit(batch_size)).scalars().all()
+        if not ids:
+            return migrated
+        db.session.execute(table.update().where(table.c.id.in_(ids)).values(
+            error_message=case((table.c.original_text == 'Unknown', 'Speech not recognized'),
+                               else_=func.substr(table.c.original_text, len('Error: ') + 1)),
+            original_text=''))
+        db.session.commit()
+        migrated += len(ids)
@@ -0,0 +1,234 @@
+import logging
+import os
+import re
+
+from sqlalchemy import Float, Integer, func, literal_column, text
+from sqlalchemy.exc import DBAPIError
+
+from models import db, Translation
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL text search configuration; 'english' stems words, 'simple' doesn't
+SEARCH_TS_CONFIG = os.environ.get("SEARCH_TS_CONFIG", "english")
+if not re.fullmatch(r"\w+", SEARCH_TS_CONFIG):
+    raise ValueError(f"Invalid SEARCH_TS_CONFIG: {SEARCH_TS_CONFIG!r}")
+
+# Largest number of results the search API returns at once
+SEARCH_MAX_RESULTS = int(os.environ.get("SEARCH_MAX_RESULTS", "100"))
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+# Set by init_search: 'tsvector', 'fts5' or 'like'
+_search_backend = None
+
+# The searchable text of a translation on PostgreSQL. Queries must use this
+# exact expression for the planner to pick the GIN index built on it.
+_DOCUMENT_SQL = (f"to_tsvector('{SEARCH_TS_CONFIG}', "
+                 f"coalesce(original_text, '') || ' ' || coalesce(gloss_text, ''))")
+
+def _document():
+    return literal_column(_DOCUMENT_SQL)
+
+def _fts5_query(term):
+    """Turn free text into an FTS5 query matching every word as a prefix."""
+    words = _TERM_RE.findall(term)
+    return " ".join(f'"{word}"*' for word in words)
+
+def _create_fts5(conn):
+    """
+    Create the SQLite FTS5 index over translations and the triggers maintaining it.
+
+    Returns:
+        bool: Whether the index was created, False if it already existed.
+    """
+    exists = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'translation_fts'").first()
+    if exists:
+        return False
+    # IF NOT EXISTS because every worker runs this at boot
+    conn.exec_driver_sql("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS translation_fts USING fts5(
+            original_text, gloss_text,
+            content='translation', content_rowid='id', tokenize='porter unicode61'
+        )
+    """)
+    conn.exec_driver_sql("""
+        CREATE TRIGGER IF NOT EXISTS translation_fts_insert AFTER INSERT ON translation BEGIN
+            INSERT INTO translation_fts (rowid, original_text, gloss_text)
+            VALUES (new.id, new.original_text, new.gloss_text);
+        END
+    """)
+    conn.exec_driver_sql("""
+        CREATE TRIGGER IF NOT EXISTS translation_fts_delete AFTER DELETE ON translation BEGIN
+            INSERT INTO translation_fts (translation_fts, rowid, original_text, gloss_text)
+            VALUES ('delete', old.id, old.original_text, old.gloss_text);
+        END
+    """)
+    conn.exec_driver_sql("""
+        CREATE TRIGGER IF NOT EXISTS translation_fts_update AFTER UPDATE OF original_text, gloss_text ON translation BEGIN
+            INSERT INTO translation_fts (translation_fts, rowid, original_text, gloss_text)
+            VALUES ('delete', old.id, old.original_text, old.gloss_text);
+            INSERT INTO translation_fts (rowid, original_text, gloss_text)
+            VALUES (new.id, new.original_text, new.gloss_text);
+        END
+    """)
+    # Index the rows that existed before the triggers
+    conn.exec_driver_sql("INSERT INTO translation_fts (translation_fts) VALUES ('rebuild')")
+    logger.info("Created the translation full-text index")
+    return True
+
+def _search_index_valid(conn):
+    """
+    Check the PostgreSQL GIN index over translations.
+
+    Returns:
+        bool: True if the index is usable, False if a failed or interrupted
+        build left it invalid, None if it doesn't exist.
+    """
+    return conn.exec_driver_sql(
+        "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass('ix_translation_search')").scalar()
+
+def init_search():
+    """
+    Choose the search backend for the database in use.
+
+    PostgreSQL always searches ``tsvector`` documents; its GIN index is
+    built by ``build_search_index`` (scripts/build_search_index.py), never
+    at boot, where every worker would race to build it and a killed build
+    would leave an invalid index behind. Without a valid index searches
+    still work, just by scanning, and a warning is logged. SQLite gets its
+    FTS5 table here, which is cheap to create; builds without FTS5, and
+    other databases, fall back to unindexed substring search. Needs an app
+    context.
+
+    Returns:
+        str: The search backend in use: 'tsvector', 'fts5' or 'like'.
+    """
+    global _search_backend
+    dialect = db.engine.dialect.name
+    backend = 'like'
+    if dialect == 'postgresql':
+        backend = 'tsvector'
+        with db.engine.connect() as conn:
+            valid = _search_index_valid(conn)
+        if not valid:
+            logger.warning("The translation search index is missing or invalid, searches will scan "
+                           "the table; run scripts/build_search_index.py")
+    elif dialect == 'sqlite':
+        try:
+            with db.engine.begin() as conn:
+                _create_fts5(conn)
+            backend = 'fts5'
+        except DBAPIError as e:
+            logger.warning(f"Full-text index unavailable, using substring search: {str(e)}")
+    _search_backend = backend
+    return backend
+
+def build_search_index():
+    """
+    Build the full-text index over translations if there is no valid one.
+
+    On PostgreSQL an invalid index left by an interrupted build is dropped
+    first. The GIN index is built concurrently so the table stays writable
+    meanwhile, except on a partitioned table, which doesn't support that.
+    Needs an app context.
+
+    Returns:
+        bool: Whether an index was built.
+    """
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        with db.engine.begin() as conn:
+            return _create_fts5(conn)
+    if dialect != 'postgresql':
+        return False
+
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        valid = _search_index_valid(conn)
+        if valid:
+            return False
+        relkind = conn.exec_driver_sql(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass('translation')").scalar()
+        concurrently = '' if relkind == 'p' else 'CONCURRENTLY '
+        if valid is False:
+            logger.warning("Dropping the invalid translation search index")
+            conn.exec_driver_sql(f"DROP INDEX {concurrently}IF EXISTS ix_translation_search")
+        conn.exec_driver_sql(f"CREATE INDEX {concurrently}ix_translation_search "
+                             f"ON translation USING gin ({_DOCUMENT_SQL})")
+    logger.info("Built the translation search index")
+    return True
+
+def _backend():
+    if _search_backend is None:
+        return init_search()
+    return _search_backend
+
+def search_filter(term):
+    """
+    Get a filter criterion matching translations that contain a search term.
+
+    Uses the full-text index where there is one, so it can be combined
+    with any ordering (e.g. newest first) without scanning the table.
+
+    Args:
+        term (str): Free text typed by the user.
+
+    Returns:
+        The SQLAlchemy criterion, to pass to ``Query.filter``.
+    """
+    backend = _backend()
+    if backend == 'tsvector':
+        return _document().op('@@')(func.websearch_to_tsquery(
+            literal_column(f"'{SEARCH_TS_CONFIG}'"), term))
+    if backend == 'fts5':
+        matches = text("SELECT rowid FROM translation_fts WHERE translation_fts MATCH :query")
+        return Translation.id.in_(matches.bindparams(query=_fts5_query(term) or '""'))
+    return (Translation.original_text.ilike(f'%{term}%') |
+            Translation.gloss_text.ilike(f'%{term}%'))
+
+def search_translations(term, limit=20):
+    """
+    Find the translations best matching a search term.
+
+    Results are ranked by relevance (``ts_rank_cd`` on PostgreSQL, BM25 on
+    SQLite), newest first among equals. The substring fallback can't rank
+    and returns the newest matches.
+
+    Args:
+        term (str): Free text typed by the user.
+        limit (int): Maximum number of results.
+
+    Returns:
+        list: ``(Translation, score)`` tuples, best first; higher scores are
+        better and the fallback scores everything 0.
+    """
+    limit = max(1, min(limit, SEARCH_MAX_RESULTS))
+    backend = _backend()
+    if backend == 'tsvector':
+        query = func.websearch_to_tsquery(literal_column(f"'{SEARCH_TS_CONFIG}'"), term)
+        score = func.ts_rank_cd(_document(), query)
+        rows = (db.session.query(Translation, score)
+                .filter(_document().op('@@')(query))
+                .order_by(score.desc(), Translation.timestamp.desc())
+                .limit(limit).all())
+        return [(translation, float(rank)) for translation, rank in rows]
+
+    if backend == 'fts5':
+        fts_query = _fts5_query(term)
+        if not fts_query:
+            return []
+        # bm25() is lower for better matches, so negate it into a score
+        matches = text(
+            "SELECT rowid AS id, -bm25(translation_fts) AS score FROM translation_fts "
+            "WHERE translation_fts MATCH :query"
+        ).bindparams(query=fts_query).columns(id=Integer, score=Float).subquery()
+        rows = (db.session.query(Translation, matches.c.score)
+                .join(matches, matches.c.id == Translation.id)
+                .order_by(matches.c.score.desc(), Translation.timestamp.desc())
+                .limit(limit).all())
+        return [(translation, float(rank)) for translation, rank in rows]
+
+    rows = (Translation.query.filter(search_filter(term))
+            .order_by(Translation.timestamp.desc()).limit(limit).all())
+    return [(translation, 0.0) for translation in rows]
@@ -1,8 +1,25 @@
+import io
 import os
-import logging
-import tempfile
-import subprocess
 import json
+import logging
+import threading
+
+from utils.transcoder import transcoder_pool, StreamDecoder, TranscoderBusy
+from utils.audio_cache import audio_cache, content_key, AUDIO_CACHE_ENABLED
+
+# PyAV decodes compressed uploads (webm/ogg/mp4) in memory when installed
+try:
+    import av
+    PYAV_AVAILABLE = True
+except ImportError:
+    PYAV_AVAILABLE = False
+
+# Vosk provides offline recognition when installed
+try:
+    import vosk
+    VOSK_AVAILABLE = True
+except ImportError:
+    VOSK_AVAILABLE = False
 
 # Import speech_recognition with error handling
 try:
@@ -49,101 +66,449 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
-def convert_speech_to_text(audio_file):
+# Sample rate and width of the PCM handed to the recognizer
+TARGET_SAMPLE_RATE = 16000
+TARGET_SAMPLE_WIDTH = 2
+
+# Recognition backend to use: 'google', 'vosk' (offline) or 'stub' (load testing)
+SPEECH_BACKEND = os.environ.get("SPEECH_BACKEND", "google")
+
+# Directory containing the Vosk model used by the offline backend
+VOSK_MODEL_PATH = os.environ.get("VOSK_MODEL_PATH", "models/vosk")
+
+# Fixed transcript returned by the stub backend
+STUB_TRANSCRIPT = os.environ.get("STUB_TRANSCRIPT", "are you free today")
+
+# Upload MIME types carrying headerless 16-bit little-endian PCM
+RAW_PCM_MIME_TYPES = {'audio/l16', 'audio/pcm', 'audio/x-pcm', 'audio/s16le'}
+
+# Most seconds of audio sent per partial result by backends that can't recognize incrementally
+PARTIAL_WINDOW_SECONDS = float(os.environ.get("PARTIAL_WINDOW_SECONDS", "8"))
+
+def _is_container_readable_by_recognizer(audio_bytes):
+    """Check for WAV, AIFF or FLAC headers, which sr.AudioFile reads directly."""
+    header = audio_bytes[:12]
+    return ((header[:4] == b'RIFF' and header[8:12] == b'WAVE')
+            or (header[:4] == b'FORM' and header[8:12] in (b'AIFF', b'AIFC'))
+            or header[:4] == b'fLaC')
+
+def _decode_with_recognizer(audio_bytes):
+    """Read a WAV/AIFF/FLAC upload straight from memory."""
+    with sr.AudioFile(io.BytesIO(audio_bytes)) as source:
+        return sr.Recognizer().record(source)
+
+def _decode_with_pyav(audio_bytes):
+    """Decode a compressed upload in memory to 16 kHz mono PCM using PyAV."""
+    resampler = av.AudioResampler(format='s16', layout='mono', rate=TARGET_SAMPLE_RATE)
+    pcm = bytearray()
+    with av.open(io.BytesIO(audio_bytes), mode='r') as container:
+        for frame in container.decode(audio=0):
+            for resampled in resampler.resample(frame):
+                pcm.extend(resampled.to_ndarray().tobytes())
+    for resampled in resampler.resample(None):
+        pcm.extend(resampled.to_ndarray().tobytes())
+    return sr.AudioData(bytes(pcm), TARGET_SAMPLE_RATE, TARGET_SAMPLE_WIDTH)
+
+def _decode_with_ffmpeg(audio_bytes, input_args=()):
+    """Convert an upload to 16 kHz mono PCM using the shared ffmpeg pool."""
+    pcm = transcoder_pool.transcode(audio_bytes, input_args)
+    if not pcm:
+        raise ValueError("ffmpeg produced no audio")
+    return sr.AudioData(pcm, TARGET_SAMPLE_RATE, TARGET_SAMPLE_WIDTH)
+
+def decode_audio(audio_bytes, mimetype=None, mimetype_params=None):
     """
-    Convert speech in audio file to text using speech recognition.
+    Decode uploaded audio into PCM for the recognizer, in memory.
+    
+    WAV/AIFF/FLAC uploads and raw 16-bit mono PCM (``audio/l16`` with a
+    ``rate`` parameter) are used as-is with no conversion. Other formats
+    are decoded with PyAV when it is installed, with ffmpeg over
+    stdin/stdout kept as the fallback for anything else.
     
     Args:
-        audio_file: The audio file from the request.
+        audio_bytes (bytes): The uploaded audio.
+        mimetype (str): The upload's MIME type, if known.
+        mimetype_params (dict): MIME type parameters such as ``rate``.
         
     Returns:
-        str: The recognized text from the audio.
+        sr.AudioData: The decoded audio.
+    """
+    if not audio_bytes:
+        raise ValueError("Empty audio upload")
+    
+    mimetype = (mimetype or '').lower()
+    mimetype_params = mimetype_params or {}
+    
+    if mimetype in RAW_PCM_MIME_TYPES:
+        rate = int(mimetype_params.get('rate', TARGET_SAMPLE_RATE))
+        channels = int(mimetype_params.get('channels', 1))
+        if channels == 1:
+            logger.debug(f"Using raw PCM upload directly at {rate} Hz")
+            return sr.AudioData(audio_bytes, rate, TARGET_SAMPLE_WIDTH)
+        # Let ffmpeg downmix multi-channel PCM
+        return _decode_with_ffmpeg(audio_bytes, ('-f', 's16le', '-ar', str(rate),
+                                                 '-ac', str(channels)))
+    
+    if _is_container_readable_by_recognizer(audio_bytes):
+        logger.debug("Reading WAV/AIFF/FLAC upload directly from memory")
+        return _decode_with_recognizer(audio_bytes)
+    
+    if PYAV_AVAILABLE:
+        try:
+            logger.debug("Decoding upload in memory with PyAV")
+            return _decode_with_pyav(audio_bytes)
+        except Exception as e:
+            logger.warning(f"PyAV could not decode audio: {str(e)}. Falling back to ffmpeg.")
+    
+    logger.debug("Decoding upload with ffmpeg")
+    return _decode_with_ffmpeg(audio_bytes)
+
+class RecognitionBackend:
     """
-    input_filename = None
-    output_filename = None
+    Base class for speech recognition engines.
     
+    ``load()`` is called once per worker process, so engines should do all
+    expensive setup (loading models, opening sessions) there and share the
+    result across requests.
+    """
+    
+    name = None
+    
+    # Whether recognize() needs the upload decoded to PCM first
+    needs_audio = True
+    
+    def load(self):
+        """Load any models or resources the backend needs."""
+    
+    def open_stream(self):
+        """
+        Start incremental recognition of one utterance.
+        
+        Returns:
+            An object with ``accept(pcm)`` taking only the new 16 kHz mono
+            16-bit PCM and ``text()`` returning the transcript so far, or
+            None if the engine can only recognize whole clips.
+        """
+        return None
+    
+    def recognize(self, audio_data):
+        """
+        Recognize speech in decoded audio.
+        
+        Args:
+            audio_data (sr.AudioData): The decoded audio.
+            
+        Returns:
+            tuple: The recognized text and a confidence between 0 and 1 (or None).
+            
+        Raises:
+            sr.UnknownValueError: If no speech could be recognized.
+            sr.RequestError: If the engine could not be reached.
+        """
+        raise NotImplementedError
+
+class GoogleBackend(RecognitionBackend):
+    """Online recognition through the Google Web Speech API."""
+    
+    name = 'google'
+    
+    def load(self):
+        self.recognizer = sr.Recognizer()
+    
+    def recognize(self, audio_data):
+        result = self.recognizer.recognize_google(audio_data, show_all=True)
+        if not result or not result.get('alternative'):
+            raise sr.UnknownValueError()
+        best = result['alternative'][0]
+        return best['transcript'], best.get('confidence')
+
+class VoskBackend(RecognitionBackend):
+    """Offline recognition with a local Vosk model kept in memory."""
+    
+    name = 'vosk'
+    
+    def load(self):
+        if not VOSK_AVAILABLE:
+            raise RuntimeError("The vosk package is required for the offline backend")
+        vosk.SetLogLevel(-1)
+        logger.info(f"Loading Vosk model from {VOSK_MODEL_PATH}")
+        self.model = vosk.Model(VOSK_MODEL_PATH)
+    
+    def open_stream(self):
+        return _VoskStream(self.model)
+    
+    def recognize(self, audio_data):
+        # Recognizers are cheap and hold per-utterance state; the model is shared
+        recognizer = vosk.KaldiRecognizer(self.model, TARGET_SAMPLE_RATE)
+        recognizer.SetWords(True)
+        recognizer.AcceptWaveform(audio_data.get_raw_data(convert_rate=TARGET_SAMPLE_RATE,
+                                                          convert_width=TARGET_SAMPLE_WIDTH))
+        result = json.loads(recognizer.FinalResult())
+        text = result.get('text', '').strip()
+        if not text:
+            raise sr.UnknownValueError()
+        words = result.get('result') or []
+        confidence = sum(w['conf'] for w in words) / len(words) if words else None
+        return text, confidence
+
+class _VoskStream:
+    """One Kaldi recognizer fed a growing utterance chunk by chunk."""
+    
+    def __init__(self, model):
+        self.recognizer = vosk.KaldiRecognizer(model, TARGET_SAMPLE_RATE)
+        self.segments = []
+    
+    def accept(self, pcm):
+        # True once Vosk has finalized a segment at a pause
+        if pcm and self.recognizer.AcceptWaveform(pcm):
+            text = json.loads(self.recognizer.Result()).get('text', '').strip()
+            if text:
+                self.segments.append(text)
+    
+    def text(self):
+        partial = json.loads(self.recognizer.PartialResult()).get('partial', '').strip()
+        return ' '.join(self.segments + ([partial] if partial else []))
+
+class StubBackend(RecognitionBackend):
+    """Deterministic backend for load tests; always returns STUB_TRANSCRIPT."""
+    
+    name = 'stub'
+    needs_audio = False
+    
+    def recognize(self, audio_data):
+        return STUB_TRANSCRIPT, 1.0
+
+RECOGNITION_BACKENDS = {
+    backend.name: backend for backend in (GoogleBackend, VoskBackend, StubBackend)
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    """
+    Get the configured recognition backend, loading it on first use.
+    
+    Returns:
+        RecognitionBackend: The shared backend instance for this process.
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if SPEECH_BACKEND not in RECOGNITION_BACKENDS:
+                    raise ValueError(f"Unknown speech backend '{SPEECH_BACKEND}'")
+                backend = RECOGNITION_BACKENDS[SPEECH_BACKEND]()
+                backend.load()
+                logger.info(f"Loaded '{backend.name}' speech recognition backend")
+                _backend = backend
+    return _backend
+
+def preload_backend():
+    """Load the recognition backend at worker start instead of on the first request."""
+    if not SPEECH_RECOGNITION_AVAILABLE and SPEECH_BACKEND != StubBackend.name:
+        return
     try:
+        get_backend()
+    except Exception as e:
+        logger.error(f"Could not load speech backend '{SPEECH_BACKEND}': {str(e)}")
+
+def recognize_bytes(audio_bytes, mimetype=None, mimetype_params=None, use_cache=True):
+    """
+    Recognize speech in raw uploaded bytes with the configured backend.
+    
+    Unlike ``recognize_audio`` this does not swallow errors, which suits
+    callers such as streaming partial recognition that just skip a failed
+    attempt.
+    
+    Uploads seen before are answered from the audio transcript cache by
+    their content hash, without decoding or calling the recognizer.
+    
+    Args:
+        audio_bytes (bytes): The uploaded audio.
+        mimetype (str): The upload's MIME type, if known.
+        mimetype_params (dict): MIME type parameters such as ``rate``.
+        use_cache (bool): Whether to consult and fill the transcript cache.
+        
+    Returns:
+        tuple: The recognized text and confidence (or None).
+    """
+    backend = get_backend()
+    use_cache = use_cache and AUDIO_CACHE_ENABLED
+    
+    cache_key = None
+    if use_cache:
+        cache_key = content_key(audio_bytes, backend.name)
+        cached = audio_cache.get(cache_key)
+        if cached:
+            logger.debug(f"Using cached transcript for identical audio: {cached[0]}")
+            return cached
+    
+    audio_data = None
+    if backend.needs_audio:
         if not SPEECH_RECOGNITION_AVAILABLE:
-            logger.warning("SpeechRecognition not available. Using dummy text.")
-            return "This is placeholder text since speech recognition is not available"
-            
-        recognizer = sr.Recognizer()
+            raise RuntimeError("SpeechRecognition is not available")
+        # Decode the upload in memory; nothing is written to disk
+        logger.debug(f"Decoding {len(audio_bytes)} bytes of audio")
+        audio_data = decode_audio(audio_bytes, mimetype, mimetype_params)
+    
+    logger.debug(f"Recognizing speech with the '{backend.name}' backend")
+    text, confidence = backend.recognize(audio_data)
+    logger.debug(f"Recognized text: {text} (confidence: {confidence})")
+    
+    if use_cache and text:
+        audio_cache.put([cache_key], text, confidence)
+    return text, confidence
+
+class StreamingRecognizer:
+    """
+    Partial recognition of an utterance that is still being recorded.
+    
+    Call ``recognize`` with the whole buffer received so far. Compressed
+    recordings (webm/opus, ogg) go through a ``StreamDecoder`` kept for the
+    utterance, which is fed only the bytes added since the last call; raw
+    PCM and WAV/FLAC need no real decoding and are converted whole.
+    
+    Backends with incremental recognition (Vosk) keep one recognizer for
+    the utterance and are fed only the new PCM. Others are sent the audio
+    since the last frozen point; once that would exceed
+    ``PARTIAL_WINDOW_SECONDS``, the text last recognized for it is frozen
+    as a prefix and the window starts where it ended. The work per partial
+    result stays bounded however long the recording grows, and earlier
+    words don't drop out of the partial text. Call ``close`` when the
+    utterance ends.
+    """
+    
+    def __init__(self, mimetype=None, mimetype_params=None, window=PARTIAL_WINDOW_SECONDS):
+        self.mimetype = mimetype
+        self.mimetype_params = mimetype_params
+        self.backend = get_backend()
+        self.stream = self.backend.open_stream()
+        self.window_bytes = int(window * TARGET_SAMPLE_RATE) * TARGET_SAMPLE_WIDTH
+        self.fed = 0
+        self.decoder = None
+        self.received = 0
+        self.pcm = b''
+        # Text of the audio before ``committed`` (a PCM offset), no longer re-recognized
+        self.committed_text = ''
+        self.committed = 0
+        # Latest text of the audio from ``committed`` up to ``tail_end``
+        self.tail_text = ''
+        self.tail_end = 0
+    
+    def _decode(self, audio_bytes):
+        """Decode the audio received since the last call; returns the PCM length so far."""
+        if self.decoder is None and self.received == 0:
+            mimetype = (self.mimetype or '').lower()
+            if not (mimetype in RAW_PCM_MIME_TYPES
+                    or _is_container_readable_by_recognizer(audio_bytes)):
+                try:
+                    self.decoder = StreamDecoder(TARGET_SAMPLE_RATE)
+                except OSError as e:
+                    logger.warning(f"Could not start a stream decoder, decoding in full: {str(e)}")
         
-        # Save the uploaded file to a temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.webm') as temp_input:
-            audio_file.save(temp_input.name)
-            input_filename = temp_input.name
-            logger.debug(f"Saved audio to temporary file: {input_filename}")
+        if self.decoder is not None:
+            decoded = self.decoder.feed(audio_bytes[self.received:])
+            self.received = len(audio_bytes)
+            return decoded
+        
+        self.received = len(audio_bytes)
+        audio_data = decode_audio(audio_bytes, self.mimetype, self.mimetype_params)
+        self.pcm = audio_data.get_raw_data(convert_rate=TARGET_SAMPLE_RATE,
+                                           convert_width=TARGET_SAMPLE_WIDTH)
+        return len(self.pcm)
+    
+    def _read(self, start):
+        if self.decoder is not None:
+            return self.decoder.read(start)
+        return self.pcm[start:]
+    
+    def recognize(self, audio_bytes):
+        """
+        Recognize the utterance so far.
+        
+        Args:
+            audio_bytes (bytes): Everything received for the utterance.
             
-        # Create a temporary WAV file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_output:
-            output_filename = temp_output.name
+        Returns:
+            str: The partial transcript (may be empty).
+        """
+        if not self.backend.needs_audio:
+            return self.backend.recognize(None)[0]
+        if not SPEECH_RECOGNITION_AVAILABLE:
+            raise RuntimeError("SpeechRecognition is not available")
+        
+        decoded = self._decode(audio_bytes)
+        if self.stream is not None:
+            pcm = self._read(self.fed)
+            self.stream.accept(pcm)
+            self.fed += len(pcm)
+            return self.stream.text()
         
-        # Set default temp_filename to input_filename in case conversion fails
-        temp_filename = input_filename
+        if decoded - self.committed > self.window_bytes and self.tail_end > self.committed:
+            # Freeze the window's text rather than let its words slide out
+            self.committed_text = ' '.join(filter(None, [self.committed_text, self.tail_text]))
+            self.committed = self.tail_end
         
-        # Convert audio to WAV format using ffmpeg if available
+        window = self._read(self.committed)
         try:
-            logger.debug(f"Converting audio file to WAV format")
-            # Try to convert using ffmpeg - if not available will go to except block
-            cmd = ['ffmpeg', '-y', '-i', input_filename, '-ar', '16000', '-ac', '1', output_filename]
-            logger.debug(f"Running command: {' '.join(cmd)}")
-            
-            # Use a shorter timeout to avoid hanging
-            result = subprocess.run(cmd, check=True, capture_output=True, timeout=10)
-            
-            # Process was successful, use the output file
-            temp_filename = output_filename
-            logger.debug(f"Converted to WAV format successfully at {temp_filename}")
-            
-            # Check if the output file exists and has content
-            if os.path.exists(temp_filename) and os.path.getsize(temp_filename) > 0:
-                logger.debug(f"WAV file exists and has size: {os.path.getsize(temp_filename)} bytes")
-            else:
-                logger.error(f"WAV file doesn't exist or is empty: {temp_filename}")
-                # Use original file instead of raising exception
-                temp_filename = input_filename
-                
-        except Exception as e:
-            logger.warning(f"Couldn't convert with ffmpeg: {str(e)}. Using direct file.")
-            # temp_filename is already set to input_filename
-            
-        # Use the audio file as the source for recognition
-        logger.debug(f"Starting speech recognition on file: {temp_filename}")
-        with sr.AudioFile(temp_filename) as source:
-            # Adjust for ambient noise and record the audio
-            logger.debug("Adjusting for ambient noise")
-            recognizer.adjust_for_ambient_noise(source)
-            
-            logger.debug("Recording audio data")
-            audio_data = recognizer.record(source)
-            
-            # Use Google's speech recognition
-            logger.debug("Sending to Google Speech Recognition")
-            text = recognizer.recognize_google(audio_data)
-            logger.debug(f"Recognized text: {text}")
-            
-            # Return the recognized text
-            return text
+            text, _ = self.backend.recognize(
+                sr.AudioData(window, TARGET_SAMPLE_RATE, TARGET_SAMPLE_WIDTH))
+        except sr.UnknownValueError:
+            text = ''
+        self.tail_text = text
+        self.tail_end = self.committed + len(window)
+        return ' '.join(filter(None, [self.committed_text, text]))
+    
+    def close(self):
+        """Stop the stream decoder, if one was started."""
+        if self.decoder is not None:
+            self.decoder.close()
+            self.decoder = None
+
+def recognize_audio(audio_file):
+    """
+    Recognize speech in an uploaded audio file.
+    
+    Args:
+        audio_file: The audio file from the request.
+        
+    Returns:
+        tuple: The recognized text (None if nothing was recognized) and the
+        recognition confidence (None if the backend does not report one).
+    """
+    try:
+        if not SPEECH_RECOGNITION_AVAILABLE and SPEECH_BACKEND != StubBackend.name:
+            logger.warning("SpeechRecognition not available. Using dummy text.")
+            return "This is placeholder text since speech recognition is not available", None
+        
+        return recognize_bytes(audio_file.read(),
+                               getattr(audio_file, 'mimetype', None),
+                               getattr(audio_file, 'mimetype_params', None))
             
     except sr.UnknownValueError:
         logger.error("Speech Recognition could not understand the audio")
-        return None
+        return None, None
     except sr.RequestError as e:
         logger.error(f"Could not request results from Speech Recognition service: {e}")
-        return None
+        return None, None
+    except TranscoderBusy:
+        # Let the caller shed load rather than report a recognition failure
+        raise
     except Exception as e:
         logger.error(f"Error in speech-to-text conversion: {str(e)}")
         # For debugging, return a message instead of None
-        return f"I couldn't understand that. Error: {str(e)}"
-    finally:
-        # Clean up the temporary files
-        try:
-            if input_filename and os.path.exists(input_filename):
-                os.unlink(input_filename)
-                logger.debug(f"Removed temporary input file: {input_filename}")
-            if output_filename and os.path.exists(output_filename):
-                os.unlink(output_filename)
-                logger.debug(f"Removed temporary output file: {output_filename}")
-        except Exception as e:
-            logger.warning(f"Error cleaning up temporary files: {str(e)}")
+        return f"I couldn't understand that. Error: {str(e)}", None
+
+def convert_speech_to_text(audio_file):
+    """
+    Convert speech in audio file to text using speech recognition.
+    
+    Args:
+        audio_file: The audio file from the request.
+        
+    Returns:
+        str: The recognized text from the audio.
+    """
+    text, _ = recognize_audio(audio_file)
+    return text
@@ -0,0 +1,231 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Number of background workers running partial recognitions in each process
+STREAM_WORKERS = int(os.environ.get("STREAM_WORKERS", "2"))
+
+# Maximum number of open streaming sessions per process
+STREAM_MAX_SESSIONS = int(os.environ.get("STREAM_MAX_SESSIONS", "32"))
+
+# Minimum number of seconds between partial recognitions of one session
+STREAM_PARTIAL_INTERVAL = float(os.environ.get("STREAM_PARTIAL_INTERVAL", "1.0"))
+
+# Seconds after the last activity before an abandoned session is dropped
+STREAM_IDLE_TIMEOUT = float(os.environ.get("STREAM_IDLE_TIMEOUT", "120"))
+
+# Largest audio buffer (in bytes) accepted for a single session
+STREAM_MAX_BYTES = int(os.environ.get("STREAM_MAX_BYTES", str(10 * 1024 * 1024)))
+
+class StreamLimitExceeded(Exception):
+    """Raised when a session or the process has no room for more audio."""
+
+class StreamSession:
+    """
+    Audio received so far for one utterance, plus the latest results.
+
+    Chunks are appended as the client records. Every time a newer result
+    is published ``version`` increases and waiting event streams wake up.
+    ``recognizer`` holds whatever per-utterance state the partial
+    recognition callback keeps between runs; its ``close`` method, if it
+    has one, is called once the session is closed or dropped.
+    """
+
+    def __init__(self, mimetype=None, idle_timeout=STREAM_IDLE_TIMEOUT):
+        self.id = uuid.uuid4().hex
+        self.mimetype = mimetype
+        self.idle_timeout = idle_timeout
+        self.audio = bytearray()
+        self.version = 0
+        self.partial = None
+        self.final = None
+        self.expired = False
+        self.recognizer = None
+        self.last_activity = time.monotonic()
+        self._condition = threading.Condition()
+        self._recognizing = False
+        self._dirty = False
+        self._last_partial_at = 0.0
+
+    @property
+    def closed(self):
+        return self.final is not None
+
+    @property
+    def idle(self):
+        return time.monotonic() - self.last_activity > self.idle_timeout
+
+    def expire(self):
+        """Mark the session as dropped and release anyone waiting on it."""
+        with self._condition:
+            self.expired = True
+            self._condition.notify_all()
+        self.release()
+
+    def release(self):
+        """Free the partial recognizer's resources, such as a decoder process."""
+        recognizer, self.recognizer = self.recognizer, None
+        close = getattr(recognizer, 'close', None)
+        if close is not None:
+            close()
+
+    def snapshot(self):
+        """Get the buffered audio as immutable bytes."""
+        with self._condition:
+            return bytes(self.audio)
+
+    def publish(self, result, final=False):
+        """Store a new result and wake up anyone waiting for it."""
+        with self._condition:
+            if final:
+                self.final = result
+            else:
+                self.partial = result
+            self.version += 1
+            self.last_activity = time.monotonic()
+            self._condition.notify_all()
+
+    def wait_for_update(self, seen_version, timeout):
+        """
+        Block until a result newer than ``seen_version`` is published.
+
+        Returns:
+            int: The current version (unchanged if the wait timed out).
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.version > seen_version or self.expired,
+                                     timeout)
+            return self.version
+
+    def events(self, keepalive=15.0):
+        """
+        Yield Server-Sent Events for each partial result and the final one.
+
+        A comment line is sent every ``keepalive`` seconds without news so
+        proxies keep the connection open. The stream ends with an ``expired``
+        event once the session is dropped or has been idle too long, so an
+        abandoned session doesn't hold a worker forever.
+        """
+        seen = 0
+        while True:
+            version = self.wait_for_update(seen, keepalive)
+            if version == seen and (self.expired or self.idle):
+                yield "event: expired\ndata: {}\n\n"
+                return
+            if version == seen:
+                yield ": keepalive\n\n"
+                continue
+            seen = version
+            if self.final is not None:
+                yield f"event: final\ndata: {json.dumps(self.final)}\n\n"
+                return
+            if self.partial is not None:
+                yield f"event: partial\ndata: {json.dumps(self.partial)}\n\n"
+
+class StreamManager:
+    """
+    Tracks streaming sessions and runs incremental recognition on them.
+
+    ``recognize_partial`` is called with the session and the audio received
+    so far, and returns the JSON-serializable partial result.
+    Recognitions are coalesced: while one is running for a session, newer
+    chunks only mark it dirty, and a single follow-up run picks them all up.
+    Runs are also spaced at least ``partial_interval`` seconds apart.
+    """
+
+    def __init__(self, recognize_partial, max_workers=STREAM_WORKERS,
+                 max_sessions=STREAM_MAX_SESSIONS, partial_interval=STREAM_PARTIAL_INTERVAL,
+                 idle_timeout=STREAM_IDLE_TIMEOUT, max_bytes=STREAM_MAX_BYTES):
+        self.recognize_partial = recognize_partial
+        self.max_sessions = max_sessions
+        self.partial_interval = partial_interval
+        self.idle_timeout = idle_timeout
+        self.max_bytes = max_bytes
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='stream-recognition')
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def open(self, mimetype=None):
+        """
+        Start a new streaming session.
+
+        Raises:
+            StreamLimitExceeded: If too many sessions are already open.
+        """
+        with self._lock:
+            self._purge_idle()
+            if len(self._sessions) >= self.max_sessions:
+                raise StreamLimitExceeded(f"{len(self._sessions)} streams already open")
+            session = StreamSession(mimetype, idle_timeout=self.idle_timeout)
+            self._sessions[session.id] = session
+        return session
+
+    def get(self, session_id):
+        """Get an open session by id, or None if it is unknown or has expired."""
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def close(self, session_id):
+        """Forget a session once its final result has been delivered."""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is not None:
+            session.release()
+
+    def append(self, session, chunk):
+        """
+        Add an audio chunk to a session and schedule a partial recognition.
+
+        Raises:
+            StreamLimitExceeded: If the session's audio would grow too large.
+        """
+        with session._condition:
+            if len(session.audio) + len(chunk) > self.max_bytes:
+                raise StreamLimitExceeded(f"Stream exceeds {self.max_bytes} bytes")
+            session.audio.extend(chunk)
+            session.last_activity = time.monotonic()
+            if session._recognizing:
+                session._dirty = True
+                return
+            session._recognizing = True
+        self._executor.submit(self._recognize, session)
+
+    def _recognize(self, session):
+        while True:
+            delay = session._last_partial_at + self.partial_interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            with session._condition:
+                session._dirty = False
+                audio = bytes(session.audio)
+            if session.closed:
+                break
+
+            session._last_partial_at = time.monotonic()
+            try:
+                result = self.recognize_partial(session, audio)
+                if result is not None and not session.closed:
+                    session.publish(result)
+            except Exception as e:
+                logger.warning(f"Partial recognition failed for stream {session.id}: {str(e)}")
+
+            with session._condition:
+                if not session._dirty or session.closed:
+                    session._recognizing = False
+                    return
+        with session._condition:
+            session._recognizing = False
+
+    def _purge_idle(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        expired = [session_id for session_id, session in self._sessions.items()
+                   if session.last_activity < cutoff]
+        for session_id in expired:
+            self._sessions.pop(session_id).expire()
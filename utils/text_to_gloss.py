@@ -1,13 +1,34 @@
 import logging
 import re
 import os
+import csv
 import json
+import tempfile
+import threading
+from collections import namedtuple
+
+from utils.change_signal import ChangeSignal
 
 logger = logging.getLogger(__name__)
 
 # Path to the custom translation rules file
 TRANSLATION_RULES_FILE = os.path.join(os.path.dirname(__file__), 'translation_rules.json')
 
+# Path to the sentence-level gloss corpus shipped with the ISL CSLRT dataset
+GLOSS_CORPUS_FILE = os.environ.get(
+    "ISL_GLOSS_CORPUS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                 'data', 'ISL Corpus sign glosses.csv'))
+
+# Punctuation is stripped before matching, both from input text and rule keys
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+
+# Marker key used in the phrase trie for nodes that terminate a rule
+_GLOSS_KEY = None
+
+# How often (in seconds) workers check the rules files for changes
+RULES_CHECK_INTERVAL = float(os.environ.get("RULES_CHECK_INTERVAL", "2"))
+
 # Default English to ISL gloss mapping
 DEFAULT_ENGLISH_TO_ISL_MAPPING = {
     # Common words
@@ -137,9 +158,29 @@ DEFAULT_ENGLISH_TO_ISL_MAPPING = {
     "night": "NIGHT",
 }
 
+def tokenize(text):
+    """
+    Normalize text into the token sequence used for gloss matching.
+
+    Args:
+        text (str): The English text to tokenize.
+
+    Returns:
+        list: Lowercase tokens with punctuation removed.
+    """
+    return _PUNCTUATION_RE.sub('', text.lower()).split()
+
 # Load custom translation rules if available
-def load_translation_rules():
-    """Load custom translation rules from the JSON file if it exists."""
+def load_translation_rules(strict=False):
+    """
+    Load custom translation rules from the JSON file if it exists.
+
+    Args:
+        strict (bool): Re-raise read/parse errors instead of returning no rules.
+
+    Returns:
+        dict: Mapping of English word/phrase to ISL gloss.
+    """
     try:
         if os.path.exists(TRANSLATION_RULES_FILE):
             with open(TRANSLATION_RULES_FILE, 'r') as f:
@@ -150,11 +191,202 @@ def load_translation_rules():
             logger.info("No custom translation rules file found, using defaults")
     except Exception as e:
         logger.error(f"Error loading custom translation rules: {str(e)}")
+        if strict:
+            raise
     
     return {}
 
-# Create a combined mapping with defaults and any custom rules
-ENGLISH_TO_ISL_MAPPING = {**DEFAULT_ENGLISH_TO_ISL_MAPPING, **load_translation_rules()}
+def save_translation_rules(rules):
+    """
+    Atomically write the custom translation rules file.
+
+    The rules are written to a temporary file in the same directory and
+    renamed over the old file, so running workers never read a partially
+    written file and pick up the change on their next check.
+
+    Args:
+        rules (dict): Mapping of English word/phrase to ISL gloss.
+    """
+    directory = os.path.dirname(TRANSLATION_RULES_FILE)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(rules, f, indent=2, sort_keys=True)
+        os.replace(temp_path, TRANSLATION_RULES_FILE)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+def load_corpus_glosses():
+    """
+    Load whole-sentence gloss translations from the ISL corpus CSV.
+
+    Returns:
+        dict: Mapping of English sentence to its ISL gloss.
+    """
+    corpus = {}
+    try:
+        if os.path.exists(GLOSS_CORPUS_FILE):
+            with open(GLOSS_CORPUS_FILE, 'r', newline='', encoding='utf-8') as f:
+                reader = csv.reader(f)
+                next(reader, None)
+                for row in reader:
+                    if len(row) < 2 or not row[0].strip() or not row[1].strip():
+                        continue
+                    corpus[row[0].strip().lower()] = row[1].strip()
+            logger.info(f"Loaded {len(corpus)} corpus sentence glosses")
+        else:
+            logger.info("No gloss corpus file found, skipping sentence rules")
+    except Exception as e:
+        logger.error(f"Error loading gloss corpus: {str(e)}")
+
+    return corpus
+
+def build_phrase_trie(mapping):
+    """
+    Compile a mapping of English words/phrases into a token trie.
+
+    Each key is tokenized the same way as input text, so multi-word keys
+    such as "thank you" become a path of two nodes. The node reached by
+    the last token stores the gloss under the ``_GLOSS_KEY`` marker.
+
+    Args:
+        mapping (dict): English word/phrase to ISL gloss.
+
+    Returns:
+        dict: The root node of the trie.
+    """
+    root = {}
+    for phrase, gloss in mapping.items():
+        tokens = tokenize(phrase)
+        if not tokens:
+            continue
+        node = root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node[_GLOSS_KEY] = gloss
+    return root
+
+def match_phrases(tokens, trie):
+    """
+    Translate a token sequence using leftmost-longest phrase matching.
+
+    At each position the trie is walked as far as the tokens allow and the
+    longest rule seen along the way wins; tokens that start no rule are
+    passed through in uppercase. The walk from any position is bounded by
+    the longest rule, so the cost is linear in the number of tokens.
+
+    Args:
+        tokens (list): Normalized tokens from ``tokenize``.
+        trie (dict): The root node from ``build_phrase_trie``.
+
+    Returns:
+        list: A list of ISL gloss words/phrases.
+    """
+    gloss_words = []
+    i = 0
+    n = len(tokens)
+    while i < n:
+        node = trie
+        match = None
+        match_end = i
+        j = i
+        while j < n:
+            node = node.get(tokens[j])
+            if node is None:
+                break
+            j += 1
+            if _GLOSS_KEY in node:
+                match = node[_GLOSS_KEY]
+                match_end = j
+
+        if match is not None:
+            gloss_words.append(match)
+            i = match_end
+        else:
+            # If no mapping starts here, we can either:
+            # 1. Skip the word
+            # 2. Use fingerspelling (for names, etc.)
+            # 3. Try to find a similar word
+            # For simplicity, we'll just use the original word in uppercase
+            gloss_words.append(tokens[i].upper())
+            i += 1
+
+    return gloss_words
+
+# An immutable, compiled view of the translation rules
+RulesSnapshot = namedtuple('RulesSnapshot', ['generation', 'version', 'mapping', 'trie'])
+
+class TranslationRulesStore:
+    """
+    Versioned holder of the compiled translation rules.
+
+    Workers call ``snapshot()`` per conversion. The rules and corpus files are
+    watched through ``ChangeSignal``, which only stats them once per check
+    interval; when either changes, a new mapping and trie are compiled and
+    swapped in as a single reference assignment, so in-flight conversions keep
+    using the snapshot they started with and no restart is needed.
+    """
+
+    def __init__(self, check_interval=RULES_CHECK_INTERVAL):
+        self._signals = (
+            ChangeSignal(GLOSS_CORPUS_FILE, check_interval),
+            ChangeSignal(TRANSLATION_RULES_FILE, check_interval),
+        )
+        self._lock = threading.Lock()
+        self._snapshot = self._compile(0, self._version(), strict=False)
+
+    def _version(self):
+        return tuple(signal.version() for signal in self._signals)
+
+    def _compile(self, generation, version, strict=True):
+        # Later sources take precedence, so custom rules can override anything
+        mapping = {
+            **load_corpus_glosses(),
+            **DEFAULT_ENGLISH_TO_ISL_MAPPING,
+            **load_translation_rules(strict=strict),
+        }
+        return RulesSnapshot(generation, version, mapping, build_phrase_trie(mapping))
+
+    def snapshot(self):
+        """
+        Get the current compiled rules, reloading them if the files changed.
+
+        Returns:
+            RulesSnapshot: The generation counter, file version, mapping and trie.
+        """
+        snapshot = self._snapshot
+        version = self._version()
+        if version == snapshot.version:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if version != snapshot.version:
+                try:
+                    snapshot = self._compile(snapshot.generation + 1, version)
+                    self._snapshot = snapshot
+                    logger.info(f"Reloaded translation rules (generation {snapshot.generation}, "
+                                f"{len(snapshot.mapping)} rules)")
+                except Exception as e:
+                    # Keep serving the last good rules; retry on the next change
+                    logger.error(f"Keeping previous translation rules: {str(e)}")
+                    self._snapshot = snapshot._replace(version=version)
+        return snapshot
+
+    @property
+    def generation(self):
+        """int: Counter incremented every time new rules are swapped in."""
+        return self.snapshot().generation
+
+# Compiled once at import and then only when the rules files change
+RULES_STORE = TranslationRulesStore()
+
+def get_translation_mapping():
+    """Get the current English to ISL gloss mapping."""
+    return RULES_STORE.snapshot().mapping
 
 def convert_text_to_gloss(text):
     """
@@ -170,25 +402,11 @@ def convert_text_to_gloss(text):
         if not text:
             return []
         
-        # Convert to lowercase for matching
-        text = text.lower()
-        
-        # Remove punctuation and split into words
-        text = re.sub(r'[^\w\s]', '', text)
-        words = text.split()
+        # Lowercase, remove punctuation and split into words
+        words = tokenize(text)
         
-        # Convert each word to its ISL gloss equivalent
-        gloss_words = []
-        for word in words:
-            if word in ENGLISH_TO_ISL_MAPPING:
-                gloss_words.append(ENGLISH_TO_ISL_MAPPING[word])
-            else:
-                # If no direct mapping, we can either:
-                # 1. Skip the word
-                # 2. Use fingerspelling (for names, etc.)
-                # 3. Try to find a similar word
-                # For simplicity, we'll just use the original word in uppercase
-                gloss_words.append(word.upper())
+        # Convert the longest matching phrases to their ISL gloss equivalents
+        gloss_words = match_phrases(words, RULES_STORE.snapshot().trie)
         
         logger.debug(f"Converted text '{text}' to gloss: {gloss_words}")
         return gloss_words
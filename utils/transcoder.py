@@ -0,0 +1,242 @@
+import atexit
+import logging
+import os
+import queue
+import subprocess
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of ffmpeg processes transcoding at the same time
+FFMPEG_POOL_SIZE = int(os.environ.get("FFMPEG_POOL_SIZE", "2"))
+
+# Maximum number of requests allowed to wait for a free ffmpeg slot
+FFMPEG_MAX_QUEUE = int(os.environ.get("FFMPEG_MAX_QUEUE", "8"))
+
+# How long (in seconds) a request waits for a free slot before giving up
+FFMPEG_QUEUE_TIMEOUT = float(os.environ.get("FFMPEG_QUEUE_TIMEOUT", "5"))
+
+# Timeout (in seconds) for a single transcode
+FFMPEG_TIMEOUT = float(os.environ.get("FFMPEG_TIMEOUT", "10"))
+
+class TranscoderBusy(Exception):
+    """Raised when all transcoders are busy and the wait queue is full."""
+
+class TranscoderPool:
+    """
+    Shared pool of warm ffmpeg processes converting audio to 16 kHz mono PCM.
+
+    ffmpeg handles one input stream per process, so each process is used
+    for a single transcode. The pool keeps ``size`` processes already
+    started and blocked on stdin, and starts each replacement in the
+    background, so a request never waits for process startup. Input goes
+    in on stdin and PCM comes back on stdout; nothing touches the disk.
+
+    At most ``size`` transcodes run at once and at most ``max_queue``
+    callers wait for a slot. Beyond that, or after ``queue_timeout``
+    seconds of waiting, ``TranscoderBusy`` is raised so callers can shed
+    load instead of piling up CPU-bound work.
+    """
+
+    def __init__(self, sample_rate=16000, size=FFMPEG_POOL_SIZE, max_queue=FFMPEG_MAX_QUEUE,
+                 queue_timeout=FFMPEG_QUEUE_TIMEOUT, timeout=FFMPEG_TIMEOUT):
+        self.sample_rate = sample_rate
+        self.size = size
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._warmed = False
+        self._prespawn = True
+
+    def _command(self, input_args=()):
+        return ['ffmpeg', '-nostdin', '-loglevel', 'error', *input_args, '-i', 'pipe:0',
+                '-f', 's16le', '-ar', str(self.sample_rate), '-ac', '1', 'pipe:1']
+
+    def _spawn(self, input_args=()):
+        return subprocess.Popen(self._command(input_args), stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def _add_spare(self):
+        if self._idle.qsize() >= self.size:
+            return
+        try:
+            self._idle.put(self._spawn())
+        except OSError as e:
+            # ffmpeg is missing; stop pre-spawning and let transcode() report it
+            logger.warning(f"Could not pre-start ffmpeg: {str(e)}")
+            self._prespawn = False
+
+    def _warm(self):
+        with self._lock:
+            if self._warmed:
+                return
+            self._warmed = True
+        for _ in range(self.size):
+            if not self._prespawn:
+                break
+            self._add_spare()
+        logger.info(f"Started {self._idle.qsize()} warm ffmpeg transcoders")
+
+    def _checkout(self):
+        """Take a warm process if one is ready, otherwise start one now."""
+        while True:
+            try:
+                proc = self._idle.get_nowait()
+            except queue.Empty:
+                return self._spawn()
+            if proc.poll() is None:
+                return proc
+
+    def _acquire_slot(self):
+        if self._slots.acquire(blocking=False):
+            return
+        with self._lock:
+            if self._waiting >= self.max_queue:
+                raise TranscoderBusy(f"{self._waiting} transcodes already waiting")
+            self._waiting += 1
+        try:
+            if not self._slots.acquire(timeout=self.queue_timeout):
+                raise TranscoderBusy(f"No transcoder free after {self.queue_timeout}s")
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    def transcode(self, audio_bytes, input_args=()):
+        """
+        Convert audio to 16 kHz mono signed 16-bit PCM.
+
+        Args:
+            audio_bytes (bytes): The encoded input audio.
+            input_args (tuple): Extra ffmpeg options describing the input,
+                e.g. for headerless PCM. These need a fresh process.
+
+        Returns:
+            bytes: Raw little-endian PCM samples.
+
+        Raises:
+            TranscoderBusy: If no transcoder becomes free in time.
+            subprocess.CalledProcessError: If ffmpeg fails.
+        """
+        if self._prespawn and not input_args:
+            self._warm()
+        self._acquire_slot()
+        try:
+            if input_args:
+                proc = self._spawn(input_args)
+            else:
+                proc = self._checkout()
+                if self._prespawn:
+                    threading.Thread(target=self._add_spare, daemon=True).start()
+            try:
+                stdout, stderr = proc.communicate(input=audio_bytes, timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.communicate()
+                raise
+            if proc.returncode != 0:
+                raise subprocess.CalledProcessError(proc.returncode, proc.args, stdout, stderr)
+            return stdout
+        finally:
+            self._slots.release()
+
+    def shutdown(self):
+        """Stop all idle warm processes."""
+        while True:
+            try:
+                proc = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            proc.kill()
+            proc.wait()
+
+class StreamDecoder:
+    """
+    Long-lived ffmpeg process decoding one growing recording to 16 kHz mono PCM.
+
+    Compressed live recordings (webm/opus, ogg) can't be decoded from the
+    middle, but ffmpeg decodes its input as it arrives. Each chunk is
+    written to the process's stdin once and a reader thread collects the
+    PCM it writes back, so decoding a recording costs the same however
+    often partial results are asked for. The process lives outside the
+    transcoder pool, whose slots are for one-off uploads; callers bound how
+    many decoders run through their own session limits.
+    """
+
+    def __init__(self, sample_rate=16000):
+        self._pcm = bytearray()
+        self._condition = threading.Condition()
+        self._proc = subprocess.Popen(
+            ['ffmpeg', '-nostdin', '-loglevel', 'error',
+             # Start decoding as soon as the header is in instead of probing seconds of input
+             '-fflags', 'nobuffer', '-probesize', '32768', '-analyzeduration', '0',
+             '-i', 'pipe:0',
+             '-f', 's16le', '-ar', str(sample_rate), '-ac', '1', '-flush_packets', '1', 'pipe:1'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self._reader = threading.Thread(target=self._read, name='stream-decoder', daemon=True)
+        self._reader.start()
+
+    def _read(self):
+        while True:
+            data = self._proc.stdout.read1(65536)
+            with self._condition:
+                if not data:
+                    self._condition.notify_all()
+                    return
+                self._pcm.extend(data)
+                self._condition.notify_all()
+
+    def feed(self, data, wait=0.05):
+        """
+        Decode the next chunk of the recording.
+
+        Args:
+            data (bytes): Encoded bytes following those already fed.
+            wait (float): Seconds to wait for ffmpeg to return some of
+                the chunk's audio.
+
+        Returns:
+            int: Number of PCM bytes decoded so far. ffmpeg may still hold
+            the last few milliseconds of input.
+
+        Raises:
+            ValueError: If ffmpeg has exited, e.g. on undecodable input.
+        """
+        with self._condition:
+            decoded = len(self._pcm)
+        if data:
+            try:
+                self._proc.stdin.write(data)
+                self._proc.stdin.flush()
+            except (BrokenPipeError, ValueError) as e:
+                raise ValueError(f"ffmpeg stopped decoding the stream: {str(e)}") from e
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: len(self._pcm) > decoded or self._proc.poll() is not None, timeout=wait)
+        with self._condition:
+            return len(self._pcm)
+
+    def read(self, start=0):
+        """Get the PCM decoded so far, from byte ``start`` on."""
+        with self._condition:
+            return bytes(self._pcm[start:])
+
+    def close(self):
+        """Stop the ffmpeg process."""
+        try:
+            self._proc.stdin.close()
+        except (BrokenPipeError, ValueError):
+            pass
+        try:
+            self._proc.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+            self._proc.wait()
+        self._reader.join(timeout=1)
+
+# Shared by the whole process; started lazily on the first transcode
+transcoder_pool = TranscoderPool()
+atexit.register(transcoder_pool.shutdown)
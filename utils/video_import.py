@@ -0,0 +1,218 @@
+import logging
+import os
+from datetime import datetime
+
+from sqlalchemy import case, delete, select, tuple_
+
+from models import db, SignVideo, SignVideoVariant
+from utils.video_retrieval import canonical_gloss_word, notify_sign_videos_changed
+
+logger = logging.getLogger(__name__)
+
+# Number of rows written per transaction by the bulk importer
+IMPORT_BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", "1000"))
+
+# Columns derived from the clip file, reset when a gloss moves to another file
+_FILE_DERIVED_COLUMNS = ('content_digest', 'size', 'duration', 'video_codec', 'width', 'height',
+                         'bit_rate', 'keyframe_count', 'probed_at', 'faststart_digest',
+                         'low_digest')
+
+def _insert_for_dialect(name):
+    """Get the INSERT construct supporting ON CONFLICT for a database dialect."""
+    if name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
+def _upsert_batch(rows):
+    """Write one batch with a single INSERT ... ON CONFLICT (gloss_word) DO UPDATE."""
+    table = SignVideo.__table__
+    insert = _insert_for_dialect(db.engine.dialect.name)
+    if insert is None:
+        # No native upsert: fall back to the ORM, still in one transaction
+        for row in rows:
+            video = SignVideo.query.filter_by(gloss_word=row['gloss_word']).first()
+            if video is None:
+                video = SignVideo(gloss_word=row['gloss_word'])
+                db.session.add(video)
+            for column, value in row.items():
+                setattr(video, column, value)
+        return
+
+    stmt = insert(table).values(rows)
+    file_changed = table.c.file_path != stmt.excluded.file_path
+    updates = {column: stmt.excluded[column] for column in rows[0] if column != 'gloss_word'}
+    for column in _FILE_DERIVED_COLUMNS:
+        if column not in updates:
+            updates[column] = case((file_changed, None), else_=table.c[column])
+    stmt = stmt.on_conflict_do_update(index_elements=[table.c.gloss_word], set_=updates)
+    db.session.execute(stmt)
+
+def upsert_sign_videos(rows, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Insert or update many SignVideo rows with set-based upserts.
+
+    Rows are written in batches, each in its own transaction, with one
+    ``INSERT ... ON CONFLICT (gloss_word) DO UPDATE`` statement on
+    PostgreSQL and SQLite. Existing rows are fetched once per batch to
+    report counts and to skip rows that would not change. When a gloss moves
+    to a different file, the metadata derived from the old file is reset
+    so it is ingested again. Needs an app context.
+
+    Args:
+        rows (iterable): Dicts with at least ``gloss_word`` and ``file_path``;
+            any other keys are SignVideo columns to set as well. Every row
+            must have the same keys. Later rows win over earlier ones with
+            the same gloss word. Letter clips are stored under their
+            canonical "LETTER X" gloss.
+        batch_size (int): Number of rows per transaction.
+
+    Returns:
+        dict: Counts of ``added``, ``updated`` and ``unchanged`` rows.
+    """
+    deduplicated = {}
+    for row in rows:
+        gloss_word = canonical_gloss_word(row['gloss_word'])
+        deduplicated[gloss_word] = {**row, 'gloss_word': gloss_word, 'created_at': datetime.utcnow()}
+    rows = list(deduplicated.values())
+
+    counts = {'added': 0, 'updated': 0, 'unchanged': 0}
+    if not rows:
+        return counts
+    table = SignVideo.__table__
+    compared = [column for column in rows[0] if column not in ('gloss_word', 'created_at')]
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        existing = {
+            found[0]: tuple(found[1:]) for found in db.session.execute(
+                select(table.c.gloss_word, *(table.c[column] for column in compared))
+                .where(table.c.gloss_word.in_([row['gloss_word'] for row in batch]))
+            )
+        }
+
+        changed = []
+        for row in batch:
+            current = existing.get(row['gloss_word'])
+            if current is None:
+                counts['added'] += 1
+                changed.append(row)
+            elif current != tuple(row[column] for column in compared):
+                counts['updated'] += 1
+                changed.append(row)
+            else:
+                counts['unchanged'] += 1
+
+        try:
+            if changed:
+                _upsert_batch(changed)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        logger.debug(f"Imported batch of {len(batch)} videos ({len(changed)} changed)")
+
+    if counts['added'] or counts['updated']:
+        # Core statements bypass the ORM change tracking, so signal explicitly
+        notify_sign_videos_changed()
+    return counts
+
+def upsert_sign_video_variants(rows, keep_paths=None, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Insert or update alternative clips for existing SignVideo rows.
+
+    Works like ``upsert_sign_videos`` with ``(sign_video_id, file_path)`` as
+    the conflict key. The SignVideo rows must exist already. Needs an app
+    context.
+
+    Args:
+        rows (iterable): Dicts with ``gloss_word`` and ``file_path`` plus any
+            other SignVideoVariant columns. Every row must have the same keys.
+        keep_paths (dict): Gloss word to the file paths of all its variants.
+            Variants of these glosses with any other path are deleted.
+        batch_size (int): Number of rows per transaction.
+
+    Returns:
+        dict: Counts of ``added``, ``updated`` and ``removed`` variants, and
+        of rows ``skipped`` because their gloss has no SignVideo.
+    """
+    rows = [{**row, 'gloss_word': canonical_gloss_word(row['gloss_word'])} for row in rows]
+    keep_paths = {canonical_gloss_word(gloss_word): paths
+                  for gloss_word, paths in (keep_paths or {}).items()}
+    counts = {'added': 0, 'updated': 0, 'removed': 0, 'skipped': 0}
+    glosses = {row['gloss_word'] for row in rows} | set(keep_paths)
+    ids = {}
+    glosses_list = list(glosses)
+    for start in range(0, len(glosses_list), batch_size):
+        ids.update(db.session.execute(
+            select(SignVideo.gloss_word, SignVideo.id)
+            .where(SignVideo.gloss_word.in_(glosses_list[start:start + batch_size]))
+        ).all())
+
+    variants = {}
+    for row in rows:
+        sign_video_id = ids.get(row['gloss_word'])
+        if sign_video_id is None:
+            counts['skipped'] += 1
+            continue
+        variant = {key: value for key, value in row.items() if key != 'gloss_word'}
+        variant['sign_video_id'] = sign_video_id
+        variants[(sign_video_id, variant['file_path'])] = variant
+    variants = list(variants.values())
+
+    table = SignVideoVariant.__table__
+    insert = _insert_for_dialect(db.engine.dialect.name)
+    try:
+        for gloss_word, paths in keep_paths.items():
+            if gloss_word not in ids:
+                continue
+            stale = delete(table).where(table.c.sign_video_id == ids[gloss_word])
+            if paths:
+                stale = stale.where(table.c.file_path.not_in(list(paths)))
+            counts['removed'] += db.session.execute(stale).rowcount
+
+        for start in range(0, len(variants), batch_size):
+            batch = variants[start:start + batch_size]
+            existing = set(db.session.execute(
+                select(table.c.sign_video_id, table.c.file_path)
+                .where(tuple_(table.c.sign_video_id, table.c.file_path).in_(
+                    [(variant['sign_video_id'], variant['file_path']) for variant in batch]))
+            ).all())
+            for variant in batch:
+                if (variant['sign_video_id'], variant['file_path']) in existing:
+                    counts['updated'] += 1
+                else:
+                    counts['added'] += 1
+
+            if insert is None:
+                for variant in batch:
+                    found = SignVideoVariant.query.filter_by(
+                        sign_video_id=variant['sign_video_id'],
+                        file_path=variant['file_path']).first()
+                    if found is None:
+                        found = SignVideoVariant(**variant)
+                        db.session.add(found)
+                    for column, value in variant.items():
+                        setattr(found, column, value)
+            else:
+                stmt = insert(table).values(batch)
+                updates = {column: stmt.excluded[column] for column in batch[0]
+                           if column not in ('sign_video_id', 'file_path')}
+                if updates:
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[table.c.sign_video_id, table.c.file_path], set_=updates)
+                else:
+                    stmt = stmt.on_conflict_do_nothing(
+                        index_elements=[table.c.sign_video_id, table.c.file_path])
+                db.session.execute(stmt)
+            db.session.commit()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    if counts['added'] or counts['updated'] or counts['removed']:
+        notify_sign_videos_changed()
+    return counts
@@ -0,0 +1,231 @@
+import json
+import logging
+import os
+import struct
+import subprocess
+import tempfile
+from datetime import datetime
+
+from utils.asset_store import ASSET_STORE_DIR, find_asset, store_asset
+from utils.video_retrieval import store_sign_video_asset
+
+logger = logging.getLogger(__name__)
+
+# Height (in pixels) of the low-bitrate rendition for slow connections
+LOW_RENDITION_HEIGHT = int(os.environ.get("LOW_RENDITION_HEIGHT", "360"))
+
+# Peak video bitrate of the low-bitrate rendition
+LOW_RENDITION_MAXRATE = os.environ.get("LOW_RENDITION_MAXRATE", "400k")
+
+# Timeout (in seconds) for probing or transcoding one clip
+INGEST_TIMEOUT = float(os.environ.get("INGEST_TIMEOUT", "120"))
+
+def probe_video(path):
+    """
+    Read a clip's duration, codec, resolution, bitrate and keyframe count.
+
+    Args:
+        path (str): Path of the video file.
+
+    Returns:
+        dict: The probed metadata; values ffprobe could not determine are None.
+    """
+    cmd = ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+           '-skip_frame', 'nokey', '-count_frames',
+           '-show_entries', 'stream=codec_name,width,height,bit_rate,nb_read_frames'
+                            ':format=duration,bit_rate',
+           '-print_format', 'json', path]
+    result = subprocess.run(cmd, check=True, capture_output=True, timeout=INGEST_TIMEOUT)
+    info = json.loads(result.stdout)
+    stream = (info.get('streams') or [{}])[0]
+    container = info.get('format', {})
+
+    def number(value, kind):
+        try:
+            return kind(value)
+        except (TypeError, ValueError):
+            return None
+
+    return {
+        'duration': number(container.get('duration'), float),
+        'video_codec': stream.get('codec_name'),
+        'width': number(stream.get('width'), int),
+        'height': number(stream.get('height'), int),
+        'bit_rate': number(stream.get('bit_rate') or container.get('bit_rate'), int),
+        'keyframe_count': number(stream.get('nb_read_frames'), int),
+    }
+
+def is_faststart(path):
+    """
+    Check whether an MP4's index (moov atom) comes before its media data.
+
+    Players can only start a progressive download once they have the
+    index, so clips with it at the end must be downloaded completely first.
+    """
+    with open(path, 'rb') as f:
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return False
+            size, kind = struct.unpack('>I4s', header)
+            if kind == b'moov':
+                return True
+            if kind == b'mdat':
+                return False
+            if size == 1:
+                size = struct.unpack('>Q', f.read(8))[0] - 8
+            elif size == 0:
+                return False
+            f.seek(size - 8, os.SEEK_CUR)
+
+def _render(source, args):
+    """Run ffmpeg on a clip and add the output to the asset store."""
+    os.makedirs(ASSET_STORE_DIR, exist_ok=True)
+    fd, output = tempfile.mkstemp(dir=ASSET_STORE_DIR, suffix='.part.mp4')
+    os.close(fd)
+    try:
+        cmd = ['ffmpeg', '-y', '-nostdin', '-loglevel', 'error', '-i', source, *args,
+               '-movflags', '+faststart', output]
+        subprocess.run(cmd, check=True, capture_output=True, timeout=INGEST_TIMEOUT)
+        return store_asset(output)
+    finally:
+        os.unlink(output)
+
+def make_faststart(source):
+    """Get the digest of a faststart copy of a clip, remuxing only if needed."""
+    if is_faststart(source):
+        return None
+    return _render(source, ['-c', 'copy'])
+
+def make_low_rendition(source):
+    """Get the digest of a small H.264 rendition of a clip for slow connections."""
+    return _render(source, [
+        '-vf', f"scale=-2:'min({LOW_RENDITION_HEIGHT},ih)'",
+        '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '30',
+        '-maxrate', LOW_RENDITION_MAXRATE, '-bufsize', '800k',
+        '-pix_fmt', 'yuv420p', '-an',
+    ])
+
+def ingest_file(path, renditions=True, relink=True):
+    """
+    Store, probe and render one clip without touching the database.
+
+    Safe to call from worker threads: the heavy lifting happens in hashing
+    (which releases the GIL) and in ffmpeg/ffprobe subprocesses. Probe and
+    rendition failures are logged and leave their columns empty.
+
+    Args:
+        path (str): Absolute path of the video file.
+        renditions (bool): Whether to build renditions.
+        relink (bool): Replace the original with a hard link to the stored
+            copy, so the clip isn't kept twice.
+
+    Returns:
+        dict: SignVideo column values for the clip.
+    """
+    digest = store_asset(path, relink=relink)
+    source = find_asset(digest)
+    columns = {'content_digest': digest, 'size': os.path.getsize(source), 'duration': None, 'video_codec': None,
+               'width': None, 'height': None, 'bit_rate': None, 'keyframe_count': None,
+               'probed_at': None, 'faststart_digest': None, 'low_digest': None}
+    try:
+        columns.update(probe_video(source))
+        columns['probed_at'] = datetime.utcnow()
+    except Exception as e:
+        logger.warning(f"Could not probe video {path}: {str(e)}")
+
+    if renditions:
+        try:
+            columns['faststart_digest'] = make_faststart(source) or digest
+            if columns['height'] and columns['height'] <= LOW_RENDITION_HEIGHT:
+                columns['low_digest'] = columns['faststart_digest']
+            else:
+                columns['low_digest'] = make_low_rendition(source)
+        except Exception as e:
+            logger.warning(f"Could not build renditions for {path}: {str(e)}")
+    return columns
+
+def ingest_sign_video(video, renditions=True, force=False, relink=True):
+    """
+    Prepare a SignVideo's clip for serving.
+
+    Stores the clip by content, probes it once for its metadata and builds
+    faststart and low-bitrate renditions. Each step is skipped when its
+    result is already recorded (unless ``force``), and failures are logged
+    rather than raised so one bad clip never aborts an import. The caller
+    commits the session.
+
+    Args:
+        video (SignVideo): The row to ingest.
+        renditions (bool): Whether to build renditions.
+        force (bool): Redo steps whose results are already recorded.
+        relink (bool): Replace the original with a hard link to the stored
+            copy, so the clip isn't kept twice.
+
+    Returns:
+        bool: Whether the clip was found and stored.
+    """
+    previous_digest = video.content_digest
+    digest = store_sign_video_asset(video, relink=relink)
+    if digest is None:
+        return False
+    # A replaced clip invalidates everything derived from the old one
+    force = force or digest != previous_digest
+    source = find_asset(digest)
+    video.size = os.path.getsize(source)
+
+    try:
+        if force or video.probed_at is None:
+            for column, value in probe_video(source).items():
+                setattr(video, column, value)
+            video.probed_at = datetime.utcnow()
+    except Exception as e:
+        logger.warning(f"Could not probe video for '{video.gloss_word}': {str(e)}")
+
+    if not renditions:
+        return True
+    try:
+        if force or video.faststart_digest is None:
+            video.faststart_digest = make_faststart(source) or digest
+        if force or video.low_digest is None:
+            # Clips already at the low resolution are not worth a separate rendition
+            if video.height and video.height <= LOW_RENDITION_HEIGHT:
+                video.low_digest = video.faststart_digest
+            else:
+                video.low_digest = make_low_rendition(source)
+    except Exception as e:
+        logger.warning(f"Could not build renditions for '{video.gloss_word}': {str(e)}")
+    return True
+
+def ingest_pending_videos(renditions=True, commit_every=50, relink=True):
+    """
+    Ingest every SignVideo row whose clip has not been stored or probed yet.
+
+    Run after a bulk import, which only writes paths. Progress is committed
+    every ``commit_every`` rows so an interrupted run keeps its work. Needs
+    an app context.
+
+    Args:
+        renditions (bool): Whether to build renditions.
+        commit_every (int): Number of rows per commit.
+        relink (bool): Replace the originals with hard links to the stored
+            copies.
+
+    Returns:
+        tuple: Numbers of ingested rows and of rows whose file is missing.
+    """
+    from models import db, SignVideo
+
+    pending = SignVideo.query.filter(
+        db.or_(SignVideo.content_digest.is_(None), SignVideo.probed_at.is_(None))
+    ).order_by(SignVideo.id).all()
+    ingested = missing = 0
+    for i, video in enumerate(pending, start=1):
+        if ingest_sign_video(video, renditions=renditions, relink=relink):
+            ingested += 1
+        else:
+            missing += 1
+        if i % commit_every == 0:
+            db.session.commit()
+    db.session.commit()
+    return ingested, missing
@@ -1,16 +1,355 @@
+import itertools
 import logging
 import os
-from pathlib import Path
+import re
+import threading
+from collections import namedtuple
+from functools import lru_cache
+from types import MappingProxyType
+from urllib.parse import quote
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import SignVideo, SignVideoVariant
+from utils.asset_store import asset_url, find_asset, is_digest, store_asset
+from utils.change_signal import ChangeSignal
+from utils.video_serving import version_token
 
 logger = logging.getLogger(__name__)
 
+# Folder the application serves static files (including videos) from
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+
+# Touched whenever SignVideo rows change so every process can drop stale lookups
+VIDEO_CHANGE_SIGNAL_FILE = os.environ.get(
+    "VIDEO_CHANGE_SIGNAL_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                 'data', '.sign_videos.version'))
+
+video_change_signal = ChangeSignal(VIDEO_CHANGE_SIGNAL_FILE)
+
+def notify_sign_videos_changed():
+    """Tell all processes that the SignVideo table has changed."""
+    video_change_signal.notify()
+
+@event.listens_for(Session, 'after_flush')
+def _track_sign_video_changes(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (SignVideo, SignVideoVariant)):
+            session.info['sign_videos_changed'] = True
+            return
+
+@event.listens_for(Session, 'after_commit')
+def _signal_sign_video_changes(session):
+    if session.info.pop('sign_videos_changed', False):
+        notify_sign_videos_changed()
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_sign_video_changes(session):
+    session.info.pop('sign_videos_changed', None)
+
+# Gloss words naming a fingerspelling clip, e.g. "letter_a", "Alphabet-B" or "fingerspell c"
+_LETTER_GLOSS_RE = re.compile(r'^\s*(?:letter|alphabet|fingerspell(?:ing)?)[\s_-]*([a-z0-9])\s*$',
+                              re.IGNORECASE)
+
+def letter_gloss(char):
+    """Get the gloss word letter clips are stored under, e.g. "LETTER A"."""
+    return f"LETTER {char.upper()}"
+
+def canonical_gloss_word(gloss_word):
+    """
+    Normalize the gloss word of a clip being imported.
+    
+    Fingerspelling clips named in any of the usual styles are stored under
+    ``letter_gloss``, the only key fingerspelling looks up, so they can't
+    collide with word signs such as the pronoun "I" or the article "A".
+    Other glosses are returned unchanged.
+    """
+    match = _LETTER_GLOSS_RE.match(gloss_word)
+    return letter_gloss(match.group(1)) if match else gloss_word
+
+def gloss_key(gloss_word):
+    """
+    Normalize a gloss word for matching against SignVideo.gloss_word.
+    
+    Glosses are stored in different styles by the import scripts
+    ("NAMASTE", "thank-you", "you_free_today"), so matching ignores case
+    and treats underscores and runs of whitespace as single spaces.
+    """
+    return " ".join(gloss_word.lower().replace("_", " ").split())
+
+def resolve_video_file(file_path):
+    """
+    Resolve a SignVideo.file_path to a servable file under the static folder.
+    
+    Rows store paths either relative to the static folder ("videos/x.mp4")
+    or to the project root ("static/videos/x.mp4"), sometimes with Windows
+    separators.
+    
+    Args:
+        file_path (str): The stored path.
+        
+    Returns:
+        tuple: The URL and absolute path of the file, or None if it does not
+        exist or lies outside the static folder.
+    """
+    path = file_path.replace("\\", "/")
+    if os.path.isabs(path):
+        absolute = os.path.normpath(path)
+    else:
+        path = path.lstrip("/")
+        if path.startswith("static/"):
+            path = path[len("static/"):]
+        absolute = os.path.normpath(os.path.join(STATIC_DIR, path))
+    
+    relative = os.path.relpath(absolute, STATIC_DIR)
+    if relative.startswith(".."):
+        logger.debug(f"Video file is outside the static folder: {file_path}")
+        return None
+    if not os.path.isfile(absolute):
+        logger.debug(f"Video file does not exist: {file_path}")
+        return None
+    # Versioned URL: the token changes whenever the file does, so it can be cached forever
+    url = f"/media/{quote(relative.replace(os.sep, '/'))}?v={version_token(absolute)}"
+    return url, absolute
+
+def resolve_sign_video(video):
+    """
+    Resolve a SignVideo or SignVideoVariant row to a servable file.
+    
+    Rows with a content digest are served from the asset store under an
+    immutable content-addressed URL; others fall back to their file path.
+    See ``utils.video_ingest`` for how renditions are produced.
+    
+    Args:
+        video (SignVideo): The row to resolve (a SignVideoVariant works too).
+        
+    Returns:
+        tuple: The URL and absolute path of the file, or None.
+    """
+    # Prefer the faststart rendition, which can start playing while downloading
+    for digest in (video.faststart_digest, video.content_digest):
+        resolved = resolve_asset(digest)
+        if resolved:
+            return resolved
+    return resolve_video_file(video.file_path)
+
+def resolve_asset(digest):
+    """Get the URL and path of a stored asset, or None if it is not in the store."""
+    if is_digest(digest):
+        path = find_asset(digest)
+        if path:
+            return asset_url(digest, os.path.splitext(path)[1]), path
+    return None
+
+def store_sign_video_asset(video, relink=False):
+    """
+    Add a SignVideo's file to the asset store and record its digest on the row.
+    
+    The caller commits the session.
+    
+    Args:
+        video (SignVideo): The row whose file should be stored.
+        relink (bool): Replace the original file with a hard link to the asset.
+        
+    Returns:
+        str: The content digest, or None if the file could not be found.
+    """
+    resolved = resolve_video_file(video.file_path)
+    if resolved is None:
+        return None
+    video.content_digest = store_asset(resolved[1], relink=relink)
+    return video.content_digest
+
+# Maximum number of fingerspelled words remembered per index
+FINGERSPELL_CACHE_SIZE = int(os.environ.get("FINGERSPELL_CACHE_SIZE", "4096"))
+
+# How to choose among the clips of a gloss: 'first' (oldest row), 'smallest'
+# (fewest bytes), 'shortest' (duration), 'round-robin' (rotate on every lookup)
+# or 'pinned' (the variant marked is_pinned, else the first)
+VIDEO_VARIANT_POLICY = os.environ.get("VIDEO_VARIANT_POLICY", "smallest")
+
+# A playable clip for a gloss; ``variants`` holds any alternative clips and
+# ``renditions`` maps a rendition name (e.g. "low") to its URL and path
+VideoEntry = namedtuple('VideoEntry', ['gloss', 'url', 'path', 'duration', 'variants',
+                                       'renditions', 'size'])
+
+def _renditions(video):
+    low = resolve_asset(video.low_digest)
+    return {'low': low} if low else {}
+
+def _policy_sort_key(policy):
+    """Get the sort key ranking a gloss's clips under a selection policy."""
+    if policy == 'smallest':
+        return lambda clip: (clip[0].size is None, clip[0].size or 0)
+    if policy == 'shortest':
+        return lambda clip: (clip[0].duration is None, clip[0].duration or 0)
+    if policy == 'pinned':
+        return lambda clip: not clip[1]
+    # 'first' and 'round-robin' keep the order the clips were added in
+    return lambda clip: 0
+
+def videos_vary_per_lookup():
+    """Whether the same gloss may get a different clip on every lookup."""
+    return VIDEO_VARIANT_POLICY == 'round-robin'
+
+class VideoIndex:
+    """
+    Immutable in-memory index of gloss key to playable video.
+    
+    Built from the whole SignVideo table with every file resolved up front,
+    so lookups are a dict probe with no database or filesystem access.
+    Rows whose files are missing are left out.
+    """
+    
+    def __init__(self, entries, version=None, policy=VIDEO_VARIANT_POLICY):
+        self._entries = MappingProxyType(entries)
+        self.version = version
+        self.policy = policy
+        self._turns = {}
+        # Memoized per index, so a rebuilt index never serves stale spellings
+        self.fingerspell = lru_cache(maxsize=FINGERSPELL_CACHE_SIZE)(self._fingerspell)
+    
+    @classmethod
+    def build(cls, version=None, policy=VIDEO_VARIANT_POLICY):
+        """
+        Load every SignVideo and SignVideoVariant row into a new index.
+        
+        The clips of each gloss are ranked by the selection policy once,
+        here, so the best clip is simply the entry itself. Needs an app
+        context.
+        """
+        rows = {}
+        for video in SignVideo.query.order_by(SignVideo.id).all():
+            rows.setdefault(gloss_key(video.gloss_word), []).append((video, video.gloss_word, False))
+        glosses = {video.id: video.gloss_word for key in rows for video, _, _ in rows[key]}
+        for variant in SignVideoVariant.query.order_by(SignVideoVariant.id).all():
+            gloss_word = glosses.get(variant.sign_video_id)
+            if gloss_word is not None:
+                rows[gloss_key(gloss_word)].append((variant, gloss_word, bool(variant.is_pinned)))
+        
+        entries = {}
+        sort_key = _policy_sort_key(policy)
+        for key, videos in rows.items():
+            clips = []
+            for video, gloss_word, pinned in videos:
+                resolved = resolve_sign_video(video)
+                # Identical clips stored under different names are one variant
+                if not resolved or any(entry.url == resolved[0] for entry, _ in clips):
+                    continue
+                url, path = resolved
+                size = video.size if video.size is not None else os.path.getsize(path)
+                clips.append((VideoEntry(gloss_word, url, path, video.duration, (),
+                                         MappingProxyType(_renditions(video)), size), pinned))
+            if clips:
+                ranked = [entry for entry, _ in sorted(clips, key=sort_key)]
+                entries[key] = ranked[0]._replace(variants=tuple(ranked[1:]))
+        return cls(entries, version, policy)
+    
+    def pick(self, entry):
+        """
+        Get the clip to serve for an entry under the selection policy.
+        
+        Only 'round-robin' differs from the entry itself: each call moves on
+        to the next of its clips, spreading load across cached files.
+        """
+        if self.policy != 'round-robin' or not entry.variants:
+            return entry
+        turns = self._turns.get(entry.url)
+        if turns is None:
+            turns = self._turns.setdefault(entry.url, itertools.count())
+        clips = (entry, *entry.variants)
+        return clips[next(turns) % len(clips)]
+    
+    def get(self, gloss_word):
+        """Get the video entry for a gloss word, or None."""
+        return self._entries.get(gloss_key(gloss_word))
+    
+    def _letter(self, char):
+        # Only clips imported as letters; a bare "a" or "i" is a word sign
+        return self._entries.get(gloss_key(letter_gloss(char)))
+    
+    def _fingerspell(self, word):
+        letters = [char for char in word.lower() if char.isalnum()]
+        clips = tuple((char.upper(), self._letter(char)) for char in letters)
+        if not clips or any(entry is None for _, entry in clips):
+            return None
+        return clips
+    
+    def resolve(self, gloss_word):
+        """
+        Get the clips to play for a gloss word.
+        
+        Falls back, in order, to the clip for the whole gloss, the clips
+        for each word of a multi-word gloss, and finally per-letter
+        fingerspelling clips for words with no clip of their own.
+        
+        Args:
+            gloss_word (str): An ISL gloss word/phrase.
+            
+        Returns:
+            list: ``(gloss, VideoEntry, spelled_word)`` tuples, where
+            ``spelled_word`` is the word being fingerspelled or None.
+        """
+        entry = self.get(gloss_word)
+        if entry is not None:
+            return [(gloss_word, entry, None)]
+        
+        words = gloss_key(gloss_word).split()
+        if len(words) > 1:
+            return [clip for word in words for clip in self.resolve(word.upper())]
+        
+        letters = self.fingerspell(gloss_key(gloss_word))
+        if letters is None:
+            return []
+        return [(letter, entry, gloss_word) for letter, entry in letters]
+    
+    def __len__(self):
+        return len(self._entries)
+
+_video_index = None
+_video_index_lock = threading.Lock()
+
+def load_video_index():
+    """
+    (Re)build the in-memory video index from the database.
+    
+    Called when the app boots; afterwards ``get_video_index`` rebuilds it
+    automatically when the SignVideo change signal moves. Needs an app
+    context.
+    
+    Returns:
+        VideoIndex: The freshly loaded index.
+    """
+    global _video_index
+    with _video_index_lock:
+        version = video_change_signal.version()
+        index = VideoIndex.build(version)
+        _video_index = index
+    logger.info(f"Loaded video index with {len(index)} glosses")
+    return index
+
+def get_video_index():
+    """
+    Get the current video index, rebuilding it if SignVideo rows changed.
+    
+    Returns:
+        VideoIndex: The shared index for this process.
+    """
+    index = _video_index
+    if index is None or index.version != video_change_signal.version():
+        index = load_video_index()
+    return index
+
 def get_video_paths(gloss_words):
     """
     Get the paths to videos corresponding to the gloss words.
     
-    In a real application, this would query a database or filesystem 
-    to find the appropriate videos. For this implementation, we use a 
-    model content protocol approach to retrieve videos from our dataset.
+    Lookups go through the in-memory video index, so only glosses whose
+    video file actually exists are returned. Glosses without a clip are
+    fingerspelled when clips for all their letters exist. The first call after the
+    SignVideo table changes rebuilds the index and needs an app context.
     
     Args:
         gloss_words (list): List of ISL gloss words/phrases.
@@ -22,27 +361,23 @@ def get_video_paths(gloss_words):
         if not gloss_words:
             return []
         
-        result = []
-        
-        # Set up the default dataset path to the local videos directory
-        dataset_path = os.environ.get("ISL_DATASET_PATH", "./data/videos")
-        
-        # Ensure the directory exists
-        os.makedirs(dataset_path, exist_ok=True)
+        index = get_video_index()
         
+        result = []
         for gloss_word in gloss_words:
-            # Normalize the gloss word for file naming (lowercase, replace spaces)
-            normalized_word = gloss_word.lower().replace(" ", "_")
-            
-            # Construct the video path
-            video_path = f"/static/videos/{normalized_word}.mp4"
-            
-            # For demonstration - create a placeholder entry for each gloss word
-            # In a real application, you would query your video dataset
-            result.append({
-                "gloss": gloss_word,
-                "video_path": video_path
-            })
+            # Unknown words fall back to fingerspelling from letter clips
+            for gloss, entry, spelled_word in index.resolve(gloss_word):
+                entry = index.pick(entry)
+                video = {
+                    "gloss": gloss,
+                    "video_path": entry.url,
+                    "duration": entry.duration
+                }
+                if entry.renditions:
+                    video["renditions"] = {name: url for name, (url, _) in entry.renditions.items()}
+                if spelled_word:
+                    video["fingerspelled"] = spelled_word
+                result.append(video)
             
         logger.debug(f"Retrieved {len(result)} video paths for {len(gloss_words)} gloss words")
         return result
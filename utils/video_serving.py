@@ -0,0 +1,97 @@
+import hashlib
+import logging
+import mimetypes
+import os
+from functools import lru_cache
+from urllib.parse import quote
+
+from flask import request, send_file, current_app
+
+logger = logging.getLogger(__name__)
+
+# How long (in seconds) browsers may reuse an unversioned video before revalidating
+VIDEO_CACHE_MAX_AGE = int(os.environ.get("VIDEO_CACHE_MAX_AGE", "3600"))
+
+# Max age used for versioned URLs, whose content can never change
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Hand file transfer to the front server: '' (Python sends the bytes),
+# 'x-sendfile' (Apache/lighttpd) or 'x-accel' (nginx)
+VIDEO_SENDFILE_MODE = os.environ.get("VIDEO_SENDFILE_MODE", "")
+
+# Internal nginx location mapped to the static folder, used with 'x-accel'
+VIDEO_ACCEL_PREFIX = os.environ.get("VIDEO_ACCEL_PREFIX", "/protected-static/")
+
+# File extensions the media route is willing to serve
+VIDEO_EXTENSIONS = {'.mp4', '.webm', '.mov', '.m4v'}
+
+@lru_cache(maxsize=16384)
+def _file_digest(path, mtime_ns, size):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def file_digest(path):
+    """
+    Get the SHA-256 of a file's content.
+
+    Digests are memoized by path, modification time and size, so a file is
+    only read again after it changes.
+    """
+    st = os.stat(path)
+    return _file_digest(path, st.st_mtime_ns, st.st_size)
+
+def version_token(path):
+    """
+    Get a short token identifying the current version of a file.
+
+    Cheap to compute (a stat, no read), so it can be put in every video
+    URL; a replaced file gets a new URL, which lets browsers and CDNs
+    cache each URL forever.
+    """
+    st = os.stat(path)
+    return hashlib.sha1(f"{st.st_mtime_ns}:{st.st_size}".encode('utf-8')).hexdigest()[:16]
+
+def send_video(path, root, immutable=False, etag=None):
+    """
+    Send a video file with range, ETag and caching support.
+
+    ``Range`` requests get 206 partial responses and ``If-None-Match`` /
+    ``If-Range`` are checked against the ETag, by default the file's
+    ``version_token`` so no request has to read the file to answer. With
+    VIDEO_SENDFILE_MODE the body transfer is offloaded to the front server,
+    which then also handles ranges.
+
+    Args:
+        path (str): Absolute path of the video.
+        root (str): Folder the front server maps VIDEO_ACCEL_PREFIX to, or
+            None if the file cannot be offloaded with X-Accel-Redirect.
+        immutable (bool): Whether the request URL pins this exact content.
+        etag (str): ETag to use instead of the version token, such as the
+            stored content digest.
+
+    Returns:
+        flask.Response: The response to return from the view.
+    """
+    etag = etag or version_token(path)
+    mimetype = mimetypes.guess_type(path)[0] or 'video/mp4'
+
+    relative = os.path.relpath(path, root).replace(os.sep, '/') if root else '..'
+    if VIDEO_SENDFILE_MODE == 'x-accel' and not relative.startswith('..'):
+        response = current_app.response_class(mimetype=mimetype)
+        response.headers['X-Accel-Redirect'] = VIDEO_ACCEL_PREFIX + quote(relative)
+        response.set_etag(etag)
+        response.make_conditional(request)
+    else:
+        response = send_file(path, mimetype=mimetype, conditional=True, etag=etag,
+                             max_age=VIDEO_CACHE_MAX_AGE)
+
+    response.cache_control.public = True
+    if immutable:
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.max_age = VIDEO_CACHE_MAX_AGE
+    return response
@@ -0,0 +1,192 @@
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+from functools import lru_cache
+from urllib.parse import urlencode
+
+logger = logging.getLogger(__name__)
+
+# Folder holding stitched sentence videos
+STITCH_CACHE_DIR = os.environ.get(
+    "STITCH_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                 'data', 'stitched'))
+
+# Total size (in bytes) of stitched videos kept before the least recently used are evicted
+STITCH_CACHE_MAX_BYTES = int(os.environ.get("STITCH_CACHE_MAX_BYTES", str(1024 ** 3)))
+
+# Maximum number of ffmpeg stitching processes running at the same time
+STITCH_WORKERS = int(os.environ.get("STITCH_WORKERS", "2"))
+
+# Timeout (in seconds) for stitching one sentence
+STITCH_TIMEOUT = float(os.environ.get("STITCH_TIMEOUT", "60"))
+
+# Longest a request waits (in seconds) for a free stitching slot before it is turned away
+STITCH_QUEUE_TIMEOUT = float(os.environ.get("STITCH_QUEUE_TIMEOUT", "5"))
+
+_stitch_slots = threading.BoundedSemaphore(STITCH_WORKERS)
+_key_locks = {}
+_key_locks_lock = threading.Lock()
+
+class StitchBusy(Exception):
+    """Raised when no stitching slot frees up within ``STITCH_QUEUE_TIMEOUT``."""
+
+def sentence_video_url(gloss_words):
+    """Build the URL of the stitched video for a gloss sequence."""
+    return '/sentence-video?' + urlencode([('gloss', gloss) for gloss in gloss_words])
+
+@lru_cache(maxsize=4096)
+def _probe_streams(path, mtime_ns):
+    """Get the stream parameters that must match for a stream-copy concat."""
+    cmd = ['ffprobe', '-v', 'error', '-print_format', 'json', '-show_entries',
+           'stream=codec_type,codec_name,profile,width,height,pix_fmt,sample_rate,channels,time_base',
+           path]
+    result = subprocess.run(cmd, check=True, capture_output=True, timeout=10)
+    streams = json.loads(result.stdout).get('streams', [])
+    return tuple(sorted(tuple(sorted(stream.items())) for stream in streams))
+
+def _can_stream_copy(paths):
+    """Check whether all clips share codecs and parameters."""
+    try:
+        signatures = {_probe_streams(path, os.stat(path).st_mtime_ns) for path in paths}
+    except Exception as e:
+        logger.warning(f"Could not probe clips, re-encoding instead: {str(e)}")
+        return False
+    return len(signatures) == 1
+
+def _cache_key(paths):
+    digest = hashlib.sha256()
+    for path in paths:
+        st = os.stat(path)
+        digest.update(f"{path}\0{st.st_mtime_ns}\0{st.st_size}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+def _key_lock(key):
+    with _key_locks_lock:
+        return _key_locks.setdefault(key, threading.Lock())
+
+def _concat_copy(paths, output):
+    """Join clips with the concat demuxer, copying streams without re-encoding."""
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as listing:
+        for path in paths:
+            escaped = path.replace("'", "'\\''")
+            listing.write(f"file '{escaped}'\n")
+    try:
+        cmd = ['ffmpeg', '-y', '-nostdin', '-loglevel', 'error', '-f', 'concat', '-safe', '0',
+               '-i', listing.name, '-c', 'copy', '-movflags', '+faststart', output]
+        subprocess.run(cmd, check=True, capture_output=True, timeout=STITCH_TIMEOUT)
+    finally:
+        os.unlink(listing.name)
+
+def _frame_size(path):
+    """Get the width and height of a clip's first video stream."""
+    try:
+        for stream in _probe_streams(path, os.stat(path).st_mtime_ns):
+            stream = dict(stream)
+            if stream.get('codec_type') == 'video':
+                return stream['width'], stream['height']
+    except Exception as e:
+        logger.warning(f"Could not probe frame size of {path}: {str(e)}")
+    return 640, 480
+
+def _concat_reencode(paths, output):
+    """Join clips with differing formats by fitting them to the first clip and re-encoding."""
+    width, height = _frame_size(paths[0])
+    inputs = []
+    filters = []
+    for i, path in enumerate(paths):
+        inputs += ['-i', path]
+        filters.append(f"[{i}:v]scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                       f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,format=yuv420p[v{i}]")
+    labels = ''.join(f"[v{i}]" for i in range(len(paths)))
+    filters.append(f"{labels}concat=n={len(paths)}:v=1:a=0[out]")
+    cmd = ['ffmpeg', '-y', '-nostdin', '-loglevel', 'error', *inputs,
+           '-filter_complex', ';'.join(filters), '-map', '[out]',
+           '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '23',
+           '-movflags', '+faststart', output]
+    subprocess.run(cmd, check=True, capture_output=True, timeout=STITCH_TIMEOUT)
+
+def _evict(max_bytes=STITCH_CACHE_MAX_BYTES):
+    """Delete the least recently used stitched videos until the cache fits."""
+    files = []
+    with os.scandir(STITCH_CACHE_DIR) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith('.mp4') and '.part' not in entry.name:
+                st = entry.stat()
+                files.append((st.st_mtime, st.st_size, entry.path))
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        try:
+            os.unlink(path)
+            total -= size
+            logger.debug(f"Evicted stitched video {path}")
+        except OSError:
+            pass
+
+def stitch_videos(paths):
+    """
+    Get a single video playing the given clips back to back.
+
+    Results are cached on disk under a key derived from the clip paths and
+    their modification times. Clips with matching codecs are joined by
+    stream copy; otherwise they are re-encoded. A cache hit only refreshes
+    the file's modification time, which drives LRU eviction.
+
+    Args:
+        paths (list): Absolute paths of the clips, in playing order.
+
+    Returns:
+        str: Path of the stitched (or, for a single clip, original) video.
+
+    Raises:
+        StitchBusy: If every stitching slot stays taken for
+            ``STITCH_QUEUE_TIMEOUT`` seconds.
+    """
+    if len(paths) == 1:
+        return paths[0]
+
+    key = _cache_key(paths)
+    output = os.path.join(STITCH_CACHE_DIR, f"{key}.mp4")
+
+    # Only one request stitches a given sentence; the rest wait for its result
+    lock = _key_lock(key)
+    try:
+        with lock:
+            if os.path.exists(output):
+                os.utime(output)
+                return output
+
+            os.makedirs(STITCH_CACHE_DIR, exist_ok=True)
+            fd, temp_output = tempfile.mkstemp(dir=STITCH_CACHE_DIR, suffix='.part.mp4')
+            os.close(fd)
+            try:
+                # A request thread must not queue behind the slots indefinitely
+                if not _stitch_slots.acquire(timeout=STITCH_QUEUE_TIMEOUT):
+                    raise StitchBusy(f"No stitching slot free after {STITCH_QUEUE_TIMEOUT}s")
+                try:
+                    if _can_stream_copy(paths):
+                        logger.debug(f"Stitching {len(paths)} clips by stream copy")
+                        _concat_copy(paths, temp_output)
+                    else:
+                        logger.debug(f"Stitching {len(paths)} clips by re-encoding")
+                        _concat_reencode(paths, temp_output)
+                finally:
+                    _stitch_slots.release()
+                os.replace(temp_output, output)
+            finally:
+                if os.path.exists(temp_output):
+                    os.unlink(temp_output)
+    finally:
+        # Cache hits included, or the dict would keep a lock per sentence ever served
+        with _key_locks_lock:
+            if _key_locks.get(key) is lock:
+                del _key_locks[key]
+
+    _evict()
+    return output
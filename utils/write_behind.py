@@ -0,0 +1,282 @@
+import atexit
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from models import db, Translation
+from utils.related import index_translation_terms
+
+logger = logging.getLogger(__name__)
+
+# Set to 0 to write every translation in the request that produced it
+WRITE_BEHIND_ENABLED = os.environ.get("WRITE_BEHIND_ENABLED", "1") == "1"
+
+# Number of queued translations that triggers a flush
+WRITE_BEHIND_BATCH_SIZE = int(os.environ.get("WRITE_BEHIND_BATCH_SIZE", "100"))
+
+# Longest a queued translation waits before it is written, in seconds
+WRITE_BEHIND_FLUSH_INTERVAL = float(os.environ.get("WRITE_BEHIND_FLUSH_INTERVAL", "1.0"))
+
+# Folder holding batches that could not be written, replayed once the database is back
+WRITE_BEHIND_SPILL_DIR = os.environ.get(
+    "WRITE_BEHIND_SPILL_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                 'data', 'translation_spill'))
+
+def new_public_id():
+    """
+    Make a ``public_id`` that records when the translation was queued.
+
+    The first 12 hex digits are the time in milliseconds since the epoch
+    and the other 20 are random, so the id keeps the 32 hex digits of a
+    UUID.
+    """
+    return f"{int(time.time() * 1000):012x}{uuid.uuid4().hex[:20]}"
+
+def queued_at(public_id):
+    """Get the time recorded by ``new_public_id``, in seconds since the epoch."""
+    return int(public_id[:12], 16) / 1000
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def _from_json(row):
+    row['timestamp'] = datetime.fromisoformat(row['timestamp'])
+    return row
+
+class TranslationWriter:
+    """
+    Write-behind buffer for Translation rows.
+
+    Requests queue their translation and return at once; a background
+    thread writes the queue as multi-row INSERTs whenever ``batch_size``
+    rows are waiting or ``flush_interval`` seconds have passed. Rows are
+    identified by their ``public_id`` until they get a database id.
+
+    A batch that fails to be written, for whatever reason, is saved to its
+    own fsynced file in ``spill_dir`` and replayed before the next batch.
+    Rows already written, say by another worker replaying the same file,
+    are skipped by the unique ``(public_id, timestamp)`` index, so a batch
+    is never written twice. A spilled batch that fails for any reason other
+    than the database being unreachable is renamed to ``*.failed`` and left
+    for an operator, so it can't hold back the batches behind it. Rows still queued when the process is killed
+    outright are lost; a normal exit flushes.
+    """
+
+    def __init__(self, app, enabled=WRITE_BEHIND_ENABLED, batch_size=WRITE_BEHIND_BATCH_SIZE,
+                 flush_interval=WRITE_BEHIND_FLUSH_INTERVAL, spill_dir=WRITE_BEHIND_SPILL_DIR):
+        self.app = app
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_dir = spill_dir
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.written = 0
+        self.spilled = 0
+        self.batches = 0
+        atexit.register(self.shutdown)
+
+    def add(self, **fields):
+        """
+        Queue a translation to be written.
+
+        Args:
+            **fields: Translation column values.
+
+        Returns:
+            str: The ``public_id`` identifying the translation.
+        """
+        fields.setdefault('public_id', new_public_id())
+        fields.setdefault('timestamp', datetime.utcnow())
+        with self._lock:
+            self._pending.append(fields)
+            pending = len(self._pending)
+        if not self.enabled:
+            self.flush()
+        else:
+            self._ensure_thread()
+            if pending >= self.batch_size:
+                self._wakeup.set()
+        return fields['public_id']
+
+    def is_pending(self, public_id):
+        """Tell whether a translation is still waiting in this process's queue."""
+        with self._lock:
+            return any(row['public_id'] == public_id for row in self._pending)
+
+    def _ensure_thread(self):
+        # Threads don't survive a fork, so each worker process starts its own
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='translation-writer',
+                                                daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Translation writer failed: {str(e)}")
+
+    def flush(self):
+        """
+        Write all queued translations now, and any spilled batches first.
+
+        Returns:
+            int: Number of translations written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending = self._pending, []
+            with self.app.app_context():
+                written = self._replay_spills()
+                if not rows:
+                    return written
+                try:
+                    inserted = self._insert(rows)
+                except Exception as e:
+                    # The rows are no longer queued, so whatever went wrong they must be saved
+                    db.session.rollback()
+                    logger.warning(f"Could not write {len(rows)} translations, spilling: {str(e)}")
+                    self._spill(rows)
+                    return written
+            self.written += inserted
+            self.batches += 1
+            return written + inserted
+
+    def _insert(self, rows):
+        """
+        Insert rows in one transaction, skipping those already written.
+
+        Returns:
+            int: Number of rows inserted.
+        """
+        table = Translation.__table__
+        # Every row needs the same keys for a single multi-row INSERT
+        columns = set().union(*rows)
+        values = [{column: row.get(column) for column in columns} for row in rows]
+        dialect = db.engine.dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+            # The unique index decides, so concurrent writers can't both insert a row
+            inserted = db.session.execute(
+                insert(table).on_conflict_do_nothing()
+                .returning(table.c.id, table.c.original_text, table.c.is_successful),
+                values).all()
+        else:
+            public_ids = [row['public_id'] for row in rows]
+            existing = set(db.session.execute(
+                select(table.c.public_id).where(table.c.public_id.in_(public_ids))).scalars())
+            values = [row for row in values if row['public_id'] not in existing]
+            inserted = []
+            if values:
+                db.session.execute(table.insert(), values)
+                inserted = db.session.execute(
+                    select(table.c.id, table.c.original_text, table.c.is_successful)
+                    .where(table.c.public_id.in_([row['public_id'] for row in values]))).all()
+        # Core inserts skip the ORM hook that indexes words, so index here
+        index_translation_terms(db.session, [(translation_id, text)
+                                             for translation_id, text, is_successful in inserted
+                                             if is_successful])
+        db.session.commit()
+        return len(inserted)
+
+    def _spill(self, rows):
+        """Durably save rows that could not be written."""
+        os.makedirs(self.spill_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.spill_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            for row in rows:
+                f.write(json.dumps(row, default=_json_default) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, os.path.join(
+            self.spill_dir, f"translations-{datetime.utcnow():%Y%m%d%H%M%S%f}-{uuid.uuid4().hex[:8]}.jsonl"))
+        self.spilled += len(rows)
+
+    def _quarantine(self, path, reason):
+        """Set a spilled batch aside so replays skip it."""
+        try:
+            os.replace(path, f"{path}.failed")
+        except FileNotFoundError:
+            return
+        logger.error(f"Could not replay {path}, moved it to {path}.failed: {reason}")
+
+    def _replay_spills(self):
+        """
+        Write spilled batches, oldest first.
+
+        Stops at the first batch that fails because the database can't be
+        reached; batches it rejects are quarantined and the rest replayed.
+        """
+        written = 0
+        for path in sorted(glob.glob(os.path.join(self.spill_dir, 'translations-*.jsonl'))):
+            try:
+                with open(path) as f:
+                    rows = [_from_json(json.loads(line)) for line in f if line.strip()]
+            except FileNotFoundError:
+                # Replayed by another worker in the meantime
+                continue
+            except (ValueError, KeyError, TypeError) as e:
+                self._quarantine(path, f"unreadable batch: {str(e)}")
+                continue
+            try:
+                inserted = self._insert(rows)
+            except (OperationalError, InterfaceError) as e:
+                db.session.rollback()
+                logger.warning(f"Could not replay {path}, will retry: {str(e)}")
+                break
+            except Exception as e:
+                # Integrity, data or binding errors fail the same way on every retry
+                db.session.rollback()
+                self._quarantine(path, str(e))
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            logger.info(f"Replayed {inserted} spilled translations from {path}")
+            written += inserted
+            self.written += inserted
+        return written
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'enabled': self.enabled,
+            'pending': pending,
+            'written': self.written,
+            'batches': self.batches,
+            'spilled': self.spilled,
+        }
+
+    def shutdown(self):
+        """Write what is still queued; called at exit."""
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Could not flush translations at exit: {str(e)}")